@@ -0,0 +1,36 @@
+"""direct-to-storage upload columns on upload_jobs
+
+Revision ID: c3f1d2a4b5e6
+Revises: a56dc382ec63
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f1d2a4b5e6'
+down_revision: Union[str, None] = 'a56dc382ec63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('upload_jobs', sa.Column('storage_key', sa.String(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('name', sa.String(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('description', sa.Text(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('size', sa.BigInteger(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('content_type', sa.String(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('error', sa.Text(), nullable=True))
+    op.add_column('upload_jobs', sa.Column('completed_at', sa.DateTime(), nullable=True))
+    op.create_unique_constraint('uq_upload_jobs_storage_key', 'upload_jobs', ['storage_key'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_upload_jobs_storage_key', 'upload_jobs', type_='unique')
+    for column in ('completed_at', 'error', 'content_type', 'size', 'description', 'name', 'storage_key'):
+        op.drop_column('upload_jobs', column)
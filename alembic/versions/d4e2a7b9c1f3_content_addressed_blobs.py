@@ -0,0 +1,38 @@
+"""content-addressed blob store: blobs table and models.content_hash
+
+Revision ID: d4e2a7b9c1f3
+Revises: c3f1d2a4b5e6
+Create Date: 2026-10-19 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e2a7b9c1f3'
+down_revision: Union[str, None] = 'c3f1d2a4b5e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('refcount', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    op.add_column('models', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_models_content_hash'), 'models', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_models_content_hash'), table_name='models')
+    op.drop_column('models', 'content_hash')
+    op.drop_table('blobs')
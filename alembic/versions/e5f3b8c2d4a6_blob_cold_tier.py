@@ -0,0 +1,27 @@
+"""cold storage tier: blobs.cold_since
+
+Revision ID: e5f3b8c2d4a6
+Revises: d4e2a7b9c1f3
+Create Date: 2026-10-19 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f3b8c2d4a6'
+down_revision: Union[str, None] = 'd4e2a7b9c1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('blobs', sa.Column('cold_since', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('blobs', 'cold_since')
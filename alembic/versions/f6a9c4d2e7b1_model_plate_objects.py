@@ -0,0 +1,31 @@
+"""per-object metadata of multi-object plates: models.objects
+
+Revision ID: f6a9c4d2e7b1
+Revises: e5f3b8c2d4a6
+Create Date: 2026-10-19 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a9c4d2e7b1'
+down_revision: Union[str, None] = 'e5f3b8c2d4a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'models',
+        sa.Column('objects', sa.JSON().with_variant(postgresql.JSONB(), 'postgresql'), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('models', 'objects')
@@ -1,11 +1,21 @@
 import logging
 import os
 
-from app.db.database import engine
+# Set logging configuration only once (avoid duplicate logs in Uvicorn workers).
+# Reads ENV directly: importing settings here would freeze them before
+# `mw serve` has chosen its profile.
+_debug = os.getenv("ENV", "development").lower() == "development"
+
+
+def env_log_level() -> str | None:
+    """``LOG_LEVEL`` if it names a logging level; empty or unknown counts as unset."""
+    level = os.getenv("LOG_LEVEL", "").strip().upper()
+    return level if isinstance(logging.getLevelName(level), int) else None
+
 
-# Set logging configuration only once (avoid duplicate logs in Uvicorn workers)
 logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+    level=env_log_level() or ("DEBUG" if _debug else "INFO"),
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 )
 
 logger = logging.getLogger("makerworks")
@@ -1,11 +1,17 @@
 # celery_worker.py — MakerWorks task runner
+#
+# The Celery application, its queues and per-lane worker profiles live in
+# `app.worker`. This module is kept as the historical entry point:
+#
+#   celery -A app.celery_worker worker ...     (plain celery CLI)
+#   python -m app.celery_worker cpu            (start a tuned worker profile)
 
-import os
 import logging
-from celery import Celery
+import os
+import sys
+import tempfile
+
 from dotenv import load_dotenv
-from kombu.serialization import register
-from kombu import Exchange, Queue
 
 # ─────────────────────────────────────────────────────────────
 # Load environment variables from .env if present
@@ -13,55 +19,30 @@ from kombu import Exchange, Queue
 load_dotenv()
 
 # ─────────────────────────────────────────────────────────────
-# Redis: Broker + Result Backend
-# ─────────────────────────────────────────────────────────────
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = os.getenv("REDIS_PORT", "6379")
-REDIS_DB = os.getenv("REDIS_DB", "0")
-
-CELERY_REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
-
-# ─────────────────────────────────────────────────────────────
-# Celery App Config
+# Prometheus multiprocess mode
 # ─────────────────────────────────────────────────────────────
-celery_app = Celery(
-    "makerworks",
-    broker=CELERY_REDIS_URL,
-    backend=CELERY_REDIS_URL,
-    include=[
-        "app.tasks.render",
-        "app.tasks.email",
-        "app.tasks.analytics",
-    ],
+# Task metrics are recorded inside prefork children, while the HTTP exporter
+# runs in the parent. prometheus_client shares them through per-process files,
+# which requires the directory to be set before prometheus_client is imported.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), f"makerworks-celery-metrics-{os.getpid()}"),
 )
+os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
 
-celery_app.conf.update(
-    task_track_started=True,
-    task_time_limit=600,
-    task_acks_late=True,
-    worker_prefetch_multiplier=1,
-    result_expires=3600,
-    broker_connection_retry_on_startup=True,
-    task_default_queue='default',
-    task_queues=(
-        Queue('default', Exchange('default'), routing_key='default'),
-    ),
-    worker_send_task_events=True,
-    task_send_sent_event=True,
-    enable_utc=True,
-    timezone='UTC',
-    worker_enable_remote_control=True,
-)
+from app.worker import CELERY_BROKER_URL, WORKER_PROFILES, celery_app  # noqa: E402
 
 # ─────────────────────────────────────────────────────────────
 # Prometheus Metrics Setup via Celery Prometheus Exporter
 # ─────────────────────────────────────────────────────────────
 try:
-    import prometheus_client
-    from prometheus_client import start_http_server
+    from prometheus_client import CollectorRegistry, start_http_server
+    from prometheus_client.multiprocess import MultiProcessCollector
 
     PROMETHEUS_METRICS_PORT = int(os.getenv("PROMETHEUS_METRICS_PORT", 9808))
-    start_http_server(PROMETHEUS_METRICS_PORT)
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    start_http_server(PROMETHEUS_METRICS_PORT, registry=registry)
     logging.info(f"📈 Prometheus metrics exposed at :{PROMETHEUS_METRICS_PORT}")
 except ImportError:
     logging.warning("Prometheus client not installed — metrics disabled")
@@ -73,5 +54,8 @@ logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 if __name__ == "__main__":
-    logger.info("🚀 Starting Celery worker with broker: %s", CELERY_REDIS_URL)
-    celery_app.start()
+    profile = sys.argv[1] if len(sys.argv) > 1 else "cpu"
+    if profile not in WORKER_PROFILES:
+        sys.exit(f"Unknown worker profile {profile!r}; choose from {sorted(WORKER_PROFILES)}")
+    logger.info("🚀 Starting %s worker with broker: %s", profile, CELERY_BROKER_URL)
+    celery_app.worker_main(WORKER_PROFILES[profile].argv(profile))
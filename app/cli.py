@@ -126,5 +126,258 @@ def seed_filaments_cmd() -> None:
     click.echo("✅ Filaments seeded.")
 
 
+@cli.group()
+def worker() -> None:
+    """Run Celery workers."""
+    pass
+
+
+@worker.command("profiles")
+def worker_profiles_cmd() -> None:
+    """Show the queue and pool settings of each worker profile."""
+    from app.worker import WORKER_PROFILES
+
+    for name, profile in WORKER_PROFILES.items():
+        click.echo(
+            f"{name:<9} queues={','.join(profile.queues)} pool={profile.pool} "
+            f"concurrency={profile.concurrency} prefetch={profile.prefetch_multiplier} "
+            f"time_limit={profile.soft_time_limit}/{profile.time_limit}s"
+        )
+
+
+@worker.command("start")
+@click.argument("profile", type=click.Choice(["priority", "cpu", "io"]))
+def worker_start_cmd(profile: str) -> None:
+    """Start a Celery worker tuned for PROFILE's queue."""
+    from app.celery_worker import celery_app
+    from app.worker import WORKER_PROFILES
+
+    celery_app.worker_main(WORKER_PROFILES[profile].argv(profile))
+
+
+@cli.group()
+def storage() -> None:
+    """Manage files under the uploads directory."""
+    pass
+
+
+@storage.command("precompress")
+@click.option("--force", is_flag=True, help="Rebuild variants that are already up to date")
+def storage_precompress_cmd(force: bool) -> None:
+    """Build .br/.gz variants for existing STL/OBJ uploads."""
+    from pathlib import Path
+
+    from app.config.settings import settings
+    from app.utils.static_files import (
+        PRECOMPRESS_SUFFIXES,
+        VARIANTS,
+        variant_path,
+        write_precompressed_variants,
+    )
+
+    root = Path(PROJECT_ROOT) / settings.uploads_path
+    built = skipped = 0
+    for path in root.rglob("*"):
+        if not path.is_file() or path.suffix.lower() not in PRECOMPRESS_SUFFIXES:
+            continue
+        current = all(
+            variant_path(path, enc).exists()
+            and variant_path(path, enc).stat().st_mtime >= path.stat().st_mtime
+            for enc in VARIANTS
+        )
+        if current and not force:
+            skipped += 1
+            continue
+        write_precompressed_variants(path)
+        built += 1
+    click.echo(f"✅ Precompressed {built} file(s), {skipped} already up to date.")
+
+
+@storage.command("reshard")
+@click.option("--batch-size", default=200, show_default=True, help="Models per transaction")
+@click.option("--pause", default=0.5, show_default=True, help="Seconds to wait between batches")
+@click.option("--dry-run", is_flag=True, help="Only report what would be moved")
+def storage_reshard_cmd(batch_size: int, pause: float, dry_run: bool) -> None:
+    """Move models from users/<id>/models/ into the sharded per-model layout."""
+    from app.scripts.reshard import reshard_models
+
+    stats = asyncio.run(reshard_models(batch_size=batch_size, pause=pause, dry_run=dry_run))
+    verb = "Would move" if dry_run else "Moved"
+    click.echo(
+        f"✅ {verb} {stats.migrated} of {stats.scanned} model(s) ({stats.files} file(s)); "
+        f"{stats.missing} missing."
+    )
+
+
+@storage.command("dedupe")
+@click.option("--batch-size", default=200, show_default=True, help="Models per transaction")
+@click.option("--pause", default=0.5, show_default=True, help="Seconds to wait between batches")
+def storage_dedupe_cmd(batch_size: int, pause: float) -> None:
+    """Move existing model files into the content-addressed blob store."""
+    from app.scripts.dedupe import dedupe_models
+
+    stats = asyncio.run(dedupe_models(batch_size=batch_size, pause=pause))
+    click.echo(
+        f"✅ Hashed {stats.scanned} model(s): {stats.stored} stored, {stats.duplicates} duplicate(s) "
+        f"({stats.reclaimed_bytes / 1024 / 1024:.1f} MB reclaimed), {stats.missing} missing."
+    )
+
+
+@storage.command("gc")
+@click.option("--shards", type=int, default=None, help="Listing shards to examine (default: GC_SHARDS_PER_RUN)")
+@click.option("--full", is_flag=True, help="Examine every shard once")
+@click.option("--dry-run", is_flag=True, help="Only report orphans, move and delete nothing")
+def storage_gc_cmd(shards: int | None, full: bool, dry_run: bool) -> None:
+    """Quarantine files no database row accounts for, delete expired quarantine."""
+    from app.services.storage_gc import SHARDS, collect_garbage
+
+    stats = asyncio.run(collect_garbage(shards=len(SHARDS) if full else shards, dry_run=dry_run))
+    if stats.skipped:
+        click.echo("⏭️ Another GC run is in progress; try again when it has finished.")
+        return
+    click.echo(
+        f"✅ Examined {stats.objects} object(s) in {stats.shards} shard(s): "
+        f"{stats.suspects} suspect, {stats.quarantined} quarantined, {stats.restored} restored, "
+        f"{stats.deleted} deleted ({stats.reclaimed_bytes / 1024 / 1024:.1f} MB reclaimed)."
+    )
+
+
+@storage.command("tier")
+@click.option("--batch-size", type=int, default=None, help="Blobs to demote at most (default: TIER_BATCH_SIZE)")
+@click.option("--dry-run", is_flag=True, help="Only count what would be demoted")
+def storage_tier_cmd(batch_size: int | None, dry_run: bool) -> None:
+    """Compress model files nobody reads with zstd, restore the ones read again."""
+    from app.services.tiering import rebalance
+
+    stats = asyncio.run(rebalance(batch_size=batch_size, dry_run=dry_run))
+    if stats.skipped:
+        click.echo("⏭️ Another tiering run is in progress; try again when it has finished.")
+        return
+    verb = "Would demote" if dry_run else "Demoted"
+    click.echo(
+        f"✅ {verb} {stats.demoted} of {stats.scanned} blob(s) "
+        f"({stats.saved_bytes / 1024 / 1024:.1f} MB saved), promoted {stats.promoted}."
+    )
+
+
+@cli.command("serve")
+@click.option("--bind", envvar="BIND", default="0.0.0.0:8000", show_default=True)
+@click.option(
+    "--workers",
+    envvar="WEB_CONCURRENCY",
+    type=int,
+    default=None,
+    help="Worker processes (default: from CPU and memory limits)",
+)
+@click.option(
+    "--env",
+    "env_name",
+    envvar="ENV",
+    type=click.Choice(
+        ["production", "staging", "development", "test"], case_sensitive=False
+    ),
+    default="production",
+    show_default=True,
+    help="Settings profile (ENV); anything but development disables debug features",
+)
+@click.option("--timeout", envvar="WEB_TIMEOUT", default=60, show_default=True)
+@click.option("--no-preload", is_flag=True, help="Import the app in each worker instead")
+@click.option("--dry-run", is_flag=True, help="Print the effective tuning and exit")
+def serve_cmd(
+    bind: str,
+    workers: int | None,
+    env_name: str,
+    timeout: int,
+    no_preload: bool,
+    dry_run: bool,
+) -> None:
+    """Run the API with the production Gunicorn/Uvicorn profile."""
+    from app.scripts.serve import describe, resolve_tuning, serve
+
+    tuning = resolve_tuning(
+        bind=bind,
+        workers=workers,
+        env=env_name,
+        preload=not no_preload,
+        timeout=timeout,
+    )
+    click.echo("⚙️  Effective server tuning:")
+    for line in describe(tuning):
+        click.echo(f"   {line}")
+    if dry_run:
+        return
+    serve(tuning)
+
+
+@cli.group()
+def bench() -> None:
+    """Performance benchmarks."""
+    pass
+
+
+@bench.command("startup")
+@click.option("--module", default="app.main", show_default=True, help="Module to import")
+@click.option("--runs", default=3, show_default=True, help="Cold starts to take the median of")
+@click.option(
+    "--max-seconds",
+    envvar="STARTUP_BUDGET_SECONDS",
+    default=2.0,
+    show_default=True,
+    help="Cold-start budget (wall time, interpreter included)",
+)
+@click.option(
+    "--max-rss-mb",
+    envvar="STARTUP_BUDGET_RSS_MB",
+    default=150.0,
+    show_default=True,
+    help="Peak RSS budget after import",
+)
+def bench_startup_cmd(module: str, runs: int, max_seconds: float, max_rss_mb: float) -> None:
+    """Measure cold-start time and RSS; fail if over budget."""
+    from app.scripts.bench import median_startup
+
+    sample = median_startup(module, runs)
+    click.echo(
+        f"⏱️  {module}: wall {sample.wall_seconds:.2f}s "
+        f"(import {sample.import_seconds:.2f}s), RSS {sample.max_rss_mb:.0f} MB "
+        f"— median of {runs}"
+    )
+
+    over = []
+    if sample.wall_seconds > max_seconds:
+        over.append(f"cold start {sample.wall_seconds:.2f}s > {max_seconds:.2f}s")
+    if sample.max_rss_mb > max_rss_mb:
+        over.append(f"RSS {sample.max_rss_mb:.0f} MB > {max_rss_mb:.0f} MB")
+    if over:
+        raise click.ClickException("Startup budget exceeded: " + "; ".join(over))
+    click.echo(f"✅ Within budget ({max_seconds:.2f}s, {max_rss_mb:.0f} MB).")
+
+
+@bench.command("imports")
+@click.option("--module", default="app.main", show_default=True, help="Module to import")
+@click.option("--top", default=20, show_default=True, help="Packages to show")
+def bench_imports_cmd(module: str, top: int) -> None:
+    """Show which packages dominate import time."""
+    from app.scripts.bench import import_profile
+
+    rows = import_profile(module)
+    click.echo(f"{'package':<28}{'self ms':>10}{'cumulative ms':>16}")
+    for package, self_ms, cumulative_ms in rows[:top]:
+        click.echo(f"{package:<28}{self_ms:>10.1f}{cumulative_ms:>16.1f}")
+
+
+@bench.command("middleware")
+@click.option("--requests", "count", default=3000, show_default=True)
+@click.option("--concurrency", default=32, show_default=True)
+def bench_middleware_cmd(count: int, concurrency: int) -> None:
+    """Compare req/s of the legacy and pure-ASGI middleware stacks."""
+    from app.scripts.bench import middleware_rps
+
+    results = middleware_rps(count, concurrency)
+    for stack, rps in results.items():
+        click.echo(f"{stack:<8} {rps:>9.0f} req/s")
+    click.echo(f"speedup  {results['asgi'] / results['legacy']:>9.2f}x")
+
+
 if __name__ == "__main__":
     cli()
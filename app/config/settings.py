@@ -1,3 +1,4 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 from pathlib import Path
@@ -23,6 +24,54 @@ class Settings(BaseSettings):
     model_dir: str = "models"
     avatar_dir: str = "avatars"
 
+    # Let the front proxy stream /uploads bodies after the app has authorized
+    # the request: "nginx" (X-Accel-Redirect) or "sendfile" (X-Sendfile).
+    uploads_offload: Optional[str] = None
+    uploads_offload_prefix: str = "/_protected_uploads"  # nginx internal location
+    uploads_offload_root: Optional[str] = None  # uploads dir as the proxy sees it
+
+    # Where uploads live: "local" (uploads_path), "s3" or "memory" (tests)
+    storage_backend: str = "local"
+    s3_endpoint_url: Optional[str] = None  # e.g. http://minio:9000
+    s3_bucket: Optional[str] = None
+    s3_region: str = "us-east-1"
+    s3_access_key_id: Optional[str] = None
+    s3_secret_access_key: Optional[str] = None
+    s3_prefix: str = ""
+    s3_public_url: Optional[str] = None  # public bucket/CDN base; presigned GETs otherwise
+    s3_part_size_mb: int = 8
+
+    # Direct uploads: presigned PUT lifetime, and the bearer token bucket
+    # event notifications must present (notifications disabled if unset)
+    direct_upload_expiry: int = 900
+    storage_webhook_token: Optional[str] = None
+
+    @field_validator("storage_webhook_token", mode="before")
+    @classmethod
+    def _unset_blank_token(cls, value):
+        # `STORAGE_WEBHOOK_TOKEN=  # comment` reaches us as the comment
+        if isinstance(value, str) and (not value.strip() or value.lstrip().startswith("#")):
+            return None
+        return value
+
+    # Orphaned-file collector: an orphan must be seen twice, GC_GRACE_SECONDS
+    # apart, before it is quarantined, and stays quarantined GC_RETENTION_HOURS
+    gc_grace_seconds: int = 3600
+    gc_retention_hours: int = 168
+    gc_shards_per_run: int = 64
+
+    # Cold tier: blobs unread for TIER_COLD_AFTER_DAYS are stored zstd-compressed
+    # and promoted back after TIER_PROMOTE_HITS reads between two tier runs
+    tier_cold_after_days: int = 30
+    tier_promote_hits: int = 3
+    tier_zstd_level: int = 12
+    tier_batch_size: int = 100
+
+    # Format conversions: a queued conversion holds its claim CONVERT_TIMEOUT
+    # seconds at most; a failed one isn't retried for CONVERT_FAILURE_TTL
+    convert_timeout: int = 600
+    convert_failure_ttl: int = 3600
+
     # Legacy compatibility for code expecting `upload_dir`
     @property
     def upload_dir(self) -> Path:
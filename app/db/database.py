@@ -2,6 +2,7 @@ import logging
 import os
 from collections.abc import AsyncGenerator
 
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -56,3 +57,20 @@ async def init_db() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
         logger.info("[DB] Tables created successfully.")
+
+
+def schema_fingerprint() -> str:
+    """
+    Short hash of the target database and the declared tables and columns;
+    changes whenever the models do, so a deploy with new tables re-runs
+    ``init_db``, and so does pointing the app at a different database.
+    """
+    import hashlib
+
+    # Without the password, so rotating credentials doesn't count as a new database
+    parts = [make_url(database_url).set(password=None).render_as_string()]
+    parts += [
+        f"{table.name}:{','.join(f'{c.name}:{c.type!r}' for c in table.columns)}"
+        for table in Base.metadata.sorted_tables
+    ]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
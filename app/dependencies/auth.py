@@ -1,4 +1,5 @@
 # app/routes/auth.py
+import asyncio
 import logging
 from fastapi import Depends, HTTPException, status, Request
 from app.db.database import get_async_db
@@ -6,6 +7,7 @@ from app.models.models import User
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.services.session_backend import get_session_user_id
+from app.services.storage import LocalStorage, get_storage
 from app.utils.filesystem import ensure_user_model_thumbnails
 
 logger = logging.getLogger(__name__)
@@ -50,9 +52,11 @@ async def get_current_user(
             detail="User not found",
         )
 
-    # After successful authentication, ensure thumbnails exist for this user's models
+    # After successful authentication, ensure thumbnails exist for this user's
+    # models (a directory scan, so only for local storage and off the loop)
     try:
-        ensure_user_model_thumbnails(str(user.id))
+        if isinstance(get_storage(), LocalStorage):
+            await asyncio.to_thread(ensure_user_model_thumbnails, str(user.id))
     except Exception as e:
         logger.exception("[AUTH] Thumbnail synchronization failed: %s", e)
 
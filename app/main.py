@@ -1,17 +1,21 @@
 import logging
 import os
+import time
 from contextlib import asynccontextmanager
-from pathlib import Path
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
-from starlette.middleware.gzip import GZipMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.config.settings import settings
-from app.db.database import init_db
+from app.db.database import init_db, schema_fingerprint
+from app.middleware import (
+    CompressionMiddleware,
+    DebugOriginMiddleware,
+    PathPrefixMiddleware,
+    StripTrailingSlashMiddleware,
+)
 from app.routes import (
     admin,
     auth,
@@ -25,10 +29,18 @@ from app.routes import (
     upload,
     users,
 )
-from app.services.cache.redis_service import verify_redis_connection
-from app.startup.admin_seed import ensure_admin_user
+from app.services.cache.redis_service import redis, verify_redis_connection
+from app.services.storage import LocalStorage, get_storage
+from app.services.system_history import RedisHistoryStore, snapshot_history
+from app.services.system_status import (
+    SystemStatusBroadcaster,
+    snapshot_sampler,
+    status_hub,
+)
+from app.startup.admin_seed import DEFAULT_ADMIN_EMAIL, ensure_admin_user
+from app.startup.graph import StartupStep, run_once, run_startup
 from app.utils.boot_messages import random_boot_message
-from app.utils.system_info import get_system_status_snapshot
+from app.utils.static_files import get_uploads_server
 
 logger = logging.getLogger("uvicorn")
 
@@ -39,64 +51,109 @@ app = FastAPI(
     description="MakerWorks backend API",
 )
 
-# ─── Session Middleware ──────────────────────
+# ─── Middleware (pure ASGI; last added runs first) ───
+# Nothing outside the auth routes reads `request.session` (auth itself uses
+# the Redis-backed `session` cookie), so the signed-cookie session is only
+# decoded there, under its own cookie name so the two never collide.
 SESSION_SECRET = os.getenv("SESSION_SECRET", "supersecretkey")
+SESSION_PATHS = tuple(
+    p for p in os.getenv("SESSION_MIDDLEWARE_PATHS", "/api/v1/auth").split(",") if p
+)
 app.add_middleware(
-    SessionMiddleware,
+    PathPrefixMiddleware,
+    middleware=SessionMiddleware,
+    prefixes=SESSION_PATHS,
     secret_key=SESSION_SECRET,
+    session_cookie="mw_state",
     same_site="lax",
     https_only=False,
 )
 
-# ─── Add Middleware *before* app starts ─────
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins + ["http://localhost:5173"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Conversions and levels of detail (routes/models.py) answer with these
+    expose_headers=["Link", "Retry-After", "X-Mesh-Level"],
 )
 
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# zstd / brotli / gzip for compressible types only; precompressed files pass through
+app.add_middleware(CompressionMiddleware, minimum_size=1000)
+
+# Avoids 307 redirect when hitting /api/v1/upload vs /api/v1/upload/
+app.add_middleware(StripTrailingSlashMiddleware)
+
+if settings.debug:
+    app.add_middleware(DebugOriginMiddleware)
 
 # ─── Lifespan tasks ─────────────────────────
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    snapshot = get_system_status_snapshot()
+async def log_system_snapshot() -> None:
+    snapshot_sampler.start()
+    snapshot = await snapshot_sampler.current()
     logger.info("📊 System Snapshot on Startup:")
     for key, value in snapshot.items():
         logger.info(f"   {key}: {value}")
 
+
+async def create_schema() -> None:
+    await run_once(redis, "schema", schema_fingerprint(), init_db)
+
+
+async def seed_admin() -> None:
+    await run_once(redis, "admin_seed", DEFAULT_ADMIN_EMAIL, ensure_admin_user)
+
+
+async def start_status_broadcaster() -> None:
+    snapshot_history.use(RedisHistoryStore(redis))
+    app.state.status_broadcaster = SystemStatusBroadcaster(
+        redis, status_hub, history=snapshot_history
+    )
+    await app.state.status_broadcaster.start()
+
+
+STARTUP_STEPS = [
+    StartupStep("system_snapshot", log_system_snapshot),
+    StartupStep("redis", verify_redis_connection),
+    StartupStep("schema", create_schema, requires=("redis",)),
+    StartupStep("admin_seed", seed_admin, requires=("schema",)),
+    StartupStep("status_broadcaster", start_status_broadcaster, requires=("redis",)),
+]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     logger.info(f"✅ CORS origins allowed: {settings.cors_origins}")
     logger.info(f"🎬 Boot Message: {random_boot_message()}")
 
-    await verify_redis_connection()
-    await init_db()
-    await ensure_admin_user()
+    start = time.perf_counter()
+    await run_startup(STARTUP_STEPS)
+    logger.info(f"🚀 Startup complete in {time.perf_counter() - start:.3f}s")
 
     yield
 
+    broadcaster = getattr(app.state, "status_broadcaster", None)
+    if broadcaster is not None:
+        await broadcaster.stop()
+    await snapshot_sampler.stop()
+
 app.router.lifespan_context = lifespan
 
-# ─── Debug CORS Middleware ──────────────────
-@app.middleware("http")
-async def debug_origin(request: Request, call_next):
-    origin = request.headers.get("origin")
-    logger.debug(f"[CORS] Incoming Origin: {origin}")
-    return await call_next(request)
-
-# ─── Debug Routes Endpoint ──────────────────
-@app.get("/debug/routes", include_in_schema=False)
-async def debug_routes():
-    routes_info = []
-    for route in app.router.routes:
-        routes_info.append({
-            "path": getattr(route, "path", None),
-            "name": getattr(route, "name", None),
-            "methods": list(getattr(route, "methods", [])),
-            "tags": getattr(route, "tags", []),
-        })
-    return JSONResponse(routes_info)
+# ─── Debug Routes Endpoint (development only) ───
+if settings.debug:
+
+    @app.get("/debug/routes", include_in_schema=False)
+    async def debug_routes():
+        routes_info = []
+        for route in app.router.routes:
+            routes_info.append({
+                "path": getattr(route, "path", None),
+                "name": getattr(route, "name", None),
+                "methods": list(getattr(route, "methods", [])),
+                "tags": getattr(route, "tags", []),
+            })
+        return JSONResponse(routes_info)
 
 # ─── Route Mount Helper ─────────────────────
 def mount(router, prefix: str, tags: list[str]):
@@ -122,28 +179,20 @@ mount(models.router, "/api/v1/models", ["models"])
 mount(metrics.router, "/metrics", ["metrics"])
 
 # ─── Mount Static Files ─────────────────────
-base_dir = Path(__file__).resolve().parent.parent
-uploads_path = (base_dir / settings.uploads_path).resolve()
+storage = get_storage()
+uploads_path = storage.root if isinstance(storage, LocalStorage) else None
 
-if not uploads_path.exists():
+if uploads_path is None:
+    logger.info(f"📁 Uploads stored in the {storage.name} backend")
+elif not uploads_path.exists():
     uploads_path.mkdir(parents=True, exist_ok=True)
     logger.info(f"📁 Created uploads directory at: {uploads_path}")
 else:
     logger.info(f"📁 Uploads directory exists: {uploads_path}")
 
-# Disable caching to avoid stale 404s during dev
-app.mount(
-    "/uploads",
-    StaticFiles(directory=str(uploads_path), html=False, check_dir=True),
-    name="uploads"
-)
-logger.info(f"📁 Uploads served from {uploads_path} at /uploads")
-
-# ─── Normalize Upload URL Handling ──────────
-# Avoids 307 redirect when hitting /api/v1/upload vs /api/v1/upload/
-@app.middleware("http")
-async def strip_trailing_slash(request: Request, call_next):
-    scope = request.scope
-    if scope["path"] != "/" and scope["path"].endswith("/"):
-        scope["path"] = scope["path"].rstrip("/")
-    return await call_next(request)
+# ETag/Range/immutable-aware; serves .br/.gz siblings of STL/OBJ files, or
+# redirects to presigned URLs when uploads live in S3
+app.mount("/uploads", get_uploads_server(), name="uploads")
+logger.info(f"📁 Uploads served from {uploads_path or storage.name} at /uploads")
+if settings.uploads_offload and uploads_path is not None:
+    logger.info(f"📁 Upload bodies offloaded to the proxy ({settings.uploads_offload})")
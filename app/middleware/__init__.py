@@ -0,0 +1,10 @@
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.debug import DebugOriginMiddleware
+from app.middleware.routing import PathPrefixMiddleware, StripTrailingSlashMiddleware
+
+__all__ = [
+    "CompressionMiddleware",
+    "DebugOriginMiddleware",
+    "PathPrefixMiddleware",
+    "StripTrailingSlashMiddleware",
+]
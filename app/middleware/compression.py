@@ -0,0 +1,108 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.compression import (
+    AVAILABLE_ENCODINGS,
+    StreamEncoder,
+    is_compressible,
+    negotiate,
+)
+
+
+class CompressionMiddleware:
+    """
+    Compress compressible responses with the best coding the client accepts
+    (zstd, brotli or gzip).
+
+    Unlike ``GZipMiddleware`` this leaves alone responses that are already
+    encoded (precompressed files) or whose type doesn't compress (images,
+    video, archives), and it streams: every body chunk is encoded and flushed
+    as it arrives instead of being buffered.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1000,
+        encodings: tuple[str, ...] = AVAILABLE_ENCODINGS,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = encodings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressedResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send
+        self.start: Message | None = None
+        self.encoder: StreamEncoder | None = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.on_send)
+
+    async def on_send(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if "content-encoding" in headers or not is_compressible(headers.get("content-type")):
+                self.passthrough = True
+                await self.send(message)
+            else:
+                self.start = message  # held until we see the first chunk
+            return
+
+        if message["type"] != "http.response.body":
+            # e.g. zerocopy/pathsend extensions: nothing to encode.
+            await self._flush_start(encode=False)
+            self.passthrough = True
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            if not more_body and len(body) < self.minimum_size:
+                await self._flush_start(encode=False)
+                self.passthrough = True
+                await self.send(message)
+                return
+            self.encoder = StreamEncoder(self.encoding)
+            encoded = self.encoder.encode(body, final=not more_body)
+            await self._flush_start(encode=True, length=None if more_body else len(encoded))
+        else:
+            encoded = self.encoder.encode(body, final=not more_body)
+
+        await self.send({"type": "http.response.body", "body": encoded, "more_body": more_body})
+
+    async def _flush_start(self, encode: bool, length: int | None = None) -> None:
+        if self.start is None:
+            return
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        if encode:
+            headers["Content-Encoding"] = self.encoding
+            if length is None:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(length)
+        await self.send(self.start)
+        self.start = None
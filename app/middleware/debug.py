@@ -0,0 +1,18 @@
+import logging
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger("uvicorn")
+
+
+class DebugOriginMiddleware:
+    """Log the Origin header of each request (development only)."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            logger.debug(f"[CORS] Incoming Origin: {Headers(scope=scope).get('origin')}")
+        await self.app(scope, receive, send)
@@ -0,0 +1,57 @@
+"""
+Path-level ASGI middleware.
+
+Written against the raw ASGI interface rather than ``@app.middleware("http")``:
+``BaseHTTPMiddleware`` runs every request through an extra task and memory
+stream, which costs throughput and buffers streaming responses.
+"""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class StripTrailingSlashMiddleware:
+    """
+    Route ``/api/v1/upload/`` like ``/api/v1/upload`` instead of answering with
+    a 307 redirect. The root path is left alone.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            if path != "/" and path.endswith("/"):
+                scope = dict(scope, path=path.rstrip("/") or "/")
+        await self.app(scope, receive, send)
+
+
+class PathPrefixMiddleware:
+    """
+    Apply MIDDLEWARE only to requests under one of PREFIXES; everything else
+    goes straight to the wrapped app.
+
+        app.add_middleware(
+            PathPrefixMiddleware,
+            middleware=SessionMiddleware,
+            prefixes=("/api/v1/auth",),
+            secret_key=...,
+        )
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        middleware: type,
+        prefixes: tuple[str, ...],
+        **options,
+    ) -> None:
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.scoped = middleware(app, **options)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket") and scope["path"].startswith(self.prefixes):
+            await self.scoped(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -2,6 +2,7 @@
 
 from app.models.models import (
     Base,
+    Blob,
     User,
     Estimate,
     EstimateSettings,
@@ -17,6 +18,7 @@ Model3D = ModelMetadata
 
 __all__ = [
     "Base",
+    "Blob",
     "User",
     "Estimate",
     "EstimateSettings",
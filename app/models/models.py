@@ -5,7 +5,7 @@ from datetime import datetime
 
 from sqlalchemy import (
     Column, String, Boolean, DateTime, Text, Float, ForeignKey,
-    UniqueConstraint, Integer
+    UniqueConstraint, Integer, BigInteger
 )
 import os
 from sqlalchemy.dialects.postgresql import UUID
@@ -129,6 +129,8 @@ class ModelMetadata(Base):
     glb_path = Column(String, nullable=True)
 
     geometry_hash = Column(String, nullable=True, index=True)
+    # SHA-256 of the model file: its blob in the content-addressed store
+    content_hash = Column(String(64), nullable=True, index=True)
     is_duplicate = Column(Boolean, default=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
@@ -136,6 +138,8 @@ class ModelMetadata(Base):
     bbox = Column(JSONType, nullable=True)
     faces = Column(Integer, nullable=True)
     vertices = Column(Integer, nullable=True)
+    # One entry per build item of a 3MF plate (see app/utils/threemf.py)
+    objects = Column(JSONType, nullable=True)
 
     # ✅ Explicit foreign_keys to avoid ambiguity
     user = relationship("User", back_populates="models", foreign_keys=[user_id])
@@ -143,6 +147,20 @@ class ModelMetadata(Base):
     favorites = relationship("Favorite", back_populates="model", cascade="all, delete-orphan")
 
 
+class Blob(Base):
+    """A stored model file, by content (see app/services/blobs.py)."""
+
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    # Models whose file is this blob; 0 means it can be collected
+    refcount = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Set while the blob is stored zstd-compressed (see app/services/tiering.py)
+    cold_since = Column(DateTime, nullable=True)
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
@@ -175,6 +193,16 @@ class UploadJob(Base):
     status = Column(String, default="pending")
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Direct-to-storage uploads: the client PUTs to a presigned URL for
+    # storage_key, then the job (id == the model's id) is processed by a worker.
+    storage_key = Column(String, nullable=True, unique=True)
+    name = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+    size = Column(BigInteger, nullable=True)
+    content_type = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
     user = relationship("User", back_populates="upload_jobs")
 
 
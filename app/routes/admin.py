@@ -10,6 +10,7 @@ from app.models.models import ModelMetadata, User
 from app.services.auth_service import log_action
 from app.utils.logging import logger
 from app.schemas.admin import UserOut, UploadOut, DiscordConfigOut
+from app.utils.serializers import json_list_response
 
 router = APIRouter()
 
@@ -25,7 +26,8 @@ async def get_all_users(
     db: AsyncSession = Depends(get_async_db), admin=Depends(admin_required)
 ):
     result = await db.execute(select(User))
-    return result.scalars().all()
+    # Our own rows: emails were validated on signup, skip EmailStr per row.
+    return json_list_response(UserOut, result.scalars().all(), trusted=True)
 
 
 @router.post("/users/{user_id}/promote")
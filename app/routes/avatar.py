@@ -1,19 +1,20 @@
+import asyncio
 import os
-import shutil
 import subprocess
 import sys
+import tempfile
+from io import BytesIO
 from pathlib import Path
 from uuid import UUID
 from datetime import datetime
 from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import update
-from PIL import Image
 
 from app.db.session import get_db
 from app.models.models import User
 from app.dependencies.auth import get_current_user
-from app.core.config import settings
+from app.services.storage import get_storage
 from app.services.cache.user_cache import cache_user_profile, invalidate_user_cache  # ✅ Redis cache helpers
 from app.schemas.users import UserOut  # ✅ Pydantic schema for serialization
 
@@ -21,45 +22,54 @@ router = APIRouter()
 
 UPLOAD_EXTENSIONS_3D = {".stl", ".obj", ".blend"}
 
-@router.post("/api/v1/avatar")
-async def upload_avatar(
-    file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    user_id = current_user.id
-    user_dir = os.path.join(settings.UPLOAD_DIR, "users", str(user_id), "avatars")
-    os.makedirs(user_dir, exist_ok=True)
-
-    ext = os.path.splitext(file.filename)[1].lower()
-    input_path = os.path.join(user_dir, "input" + ext)
 
-    with open(input_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+def render_avatar(data: bytes, ext: str) -> bytes:
+    """512px PNG avatar from an uploaded image or 3D model (blocking)."""
+    if ext not in UPLOAD_EXTENSIONS_3D:
+        from PIL import Image  # deferred: only avatar uploads need Pillow
 
-    # ✅ Process avatar
-    avatar_path = os.path.join(user_dir, "avatar.png")
+        try:
+            with Image.open(BytesIO(data)) as img:
+                img = img.convert("RGBA")
+                img.thumbnail((512, 512))
+                out = BytesIO()
+                img.save(out, "PNG")
+                return out.getvalue()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Image processing failed: {e}")
 
-    if ext in UPLOAD_EXTENSIONS_3D:
+    # The render script works on files: give it a scratch directory.
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, "input" + ext)
+        with open(input_path, "wb") as buffer:
+            buffer.write(data)
         script_path = os.path.join(Path(__file__).resolve().parents[2], "scripts", "render_avatar.py")
         process = subprocess.run(
-            [sys.executable, script_path, input_path, user_dir],
+            [sys.executable, script_path, input_path, work_dir],
             capture_output=True,
             text=True
         )
-
         if process.returncode != 0:
             raise HTTPException(status_code=500, detail="Avatar render failed")
-    else:
-        try:
-            with Image.open(input_path) as img:
-                img = img.convert("RGBA")
-                img.thumbnail((512, 512))
-                img.save(avatar_path, "PNG")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Image processing failed: {e}")
-        finally:
-            os.remove(input_path)
+        with open(os.path.join(work_dir, "avatar.png"), "rb") as f:
+            return f.read()
+
+
+@router.post("/api/v1/avatar")
+async def upload_avatar(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    user_id = current_user.id
+    ext = os.path.splitext(file.filename)[1].lower()
+    data = await file.read()
+
+    # ✅ Process avatar (Pillow / the render script block, so off the event loop)
+    png = await asyncio.to_thread(render_avatar, data, ext)
+    await get_storage().put(
+        f"users/{user_id}/avatars/avatar.png", png, content_type="image/png"
+    )
 
     # ✅ Update DB timestamp
     await db.execute(
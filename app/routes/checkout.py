@@ -2,14 +2,12 @@
 
 import logging
 
-import stripe
 from fastapi import APIRouter, Depends, HTTPException, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_async_db
 from app.dependencies.auth import get_current_user
 from app.models import Estimate, User, CheckoutSession
-from app.tasks.render import generate_gcode
 from app.config.settings import get_settings
 from app.schemas.checkout import (
     CheckoutRequest,
@@ -27,13 +25,20 @@ router = APIRouter()
 # ───────────────────────────────────────────────
 settings = get_settings()
 
-stripe.api_key = settings.stripe_secret_key
 DOMAIN = settings.domain
 WEBHOOK_SECRET = settings.stripe_webhook_secret
 
-if not stripe.api_key:
+if not settings.stripe_secret_key:
     logger.warning("⚠️ STRIPE_SECRET_KEY is not set. Checkout endpoints will return 503.")
 
+
+def get_stripe():
+    """Import and configure the Stripe SDK on first use; it takes ~1s to import."""
+    import stripe
+
+    stripe.api_key = settings.stripe_secret_key
+    return stripe
+
 # ───────────────────────────────────────────────
 # Create Stripe Checkout Session
 # ───────────────────────────────────────────────
@@ -46,9 +51,10 @@ async def create_checkout_session(
     """
     Create a Stripe Checkout session for the submitted cart and persist it in the DB.
     """
-    if not stripe.api_key:
+    if not settings.stripe_secret_key:
         raise HTTPException(status_code=503, detail="Stripe is not configured")
 
+    stripe = get_stripe()
     try:
         stripe_session = stripe.checkout.Session.create(
             payment_method_types=["card"],
@@ -114,6 +120,7 @@ async def stripe_webhook(request: Request, db: AsyncSession = Depends(get_async_
     if not sig:
         raise HTTPException(status_code=400, detail="Missing Stripe signature")
 
+    stripe = get_stripe()
     try:
         event = stripe.Webhook.construct_event(payload, sig, WEBHOOK_SECRET)
         logger.info("📡 Webhook event received: %s", event["type"])
@@ -135,6 +142,8 @@ async def stripe_webhook(request: Request, db: AsyncSession = Depends(get_async_
                 logger.info("💳 Checkout session %s marked as completed", session_id)
 
                 # Optionally queue work per model (e.g., G-code)
+                from app.tasks.render import generate_gcode  # pulls in Celery
+
                 for item in db_session.items:
                     model_id = item.get("model_id")
                     estimate_id = item.get("estimate_id")
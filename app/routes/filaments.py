@@ -18,6 +18,7 @@ from collections import defaultdict
 from app.db.database import get_async_db
 from app.models.models import Filament
 from app.schemas.filaments import FilamentOut, FilamentCreate
+from app.utils.serializers import json_list_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -42,7 +43,7 @@ async def list_filaments(
     filaments = result.scalars().all()
 
     logger.info(f"✅ Returned {len(filaments)} filaments for Estimate page.")
-    return filaments
+    return json_list_response(FilamentOut, filaments, trusted=True)
 
 
 @router.post(
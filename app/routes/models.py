@@ -1,19 +1,40 @@
 # app/routes/models.py
 
 import logging
-from pathlib import Path
+import posixpath
 from typing import List, Optional
 
-from fastapi import APIRouter, status, Query
-from fastapi.responses import JSONResponse
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config.settings import settings
+from app.db.database import get_async_db
+from app.dependencies.auth import get_current_user
+from app.models import Favorite, ModelMetadata, User
+from app.services import conversions, lods, tiering
+from app.services.downloads import record_download
+from app.services.storage import StorageError, get_storage, layout
+from app.utils import compact_mesh
+from app.utils.serializers import JSONBytesResponse
+from app.utils.static_files import PRECOMPRESS_SUFFIXES, UploadFileResponse
+from app.utils.zipstream import ZipEntry, stream_zip, unique_names
 from pydantic import BaseModel
+from pydantic_core import to_json
 
 router = APIRouter(tags=["models"])
 
 logger = logging.getLogger(__name__)
 
+MODEL_SUFFIXES = {".stl", ".obj", ".3mf"}
+OWNER_LOOKUP_BATCH = 1000
+BUNDLE_MAX_MODELS = 500
+# Seconds a client should wait before asking again for a queued conversion
+CONVERT_RETRY_AFTER = 2
+
 
 class ModelItem(BaseModel):
     username: str
@@ -34,99 +55,34 @@ class PaginatedModelListResponse(BaseModel):
 
 @router.get(
     "/browse",
-    summary="List all models from filesystem (all users) with pagination",
+    summary="List all models in storage (all users) with pagination",
     status_code=status.HTTP_200_OK,
     response_model=PaginatedModelListResponse,
 )
 async def browse_all_filesystem_models(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of models per page"),
+    db: AsyncSession = Depends(get_async_db),
 ) -> PaginatedModelListResponse:
     """
-    Scan the uploads/users/*/models folders on disk and return paginated models.
+    List the models in the storage backend and return them paginated: the
+    sharded models/ tree plus anything still in the legacy users/*/models/*.
     Includes username, model file path, optional thumbnail, and optional .webm turntable.
     """
-    models_root = Path(settings.upload_dir) / "users"
-    results: List[ModelItem] = []
-
-    if not models_root.exists():
-        logger.warning("📁 Models root %s does not exist.", models_root)
-        return PaginatedModelListResponse(
-            models=[],
-            page=page,
-            page_size=page_size,
-            total=0,
-            pages=0
-        )
+    storage = get_storage()
 
-    logger.info("📁 Scanning models under: %s", models_root.resolve())
+    logger.info("📁 Listing models in %s storage", storage.name)
 
     try:
-        for user_dir in models_root.iterdir():
-            if not user_dir.is_dir():
-                continue
-
-            username = user_dir.name
-            models_dir = user_dir / "models"
-
-            if not models_dir.exists():
-                continue
-
-            for model_file in models_dir.iterdir():
-                if not model_file.is_file():
-                    continue
-
-                if model_file.suffix.lower() not in [".stl", ".obj", ".3mf"]:
-                    continue
-
-                if model_file.name.startswith(".") or model_file.name.startswith("~"):
-                    continue
-
-                try:
-                    model_rel_path = model_file.relative_to(settings.upload_dir).as_posix()
-                except ValueError:
-                    logger.warning("⚠️ Skipping suspicious path: %s", model_file)
-                    continue
-
-                model_url = f"/uploads/{model_rel_path}"
-
-                # Optional thumbnail
-                thumb_url = None
-                thumb_file = model_file.with_suffix(".png")
-                if thumb_file.exists():
-                    try:
-                        thumb_rel_path = thumb_file.relative_to(settings.upload_dir).as_posix()
-                        thumb_url = f"/uploads/{thumb_rel_path}"
-                    except ValueError:
-                        logger.warning("⚠️ Skipping thumbnail with bad path: %s", thumb_file)
-
-                # Optional webm turntable
-                webm_url = None
-                webm_file = model_file.with_suffix(".webm")
-                if webm_file.exists():
-                    try:
-                        webm_rel_path = webm_file.relative_to(settings.upload_dir).as_posix()
-                        webm_url = f"/uploads/{webm_rel_path}"
-                    except ValueError:
-                        logger.warning("⚠️ Skipping webm with bad path: %s", webm_file)
-
-                model_data = ModelItem(
-                    username=username,
-                    filename=model_file.name,
-                    path=model_rel_path,
-                    url=model_url,
-                    thumbnail_url=thumb_url,
-                    webm_url=webm_url,
-                )
-
-                results.append(model_data)
-                logger.debug("📝 Found model — user: %s file: %s", username, model_file.name)
-
-    except Exception as e:
-        logger.exception("❌ Error while scanning models.")
+        keys = {info.key async for info in storage.list(layout.LEGACY_PREFIX)}
+        keys |= {info.key async for info in storage.list(layout.MODELS_PREFIX)}
+    except StorageError:
+        logger.exception("❌ Error while listing models.")
         raise
 
-    results.sort(key=lambda m: (m.username, m.filename.lower()))
+    # Plain dicts shaped like ModelItem: built here, so no need to validate.
+    results: List[dict] = _legacy_items(keys) + await _sharded_items(db, keys)
+    results.sort(key=lambda m: (m["username"], m["filename"].lower()))
 
     total = len(results)
     pages = max(1, -(-total // page_size))  # ceil division
@@ -139,15 +95,105 @@ async def browse_all_filesystem_models(
 
     logger.info("✅ Returning page %d of %d (%d models total)", page, pages, total)
 
-    return PaginatedModelListResponse(
-        models=paginated,
-        page=page,
-        page_size=page_size,
-        total=total,
-        pages=pages
+    return JSONBytesResponse(
+        to_json({
+            "models": paginated,
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "pages": pages,
+        })
     )
 
 
+def _legacy_items(keys: set[str]) -> List[dict]:
+    """Models in the flat users/<user_id>/models/ directories."""
+    results = []
+    for key in keys:
+        parts = key.split("/")
+        if len(parts) != 4 or parts[0] != "users" or parts[2] != "models":
+            continue
+
+        username, filename = parts[1], parts[3]
+        stem, dot, suffix = filename.rpartition(".")
+        if not dot or f".{suffix.lower()}" not in MODEL_SUFFIXES:
+            continue
+
+        if filename.startswith(".") or filename.startswith("~"):
+            continue
+
+        base = key[: -len(suffix) - 1]
+        # Optional thumbnail and webm turntable, stored next to the model
+        thumb_key = f"{base}.png"
+        webm_key = f"{base}.webm"
+
+        results.append(
+            {
+                "username": username,
+                "filename": filename,
+                "path": key,
+                "url": f"/uploads/{key}",
+                "thumbnail_url": f"/uploads/{thumb_key}" if thumb_key in keys else None,
+                "webm_url": f"/uploads/{webm_key}" if webm_key in keys else None,
+            }
+        )
+        logger.debug("📝 Found model — user: %s file: %s", username, filename)
+    return results
+
+
+async def _sharded_items(db: AsyncSession, keys: set[str]) -> List[dict]:
+    """
+    Models in per-model directories. Owner, original name and file come
+    from the database: on object stores the file is a shared blob outside
+    the directory (see app/services/blobs.py).
+    """
+    artifacts: dict[UUID, set[str]] = {}
+    for key in keys:
+        parsed = layout.parse_key(key)
+        if parsed:
+            try:
+                artifacts.setdefault(UUID(parsed[0]), set()).add(parsed[1])
+            except ValueError:
+                continue
+
+    ids = list(artifacts)
+    results = []
+    for offset in range(0, len(ids), OWNER_LOOKUP_BATCH):
+        rows = await db.execute(
+            select(
+                ModelMetadata.id,
+                ModelMetadata.filename,
+                ModelMetadata.filepath,
+                User.username,
+                User.id,
+            )
+            .join(User, User.id == ModelMetadata.user_id)
+            .where(ModelMetadata.id.in_(ids[offset : offset + OWNER_LOOKUP_BATCH]))
+        )
+        # Directories without a row are uploads in flight or orphans: skipped.
+        for model_id, filename, filepath, username, user_id in rows:
+            names = artifacts[model_id]
+            results.append(
+                {
+                    "username": username or str(user_id),
+                    "filename": filename,
+                    "path": filepath,
+                    "url": f"/uploads/{layout.public_path(filepath)}",
+                    "thumbnail_url": (
+                        f"/uploads/{layout.PUBLIC_PREFIX}{model_id}/{layout.THUMBNAIL}"
+                        if layout.THUMBNAIL in names
+                        else None
+                    ),
+                    "webm_url": (
+                        f"/uploads/{layout.PUBLIC_PREFIX}{model_id}/{layout.TURNTABLE}"
+                        if layout.TURNTABLE in names
+                        else None
+                    ),
+                }
+            )
+    return results
+
+
 @router.get(
     "",
     summary="List all models (alias of /browse)",
@@ -157,8 +203,213 @@ async def browse_all_filesystem_models(
 async def list_models(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of models per page"),
+    db: AsyncSession = Depends(get_async_db),
 ) -> PaginatedModelListResponse:
     """
     Alias for /browse endpoint.
     """
-    return await browse_all_filesystem_models(page=page, page_size=page_size)
+    return await browse_all_filesystem_models(page=page, page_size=page_size, db=db)
+
+
+@router.get(
+    "/{model_id}/download",
+    summary="Download a model file",
+    status_code=status.HTTP_200_OK,
+)
+async def download_model(
+    model_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Authorize and count the download here; the bytes come from the uploads
+    file server, or from the front proxy when UPLOADS_OFFLOAD is set.
+    """
+    model = await db.get(ModelMetadata, model_id)
+    if model is None or not model.filepath:
+        raise HTTPException(status_code=404, detail="Model not found")
+
+    if get_storage().name == "s3":
+        mode = "redirect"  # presigned URL: the object store sends the bytes
+    else:
+        mode = settings.uploads_offload or "direct"
+    await record_download(model.id, mode=mode)
+    logger.info("⬇️ User %s downloading model %s", user.id, model.id)
+    return UploadFileResponse(model.filepath, filename=model.filename)
+
+
+@router.get(
+    "/{model_id}/formats/{target}",
+    summary="Download a model converted to another format",
+    status_code=status.HTTP_200_OK,
+    responses={202: {"description": "Conversion queued; ask again after Retry-After"}},
+)
+async def download_converted(
+    model_id: UUID,
+    target: str,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    The model as TARGET (``glb``, ``3mf``, ``stl``, or ``mwm`` for the
+    viewer's compact mesh, see docs/MESH_FORMAT.md). The first request
+    queues the conversion and is answered 202; once the workers have run
+    it, the file is served from the conversion cache like any upload.
+    Compact meshes of new uploads are made at ingest, so they never wait.
+    """
+    target = target.lower()
+    model = await db.get(ModelMetadata, model_id)
+    if model is None or not model.filepath:
+        raise HTTPException(status_code=404, detail="Model not found")
+    source = conversions.source_format(model)
+    if source != target and not conversions.can_convert(source, target):
+        raise HTTPException(
+            status_code=400, detail=f"Cannot convert {source.upper()} to {target.upper()}"
+        )
+
+    try:
+        key = await conversions.converted_key(db, get_storage(), model, target)
+    except conversions.ConversionError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if key is None:
+        return JSONResponse(
+            {"status": conversions.PENDING, "format": target},
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"retry-after": str(CONVERT_RETRY_AFTER)},
+        )
+
+    if target not in conversions.VIEWER_FORMATS:
+        await record_download(model.id, mode="converted")
+    logger.info("⬇️ User %s downloading model %s as %s", user.id, model.id, target)
+    stem = posixpath.splitext(model.filename or str(model.id))[0]
+    return UploadFileResponse(key, filename=f"{stem}.{target}")
+
+
+@router.get(
+    "/{model_id}/preview",
+    summary="Stream a model's mesh for the viewer, coarsest level of detail first",
+    status_code=status.HTTP_200_OK,
+    responses={202: {"description": "Mesh being made; ask again after Retry-After"}},
+)
+async def preview_mesh(
+    model_id: UUID,
+    request: Request,
+    level: Optional[int] = Query(None, ge=0, description="0 is the full mesh; higher is coarser"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    A compact mesh (docs/MESH_FORMAT.md) of the model at LEVEL, by default
+    the coarsest one stored, so a dense model shows up after a few hundred
+    kilobytes. Until the full mesh (level 0) is served, the ``Link``
+    header (``rel="next"``) points at the next finer level.
+    """
+    model = await db.get(ModelMetadata, model_id)
+    if model is None or not model.filepath:
+        raise HTTPException(status_code=404, detail="Model not found")
+    storage = get_storage()
+    stored = await lods.available(storage, model.content_hash) if model.content_hash else []
+    if level is None:
+        level = stored[0] if stored else 0
+    elif level and level not in stored:
+        raise HTTPException(status_code=404, detail=f"No level {level} for this model")
+
+    if level:
+        key = lods.lod_key(model.content_hash, level)
+    else:
+        try:
+            key = await conversions.converted_key(db, storage, model, compact_mesh.FORMAT)
+        except conversions.ConversionError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if key is None:
+            return JSONResponse(
+                {"status": conversions.PENDING, "format": compact_mesh.FORMAT},
+                status_code=status.HTTP_202_ACCEPTED,
+                headers={"retry-after": str(CONVERT_RETRY_AFTER)},
+            )
+
+    headers = {"x-mesh-level": str(level)}
+    if level:
+        finer = next((lower for lower in stored if lower < level), 0)
+        headers["link"] = f'<{request.url.include_query_params(level=finer)}>; rel="next"'
+    stem = posixpath.splitext(model.filename or str(model.id))[0]
+    return UploadFileResponse(key, filename=f"{stem}.{compact_mesh.FORMAT}", headers=headers)
+
+
+@router.get(
+    "/bundle",
+    summary="Download several models as one ZIP archive",
+    status_code=status.HTTP_200_OK,
+)
+async def download_bundle(
+    ids: List[UUID] = Query(..., description="Models to include, e.g. the items of an order"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if len(ids) > BUNDLE_MAX_MODELS:
+        raise HTTPException(status_code=400, detail=f"At most {BUNDLE_MAX_MODELS} models per bundle")
+    result = await db.execute(select(ModelMetadata).where(ModelMetadata.id.in_(ids)))
+    order = {model_id: i for i, model_id in enumerate(ids)}
+    models = sorted(result.scalars().all(), key=lambda m: order[m.id])
+    return await _bundle_response(models, "makerworks-models.zip", user)
+
+
+@router.get(
+    "/favorites/bundle",
+    summary="Download your favorite models as one ZIP archive",
+    status_code=status.HTTP_200_OK,
+)
+async def download_favorites_bundle(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    result = await db.execute(
+        select(ModelMetadata)
+        .join(Favorite, Favorite.model_id == ModelMetadata.id)
+        .where(Favorite.user_id == user.id)
+        .order_by(Favorite.created_at)
+        .limit(BUNDLE_MAX_MODELS)
+    )
+    return await _bundle_response(result.scalars().all(), "makerworks-favorites.zip", user)
+
+
+async def _bundle_response(models, filename: str, user: User) -> StreamingResponse:
+    """
+    Stream MODELS' files as a ZIP: each file is read chunk by chunk while
+    the archive is sent, so nothing is staged on disk or held in memory.
+    """
+    models = [m for m in models if m.filepath]
+    if not models:
+        raise HTTPException(status_code=404, detail="No models to download")
+    for model in models:
+        await record_download(model.id, mode="bundle")
+    logger.info("📦 User %s downloading a bundle of %d model(s)", user.id, len(models))
+
+    storage = get_storage()
+    names = unique_names(
+        m.filename or f"{m.id}{posixpath.splitext(m.filepath)[1]}" for m in models
+    )
+
+    async def entries():
+        for model, name in zip(models, names):
+            found = await tiering.stat(storage, model.filepath)
+            if found is None:
+                logger.warning("⚠️ Bundle: %s of model %s is missing", model.filepath, model.id)
+                continue
+            await tiering.record_access(model.filepath, found[1])
+            yield ZipEntry(
+                name=name,
+                data=tiering.stream(storage, model.filepath),
+                size=found[0].size,
+                modified=model.uploaded_at,
+                compress=posixpath.splitext(name)[1].lower() in PRECOMPRESS_SUFFIXES,
+            )
+
+    return StreamingResponse(
+        stream_zip(entries()),
+        media_type="application/zip",
+        headers={
+            "content-disposition": f'attachment; filename="{filename}"',
+            "cache-control": "private, no-store",
+        },
+    )
@@ -1,12 +1,13 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_async_session
-from app.utils.system_info import get_system_status_snapshot
+from app.services.system_history import TIERS, snapshot_history
+from app.services.system_status import snapshot_sampler
 
 router = APIRouter()
 
@@ -83,4 +84,17 @@ async def system_handshake():
 @router.get("/snapshot", tags=["system"], status_code=status.HTTP_200_OK)
 async def system_snapshot():
     """Return a snapshot of system status for monitoring."""
-    return JSONResponse(get_system_status_snapshot())
+    return JSONResponse(await snapshot_sampler.current())
+
+
+@router.get("/snapshot/history", tags=["system"], status_code=status.HTTP_200_OK)
+async def system_snapshot_history(
+    tier: str = Query("1s", description=f"Resolution: {', '.join(TIERS)}"),
+    limit: int | None = Query(None, ge=1, description="Most recent N points only"),
+):
+    """Return load and memory history as a columnar time series."""
+    if tier not in TIERS:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown tier {tier!r}; use one of {list(TIERS)}"
+        )
+    return JSONResponse(await snapshot_history.read(tier, limit))
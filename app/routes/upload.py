@@ -1,94 +1,98 @@
+import hmac
 import logging
-import json
 from datetime import datetime
 from pathlib import Path
-from uuid import uuid4
-import trimesh
-
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from typing import AsyncIterator
+from uuid import UUID, uuid4
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    UploadFile,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config.settings import settings
 from app.db.database import get_async_db
 from app.dependencies.auth import get_current_user
 from app.models import ModelMetadata as Model3D, User
-from app.schemas.models import ModelUploadResponse
+from app.models.models import UploadJob
+from app.schemas.models import (
+    ContentCheckRequest,
+    ContentCheckResponse,
+    DirectUploadRequest,
+    DirectUploadResponse,
+    ModelUploadResponse,
+    UploadStatusResponse,
+)
+from app.services import blobs, direct_uploads
+from app.services.model_ingest import ingest_blob
+from app.services.storage import StorageBackend, StorageError, get_storage, iter_upload
+from app.services.storage.layout import model_key
+from app.utils.static_files import write_precompressed_variants
 
 router = APIRouter(redirect_slashes=False)
 logger = logging.getLogger(__name__)
 
 BASE_URL: str = getattr(settings, "base_url", "http://localhost:8000").rstrip("/")
 
-# ✅ Force uploads to ./uploads at project root
-PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
-BASE_UPLOAD_DIR: Path = (PROJECT_ROOT / "uploads").resolve()
-logger.info(f"[UPLOAD] Base upload dir resolved: {BASE_UPLOAD_DIR}")
-
 MAX_FILE_SIZE_BYTES = 50 * 1024 * 1024  # 50 MB
+# 3MF is ZIP-compressed, and parsed by a cpu worker within app.utils.threemf's limits
+MAX_3MF_FILE_SIZE_BYTES = 200 * 1024 * 1024
 
-ALLOWED_EXTENSIONS = {".stl"}
+# Extension -> media type the file is stored with
+MODEL_MEDIA_TYPES = {".stl": "model/stl", ".3mf": "model/3mf"}
+ALLOWED_EXTENSIONS = set(MODEL_MEDIA_TYPES)
 ALLOWED_MODEL_TYPES = {
     "application/octet-stream",
     "application/vnd.ms-pki.stl",
     "model/stl",
+    "model/3mf",
+    "application/vnd.ms-package.3dmanufacturing-3dmodel+xml",
+    "application/zip",
 }
 
 
-def get_model_dir(user_id: str) -> Path:
-    """Safely creates and returns the model directory for a user."""
-    safe_user_id = str(user_id).strip()
-    path = BASE_UPLOAD_DIR / "users" / safe_user_id / "models"
-    path.mkdir(parents=True, exist_ok=True)
-    logger.debug(f"[UPLOAD] Model dir for user {safe_user_id}: {path}")
-    return path
-
-
-def save_file(destination: Path, data: bytes):
-    try:
-        with open(destination, "wb") as buffer:
-            buffer.write(data)
-    except Exception as e:
-        logger.exception(f"[UPLOAD] Saving file failed: {e}")
-        raise HTTPException(500, "Failed to save file") from e
+async def limit_size(chunks: AsyncIterator[bytes], max_size: int) -> AsyncIterator[bytes]:
+    """Pass CHUNKS through, failing the upload as soon as it exceeds MAX_SIZE."""
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_size:
+            raise HTTPException(400, f"File too large (max {max_size // (1024*1024)} MB)")
+        yield chunk
 
 
-def validate_file_size(data: bytes, max_size: int):
-    if len(data) > max_size:
-        raise HTTPException(400, f"File too large (max {max_size // (1024*1024)} MB)")
+def max_file_size(filename: str) -> int:
+    return MAX_3MF_FILE_SIZE_BYTES if filename.lower().endswith(".3mf") else MAX_FILE_SIZE_BYTES
 
 
-def process_model_file(model_path: Path, output_dir: Path) -> dict:
-    """Generate metadata and a thumbnail for the uploaded model."""
-    try:
-        mesh = trimesh.load(str(model_path), force="mesh")
-    except Exception as e:
-        logger.exception(f"[UPLOAD] Failed to load model: {e}")
-        raise HTTPException(400, "Invalid 3D model") from e
-
-    metadata = {
-        "volume": float(mesh.volume) if mesh.is_volume else None,
-        "bbox": mesh.bounding_box.extents.tolist(),
-        "faces": int(len(mesh.faces)),
-        "vertices": int(len(mesh.vertices)),
-    }
-
-    thumb_rel = None
-    try:
-        scene = mesh.scene()
-        png = scene.save_image(resolution=(512, 512), visible=False)
-        if png:
-            thumb_path = output_dir / f"{model_path.stem}_thumbnail.png"
-            with open(thumb_path, "wb") as f:
-                f.write(png)
-            thumb_rel = str(thumb_path.relative_to(BASE_UPLOAD_DIR))
-    except Exception as e:
-        logger.exception(f"[UPLOAD] Thumbnail generation failed: {e}")
-
-    return {"metadata": metadata, "thumbnail": thumb_rel}
+def validate_extension(filename: str | None) -> str:
+    if not filename:
+        raise HTTPException(400, "No filename provided.")
+    ext = Path(filename).suffix.lower()
+    if not ext:
+        raise HTTPException(400, "Missing file extension.")
+    if ext not in ALLOWED_EXTENSIONS:
+        allowed = " and ".join(sorted(ALLOWED_EXTENSIONS))
+        raise HTTPException(400, f"Invalid file extension: {ext}. Only {allowed} are allowed.")
+    return ext
 
 
-@router.post("", response_model=ModelUploadResponse)
+@router.post(
+    "",
+    response_model=ModelUploadResponse,
+    responses={202: {"model": UploadStatusResponse, "description": "3MF queued for a worker"}},
+)
 async def upload_model(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     name: str = Form(None),
     description: str = Form(""),
@@ -96,55 +100,54 @@ async def upload_model(
     db: AsyncSession = Depends(get_async_db),
 ):
     user_id = str(user.id)
-
-    if not file.filename:
-        raise HTTPException(400, "No filename provided.")
-
-    ext = Path(file.filename).suffix.lower()
-    if not ext:
-        raise HTTPException(400, "Missing file extension.")
-    if ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(400, f"Invalid file extension: {ext}. Only .stl is allowed.")
-
-    contents = await file.read()
-    validate_file_size(contents, MAX_FILE_SIZE_BYTES)
+    ext = validate_extension(file.filename)
 
     if file.content_type not in ALLOWED_MODEL_TYPES:
         logger.warning(f"[UPLOAD] Unusual content type '{file.content_type}' for file '{file.filename}'")
 
     now = datetime.utcnow()
 
+    storage = get_storage()
+    if ext == ".3mf":
+        return await _queue_upload(db, storage, file, ext, name, description, user)
+
     model_id = uuid4()  # keep as UUID internally
-    model_dir = get_model_dir(user_id)
-    save_path = model_dir / f"{model_id}{ext}"
-    logger.info(f"[UPLOAD] Saving model for user {user_id} to: {save_path}")
-
-    save_file(save_path, contents)
-
-    result = process_model_file(save_path, model_dir)
-
-    metadata = result.get("metadata", {})
-    thumbnail_rel_path = result.get("thumbnail")
-
-    file_url = f"{BASE_URL}/uploads/users/{user_id}/models/{model_id}{ext}"
-
-    model_kwargs = {
-        "id": model_id,
-        "name": name or file.filename,
-        "description": description,
-        "filename": file.filename,
-        "filepath": str(save_path.relative_to(BASE_UPLOAD_DIR)),
-        "file_url": file_url,
-        "user_id": user_id,
-        "uploaded_at": now,
-        "geometry_hash": None,
-        "is_duplicate": False,
-        "volume": metadata.get("volume"),
-        "bbox": json.dumps(metadata.get("bbox", [])),
-        "faces": metadata.get("faces", 0),
-        "vertices": metadata.get("vertices", 0),
-        "thumbnail_url": f"{BASE_URL}/uploads/{thumbnail_rel_path}" if thumbnail_rel_path else None,
-    }
+    logger.info(f"[UPLOAD] Saving model {model_id} for user {user_id} to {storage.name}")
+
+    # Streamed to the backend chunk by chunk and hashed on the way; an
+    # oversize upload is cut off (and discarded) at the limit instead of
+    # being read into memory first.
+    try:
+        blob = await blobs.store(
+            storage,
+            limit_size(iter_upload(file), MAX_FILE_SIZE_BYTES),
+            content_type=MODEL_MEDIA_TYPES[ext],
+        )
+        key = await blobs.attach(storage, blob, model_key(model_id, ext))
+    except StorageError as e:
+        logger.exception(f"[UPLOAD] Saving file failed: {e}")
+        raise HTTPException(500, "Failed to save file") from e
+    if not blob.created:
+        logger.info(f"[UPLOAD] Content of {model_id} already stored as {blob.sha256[:12]}")
+
+    model_kwargs = await ingest_blob(
+        db,
+        storage,
+        blob,
+        key,
+        model_id=model_id,
+        user_id=user.id,
+        filename=file.filename,
+        name=name,
+        description=description,
+        base_url=BASE_URL,
+        uploaded_at=now,
+    )
+
+    local_path = storage.local_path(key)
+    if local_path is not None and not model_kwargs["is_duplicate"]:
+        # .br/.gz siblings served by /uploads; built once, after the response is sent
+        background_tasks.add_task(write_precompressed_variants, local_path)
 
     model = Model3D(**model_kwargs)
     db.add(model)
@@ -153,14 +156,210 @@ async def upload_model(
 
     logger.info(f"[UPLOAD] Model {model.id} uploaded & processed for user {user_id}")
 
+    return _model_response(model, user_id)
+
+
+async def _queue_upload(
+    db: AsyncSession,
+    storage: StorageBackend,
+    file: UploadFile,
+    ext: str,
+    name: str | None,
+    description: str | None,
+    user: User,
+) -> JSONResponse:
+    """
+    Store FILE where a direct upload would have put it and let a cpu worker
+    process it like one, so parsing never runs in the API process. Answers
+    202 with the upload job; poll GET /upload/{upload_id} for the model.
+    """
+    job_id = uuid4()
+    key = model_key(job_id, ext)
+    max_size = max_file_size(file.filename)
+    try:
+        info = await storage.put(
+            key, limit_size(iter_upload(file), max_size), content_type=MODEL_MEDIA_TYPES[ext]
+        )
+    except StorageError as e:
+        logger.exception(f"[UPLOAD] Saving file failed: {e}")
+        raise HTTPException(500, "Failed to save file") from e
+
+    job = UploadJob(
+        id=job_id,
+        user_id=user.id,
+        filename=file.filename,
+        status=direct_uploads.PENDING,
+        storage_key=key,
+        name=name,
+        description=description,
+        size=info.size,
+        content_type=MODEL_MEDIA_TYPES[ext],
+    )
+    db.add(job)
+    await db.commit()
+    await direct_uploads.complete_upload(db, storage, job, max_size)
+    logger.info(f"[UPLOAD] {file.filename} queued as upload {job_id} for user {user.id}")
+    return JSONResponse(jsonable_encoder(_status(job)), status_code=202)
+
+
+def _model_response(model: Model3D, user_id: str) -> ModelUploadResponse:
     # ✅ Convert UUID to string to match response schema
     return ModelUploadResponse(
         id=str(model.id),
         name=model.name,
-        file_url=file_url,
-        thumbnail_url=f"{BASE_URL}/uploads/{thumbnail_rel_path}" if thumbnail_rel_path else None,
-        created_at=now,
+        file_url=model.file_url,
+        thumbnail_url=model.thumbnail_url,
+        created_at=model.uploaded_at,
         uploaded_by=user_id,
         geometry_hash=model.geometry_hash,
         is_duplicate=model.is_duplicate,
     )
+
+
+@router.post("/check", response_model=ContentCheckResponse)
+async def check_content(
+    body: ContentCheckRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Hash pre-check: send the file's SHA-256 and size before uploading it.
+    If that content is already stored, the model is created right away,
+    sharing the stored file, its metadata and derived files (no transfer,
+    no processing) and ``exists`` is true. Otherwise upload the file.
+    """
+    ext = validate_extension(body.filename)
+    max_size = max_file_size(body.filename)
+    if body.size > max_size:
+        raise HTTPException(400, f"File too large (max {max_size // (1024*1024)} MB)")
+
+    storage = get_storage()
+    blob = await blobs.find(db, storage, body.sha256, body.size)
+    if blob is None:
+        return ContentCheckResponse(exists=False)
+
+    model_id = uuid4()
+    key = await blobs.attach(storage, blob, model_key(model_id, ext))
+    model_kwargs = await ingest_blob(
+        db,
+        storage,
+        blob,
+        key,
+        model_id=model_id,
+        user_id=user.id,
+        filename=body.filename,
+        name=body.name,
+        description=body.description,
+        base_url=BASE_URL,
+    )
+    model = Model3D(**model_kwargs)
+    db.add(model)
+    await db.commit()
+
+    logger.info(f"[UPLOAD] Model {model.id} created from stored content {blob.sha256[:12]}")
+    return ContentCheckResponse(exists=True, model=_model_response(model, str(user.id)))
+
+
+# ────── Direct-to-storage uploads ──────
+# See app/services/direct_uploads.py: the file never passes through the API.
+
+
+def _status(job: UploadJob) -> UploadStatusResponse:
+    return UploadStatusResponse(
+        upload_id=job.id,
+        status=job.status,
+        model_id=job.id if job.status == direct_uploads.DONE else None,
+        error=job.error,
+    )
+
+
+async def _user_job(db: AsyncSession, upload_id: UUID, user: User) -> UploadJob:
+    job = await db.get(UploadJob, upload_id)
+    if job is None or str(job.user_id) != str(user.id) or not job.storage_key:
+        raise HTTPException(404, "Upload not found")
+    return job
+
+
+@router.post("/presign", response_model=DirectUploadResponse, status_code=201)
+async def presign_upload(
+    body: DirectUploadRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Issue a presigned PUT URL; POST /{upload_id}/complete once it succeeded."""
+    ext = validate_extension(body.filename)
+    max_size = max_file_size(body.filename)
+    if body.size > max_size:
+        raise HTTPException(400, f"File too large (max {max_size // (1024*1024)} MB)")
+
+    storage = get_storage()
+    upload_id = uuid4()
+    key = model_key(upload_id, ext)
+    expires = settings.direct_upload_expiry
+    try:
+        url, headers = storage.presigned_put(key, body.content_type, body.size, expires)
+    except NotImplementedError as e:
+        raise HTTPException(501, f"{e}; POST the file to /api/v1/upload instead") from e
+
+    db.add(
+        UploadJob(
+            id=upload_id,
+            user_id=user.id,
+            filename=body.filename,
+            status=direct_uploads.PENDING,
+            storage_key=key,
+            name=body.name,
+            description=body.description,
+            size=body.size,
+            content_type=body.content_type,
+        )
+    )
+    await db.commit()
+    logger.info(f"[UPLOAD] Presigned direct upload {upload_id} for user {user.id} ({body.size} bytes)")
+    return DirectUploadResponse(upload_id=upload_id, url=url, headers=headers, expires_in=expires)
+
+
+@router.post("/notifications", status_code=202)
+async def storage_notification(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Bucket event webhook (S3 via SNS/Lambda, MinIO ``notify_webhook``):
+    completes direct uploads without waiting for the client's callback.
+    """
+    token = settings.storage_webhook_token
+    if not token:
+        raise HTTPException(404, "Not Found")
+    if not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+        raise HTTPException(401, "Invalid notification token")
+
+    storage = get_storage()
+    accepted = 0
+    for key in direct_uploads.created_keys(await request.json(), getattr(storage, "prefix", "")):
+        job = await direct_uploads.job_for_key(db, key)
+        if job is None:
+            continue
+        try:
+            await direct_uploads.complete_upload(db, storage, job, max_file_size(job.filename))
+            accepted += 1
+        except HTTPException as e:
+            logger.warning(f"[UPLOAD] Notification for {key} not accepted: {e.detail}")
+    return {"accepted": accepted}
+
+
+@router.post("/{upload_id}/complete", response_model=UploadStatusResponse, status_code=202)
+async def complete_direct_upload(
+    upload_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    job = await _user_job(db, upload_id, user)
+    await direct_uploads.complete_upload(db, get_storage(), job, max_file_size(job.filename))
+    return _status(job)
+
+
+@router.get("/{upload_id}", response_model=UploadStatusResponse)
+async def direct_upload_status(
+    upload_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return _status(await _user_job(db, upload_id, user))
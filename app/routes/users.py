@@ -10,6 +10,7 @@ from app.dependencies.auth import get_current_user
 from app.models import User, Favorite, ModelMetadata
 from app.schemas.user import UpdateUserProfile, UserOut
 from app.schemas.models import ModelOut
+from app.utils.serializers import json_list_response
 from app.services.cache.user_cache import (
     cache_user_by_id,
     cache_user_by_username,
@@ -145,4 +146,4 @@ async def get_user_favorites(
 
     logger.info("✅ Found %d favorite models for user_id=%s", len(models), user_id)
 
-    return [ModelOut.model_validate(m).model_dump() for m in models]
+    return json_list_response(ModelOut, models)
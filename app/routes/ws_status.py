@@ -1,13 +1,11 @@
 # app/routes/ws_status.py
 
-import asyncio
-
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
 
 from app.dependencies.auth import get_user_from_token_query
 from app.services.redis_service import get_redis
 from app.services.session_status import set_session_status
-from app.utils.system_info import get_system_status_snapshot
+from app.services.system_status import status_hub
 from app.utils.logging import logger
 
 router = APIRouter()
@@ -27,11 +25,13 @@ async def system_status_ws(websocket: WebSocket):
     await set_session_status(redis, str(user.id), "connected")
 
     try:
-        while True:
-            status_data = get_system_status_snapshot()
-            logger.debug(f"🔄 Sending system status to user_id={user.id}")
-            await websocket.send_json(status_data)
-            await asyncio.sleep(10)
+        # Frames come from the shared per-host sampler; a slow socket only
+        # ever holds the newest one.
+        with status_hub.subscribe() as frames:
+            while True:
+                frame = await frames.get()
+                logger.debug(f"🔄 Sending system status to user_id={user.id}")
+                await websocket.send_text(frame)
     except WebSocketDisconnect:
         logger.info(f"❌ WebSocket disconnected for user_id={user.id}")
     except Exception as e:
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
+from uuid import UUID
 
 
 class FilamentCreate(BaseModel):
@@ -72,8 +73,8 @@ class FilamentUpdate(BaseModel):
 
 
 class FilamentOut(BaseModel):
-    id: str
-    name: str
+    id: UUID
+    name: Optional[str] = None
     category: str
     type: str
     subtype: Optional[str] = None
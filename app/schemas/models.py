@@ -2,7 +2,9 @@
 
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field, constr
+from uuid import UUID
+
+from pydantic import AliasChoices, BaseModel, Field, constr
 
 
 class ModelBase(BaseModel):
@@ -36,10 +38,11 @@ class ModelUpdate(BaseModel):
 
 
 class ModelOut(ModelBase):
-    id: str  # ✅ Changed from int to str for UUID compatibility
+    id: UUID  # serialized as the canonical string
     file_url: str
     thumbnail_url: Optional[str] = None
-    created_at: datetime
+    # ModelMetadata stores this as `uploaded_at`
+    created_at: datetime = Field(validation_alias=AliasChoices("created_at", "uploaded_at"))
     updated_at: Optional[datetime] = None
     uploaded_by: Optional[str] = None
     geometry_hash: Optional[str] = None
@@ -78,3 +81,43 @@ class ModelUploadResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class DirectUploadRequest(BaseModel):
+    filename: str = Field(..., max_length=255, description="Original file name (.stl)")
+    size: int = Field(..., gt=0, description="Exact size of the file in bytes")
+    content_type: str = Field("model/stl", description="Content-Type the client will send")
+    name: Optional[str] = Field(None, max_length=255)
+    description: Optional[str] = Field(None, max_length=1024)
+
+
+class DirectUploadResponse(BaseModel):
+    upload_id: UUID
+    url: str = Field(..., description="Presigned URL to PUT the file to")
+    method: str = "PUT"
+    headers: dict[str, str] = Field(
+        default_factory=dict, description="Headers the PUT must carry, with these values"
+    )
+    expires_in: int
+
+
+class UploadStatusResponse(BaseModel):
+    upload_id: UUID
+    status: str  # pending | uploaded | processing | done | failed
+    model_id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+class ContentCheckRequest(BaseModel):
+    sha256: constr(pattern=r"^[a-f0-9]{64}$") = Field(
+        ..., description="Lowercase hex SHA-256 of the file's bytes"
+    )
+    size: int = Field(..., gt=0, description="Exact size of the file in bytes")
+    filename: str = Field(..., max_length=255, description="Original file name (.stl)")
+    name: Optional[str] = Field(None, max_length=255)
+    description: Optional[str] = Field(None, max_length=1024)
+
+
+class ContentCheckResponse(BaseModel):
+    exists: bool = Field(..., description="False: upload the file as usual")
+    model: Optional[ModelUploadResponse] = None
@@ -0,0 +1,202 @@
+"""
+Startup benchmarks for the API process.
+
+Each measurement runs in a fresh interpreter so it sees a true cold start:
+nothing cached in ``sys.modules`` and no shared heap with the caller.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+_MARKER = "MW_BENCH "
+
+# Runs in the child; prints one marker line so app logging on stdout is ignored.
+_PROBE = f"""
+import importlib, json, resource, sys, time
+t0 = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - t0
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform != "darwin":
+    rss *= 1024  # Linux reports KiB
+print({_MARKER!r} + json.dumps({{"import_seconds": elapsed, "max_rss_bytes": rss}}))
+"""
+
+
+@dataclass
+class StartupSample:
+    wall_seconds: float
+    import_seconds: float
+    max_rss_mb: float
+
+
+def measure_startup(module: str = "app.main") -> StartupSample:
+    """Import MODULE in a new interpreter and report time and peak RSS."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE, module],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr.strip()[-2000:]}")
+
+    for line in proc.stdout.splitlines():
+        if line.startswith(_MARKER):
+            data = json.loads(line[len(_MARKER):])
+            return StartupSample(
+                wall_seconds=wall,
+                import_seconds=data["import_seconds"],
+                max_rss_mb=data["max_rss_bytes"] / (1024 * 1024),
+            )
+    raise RuntimeError(f"No benchmark output from child:\n{proc.stdout[-2000:]}")
+
+
+def median_startup(module: str = "app.main", runs: int = 3) -> StartupSample:
+    samples = [measure_startup(module) for _ in range(runs)]
+    return StartupSample(
+        wall_seconds=statistics.median(s.wall_seconds for s in samples),
+        import_seconds=statistics.median(s.import_seconds for s in samples),
+        max_rss_mb=statistics.median(s.max_rss_mb for s in samples),
+    )
+
+
+def import_profile(module: str = "app.main") -> list[tuple[str, float, float]]:
+    """
+    Return ``(package, self_ms, cumulative_ms)`` per top-level package, from
+    ``python -X importtime``, sorted by self time (descending).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr.strip()[-2000:]}")
+
+    self_us: dict[str, int] = defaultdict(int)
+    cumulative_us: dict[str, int] = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        module = name.strip()
+        package = module.split(".")[0]
+        self_us[package] += int(own)
+        # The package's own top-level import carries its whole subtree.
+        if module == package:
+            cumulative_us[package] = max(cumulative_us[package], int(cumulative))
+
+    rows = [
+        (package, self_us[package] / 1000, cumulative_us[package] / 1000)
+        for package in self_us
+    ]
+    return sorted(rows, key=lambda row: row[1], reverse=True)
+
+
+# ────── Middleware throughput ──────
+
+
+def _trivial_app(stack: str):
+    """A one-endpoint app wrapped in the old (``legacy``) or current (``asgi``) stack."""
+    from fastapi import FastAPI, Request
+    from fastapi.middleware.cors import CORSMiddleware
+    from starlette.middleware.gzip import GZipMiddleware
+    from starlette.middleware.sessions import SessionMiddleware
+
+    from app.middleware import (
+        CompressionMiddleware,
+        DebugOriginMiddleware,
+        PathPrefixMiddleware,
+        StripTrailingSlashMiddleware,
+    )
+
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    cors = dict(
+        allow_origins=["http://localhost:5173"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    if stack == "legacy":
+        app.add_middleware(SessionMiddleware, secret_key="bench")
+        app.add_middleware(CORSMiddleware, **cors)
+        app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+        @app.middleware("http")
+        async def debug_origin(request: Request, call_next):
+            request.headers.get("origin")
+            return await call_next(request)
+
+        @app.middleware("http")
+        async def strip_trailing_slash(request: Request, call_next):
+            scope = request.scope
+            if scope["path"] != "/" and scope["path"].endswith("/"):
+                scope["path"] = scope["path"].rstrip("/")
+            return await call_next(request)
+    else:
+        app.add_middleware(
+            PathPrefixMiddleware,
+            middleware=SessionMiddleware,
+            prefixes=("/api/v1/auth",),
+            secret_key="bench",
+        )
+        app.add_middleware(CORSMiddleware, **cors)
+        app.add_middleware(CompressionMiddleware, minimum_size=1000)
+        app.add_middleware(StripTrailingSlashMiddleware)
+        app.add_middleware(DebugOriginMiddleware)
+    return app
+
+
+async def _drive(app, requests: int, concurrency: int) -> float:
+    import asyncio
+
+    import httpx
+
+    headers = {"origin": "http://localhost:5173", "cookie": "session=abc123"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):  # warm up routing and header caches
+            await client.get("/ping/", headers=headers)
+
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get("/ping/", headers=headers)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+def middleware_rps(requests: int = 3000, concurrency: int = 32) -> dict[str, float]:
+    """
+    Requests per second through the legacy and the pure-ASGI middleware stacks,
+    in-process (httpx ``ASGITransport``) so socket costs do not drown the difference.
+    """
+    import asyncio
+
+    return {
+        stack: asyncio.run(_drive(_trivial_app(stack), requests, concurrency))
+        for stack in ("legacy", "asgi")
+    }
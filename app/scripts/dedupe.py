@@ -0,0 +1,104 @@
+"""
+Backfill the content-addressed blob store (``app.services.blobs``) with
+models uploaded before it existed.
+
+Runs online in batches like ``reshard``, whose layout it expects (models
+still under ``users/`` are skipped: run ``mw storage reshard`` first). Each
+file is hashed and added to the store; on local storage the model's file is
+replaced by a hard link to the blob, which frees the space of every copy
+after the first. On object stores the row is pointed at the blob and the
+old object is deleted once the batch is committed.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import select
+
+from app.config.settings import settings
+from app.models.models import ModelMetadata
+from app.services import blobs
+from app.services.storage import ObjectNotFound, StorageBackend, get_storage
+from app.services.storage.layout import LEGACY_PREFIX
+from app.utils.static_files import object_url
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DedupeStats:
+    scanned: int = 0
+    stored: int = 0
+    duplicates: int = 0
+    missing: int = 0
+    reclaimed_bytes: int = 0
+
+
+async def dedupe_models(
+    batch_size: int = 200,
+    pause: float = 0.0,
+    session_factory=None,
+    storage: StorageBackend | None = None,
+    base_url: str | None = None,
+) -> DedupeStats:
+    """Add every model without a ``content_hash`` to the blob store."""
+    if session_factory is None:
+        from app.db.database import async_session_maker as session_factory
+    storage = storage or get_storage()
+    base_url = (base_url or settings.base_url).rstrip("/")
+
+    stats = DedupeStats()
+    last_id = None
+    while True:
+        replaced = []
+        async with session_factory() as db:
+            query = (
+                select(ModelMetadata)
+                .where(
+                    ModelMetadata.content_hash.is_(None),
+                    ~ModelMetadata.filepath.startswith(LEGACY_PREFIX),
+                )
+                .order_by(ModelMetadata.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(ModelMetadata.id > last_id)
+            models = (await db.execute(query)).scalars().all()
+            if not models:
+                break
+            last_id = models[-1].id
+
+            for model in models:
+                stats.scanned += 1
+                try:
+                    blob = await blobs.adopt(storage, model.filepath)
+                except ObjectNotFound:
+                    stats.missing += 1
+                    logger.warning("⚠️ Model %s: %s not found, left as is", model.id, model.filepath)
+                    continue
+                key = await blobs.attach(storage, blob, model.filepath)
+                if key != model.filepath:
+                    replaced.append(model.filepath)
+                    model.filepath = key
+                    model.file_url = await object_url(storage, key, base_url)
+                model.content_hash = blob.sha256
+                await blobs.acquire(db, blob)
+                if blob.created:
+                    stats.stored += 1
+                else:
+                    stats.duplicates += 1
+                    stats.reclaimed_bytes += blob.size
+            await db.commit()
+
+        for key in replaced:
+            await storage.delete(key)
+        logger.info(
+            "🧬 Deduplicated %d models so far: %d duplicates, %d bytes reclaimed",
+            stats.scanned,
+            stats.duplicates,
+            stats.reclaimed_bytes,
+        )
+        if pause:
+            await asyncio.sleep(pause)
+    return stats
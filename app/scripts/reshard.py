@@ -0,0 +1,152 @@
+"""
+Online migration of model files into the sharded layout (see
+``app.services.storage.layout``).
+
+Models are handled in batches of BATCH_SIZE, walking the table by id. For
+each batch the files are copied (hard-linked on local storage, server-side
+copies on S3) to ``models/<shard>/<model_id>/``, the legacy files are
+removed and the rows are updated in one commit. The API keeps serving
+throughout: ``/uploads`` maps a legacy path to its new location, so old
+URLs work before, during and after the move. An interrupted run is simply
+started again; models whose files are already in place are picked up
+where they were left.
+"""
+
+import asyncio
+import logging
+import posixpath
+from dataclasses import dataclass
+
+from sqlalchemy import select
+
+from app.config.settings import settings
+from app.models.models import ModelMetadata
+from app.services.storage import StorageBackend, get_storage
+from app.services.storage.layout import (
+    COMPRESSED_SUFFIXES,
+    GLB,
+    LEGACY_PREFIX,
+    THUMBNAIL,
+    TURNTABLE,
+    artifact_key,
+    model_key,
+)
+from app.utils.static_files import object_url
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReshardStats:
+    scanned: int = 0
+    migrated: int = 0
+    missing: int = 0
+    files: int = 0
+
+
+def legacy_moves(model: ModelMetadata) -> list[tuple[str, str]]:
+    """``(legacy key, sharded key)`` for every file MODEL may have."""
+    source = model.filepath
+    base, ext = posixpath.splitext(source)
+    target = model_key(model.id, ext)
+    moves = [(source, target)]
+    moves += [(source + suffix, target + suffix) for suffix in COMPRESSED_SUFFIXES]
+    moves += [
+        (f"{base}_thumbnail.png", artifact_key(model.id, THUMBNAIL)),
+        (f"{base}.png", artifact_key(model.id, THUMBNAIL)),
+        (f"{base}.webm", artifact_key(model.id, TURNTABLE)),
+    ]
+    if model.glb_path and model.glb_path.startswith(LEGACY_PREFIX):
+        moves.append((model.glb_path, artifact_key(model.id, GLB)))
+    return moves
+
+
+async def migrate_model(
+    storage: StorageBackend, model: ModelMetadata, base_url: str, dry_run: bool = False
+) -> int | None:
+    """
+    Move MODEL's files and point its row at them (uncommitted). Returns the
+    number of files moved, or None if the model file is nowhere to be found.
+    """
+    moves = legacy_moves(model)
+    target = moves[0][1]
+    if not await storage.exists(model.filepath) and not await storage.exists(target):
+        return None
+
+    copied: set[str] = set()
+    stale = []
+    for source, destination in moves:
+        if not await storage.exists(source):
+            continue
+        if destination not in copied and not dry_run:
+            await storage.copy(source, destination)
+        copied.add(destination)
+        stale.append(source)
+    if dry_run:
+        return len(stale)
+    for source in stale:
+        await storage.delete(source)
+
+    model.filepath = target
+    model.file_url = await object_url(storage, target, base_url)
+    thumbnail = artifact_key(model.id, THUMBNAIL)
+    if await storage.exists(thumbnail):
+        model.thumbnail_url = await object_url(storage, thumbnail, base_url)
+    turntable = artifact_key(model.id, TURNTABLE)
+    if await storage.exists(turntable):
+        model.webm_url = await object_url(storage, turntable, base_url)
+    glb = artifact_key(model.id, GLB)
+    if model.glb_path and model.glb_path.startswith(LEGACY_PREFIX) and await storage.exists(glb):
+        model.glb_path = glb
+    return len(stale)
+
+
+async def reshard_models(
+    batch_size: int = 200,
+    pause: float = 0.0,
+    dry_run: bool = False,
+    session_factory=None,
+    storage: StorageBackend | None = None,
+    base_url: str | None = None,
+) -> ReshardStats:
+    """Migrate every model still under ``users/``; sleeps PAUSE seconds between batches."""
+    if session_factory is None:
+        from app.db.database import async_session_maker as session_factory
+    storage = storage or get_storage()
+    base_url = (base_url or settings.base_url).rstrip("/")
+
+    stats = ReshardStats()
+    last_id = None
+    while True:
+        async with session_factory() as db:
+            query = (
+                select(ModelMetadata)
+                .where(ModelMetadata.filepath.startswith(LEGACY_PREFIX))
+                .order_by(ModelMetadata.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(ModelMetadata.id > last_id)
+            models = (await db.execute(query)).scalars().all()
+            if not models:
+                break
+            last_id = models[-1].id
+
+            for model in models:
+                stats.scanned += 1
+                moved = await migrate_model(storage, model, base_url, dry_run)
+                if moved is None:
+                    stats.missing += 1
+                    logger.warning("⚠️ Model %s: %s not found, left as is", model.id, model.filepath)
+                    continue
+                stats.migrated += 1
+                stats.files += moved
+            if not dry_run:
+                await db.commit()
+
+        logger.info(
+            "📦 Resharded %d/%d models so far (%d files)", stats.migrated, stats.scanned, stats.files
+        )
+        if pause:
+            await asyncio.sleep(pause)
+    return stats
@@ -0,0 +1,174 @@
+"""
+Production runtime profile for the API server.
+
+``mw serve`` runs Gunicorn with Uvicorn workers, sized from the host (or
+container) CPU and memory limits, using uvloop and httptools when they are
+installed. The app is imported once in the master process (``preload_app``)
+and the heap frozen before forking, so workers share its pages copy-on-write
+instead of each importing their own copy.
+"""
+
+import gc
+import importlib.util
+import logging
+import os
+from dataclasses import asdict, dataclass
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from app import env_log_level
+
+# Budget per worker: ~90 MB resident after import plus request headroom.
+WORKER_MEMORY_MB = int(os.getenv("WEB_WORKER_MEMORY_MB", 256))
+# Leave room for the master, Celery sidecars and the page cache.
+MEMORY_HEADROOM = 0.75
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+LOOP = "uvloop" if _installed("uvloop") else "asyncio"
+HTTP = "httptools" if _installed("httptools") else "h11"
+
+
+class TunedUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": LOOP,
+        "http": HTTP,
+        "lifespan": "on",
+        "server_header": False,
+    }
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (honours affinity and cgroup quotas)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - macOS / Windows
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def available_memory_bytes() -> int:
+    """Physical memory, or the container's cgroup limit if lower."""
+    import psutil
+
+    total = psutil.virtual_memory().total
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                raw = f.read().strip()
+        except OSError:
+            continue
+        if raw.isdigit():
+            total = min(total, int(raw))
+        break
+    return total
+
+
+def recommended_workers(
+    cpus: int, memory_bytes: int, worker_memory_mb: int = WORKER_MEMORY_MB
+) -> int:
+    """
+    One async worker per CPU, capped by how many fit in memory.
+
+    Uvicorn workers multiplex connections on an event loop, so the classic
+    ``2 * cores + 1`` for blocking workers would only add context switches.
+    """
+    by_memory = int(memory_bytes * MEMORY_HEADROOM) // (worker_memory_mb * 1024 * 1024)
+    return max(1, min(cpus, by_memory))
+
+
+@dataclass
+class ServeTuning:
+    bind: str
+    workers: int
+    cpus: int
+    memory_mb: int
+    loop: str
+    http: str
+    env: str
+    preload: bool
+    timeout: int
+    keepalive: int
+
+    def gunicorn_options(self) -> dict:
+        return {
+            "bind": self.bind,
+            "workers": self.workers,
+            "worker_class": f"{__name__}.TunedUvicornWorker",
+            "preload_app": self.preload,
+            "timeout": self.timeout,
+            "graceful_timeout": self.timeout,
+            "keepalive": self.keepalive,
+            "accesslog": None,
+            "loglevel": "debug" if self.env == "development" else "info",
+        }
+
+
+def resolve_tuning(
+    bind: str = "0.0.0.0:8000",
+    workers: int | None = None,
+    env: str = "production",
+    preload: bool = True,
+    timeout: int = 60,
+    keepalive: int = 5,
+) -> ServeTuning:
+    cpus = available_cpus()
+    memory = available_memory_bytes()
+    return ServeTuning(
+        bind=bind,
+        workers=workers or recommended_workers(cpus, memory),
+        cpus=cpus,
+        memory_mb=memory // (1024 * 1024),
+        loop=LOOP,
+        http=HTTP,
+        env=env,
+        preload=preload,
+        timeout=timeout,
+        keepalive=keepalive,
+    )
+
+
+def describe(tuning: ServeTuning) -> list[str]:
+    data = asdict(tuning)
+    return [f"{key:<10} {value}" for key, value in data.items()]
+
+
+class ServeApplication(BaseApplication):
+    def __init__(self, tuning: ServeTuning, app_path: str = "app.main:app") -> None:
+        self.tuning = tuning
+        self.app_path = app_path
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.tuning.gunicorn_options().items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        module, _, attr = self.app_path.partition(":")
+        app = getattr(importlib.import_module(module), attr)
+        if self.tuning.preload:
+            # Move everything imported so far out of the GC's reach so
+            # collections in the workers don't touch (and copy) shared pages.
+            gc.collect()
+            gc.freeze()
+        return app
+
+
+def serve(tuning: ServeTuning) -> None:
+    # Must be set before app.config.settings is first imported.
+    os.environ["ENV"] = tuning.env
+    if tuning.env != "development" and env_log_level() is None:
+        # `app` configured logging on import, before the profile was known.
+        logging.getLogger().setLevel(logging.INFO)
+    ServeApplication(tuning).run()
@@ -0,0 +1,151 @@
+"""
+Content-addressed store for model files.
+
+Each distinct file is kept once, under the SHA-256 of its bytes:
+``blobs/sha256/<ab>/<cd>/<digest>``. The ``blobs`` table counts the models
+that reference each blob (``models.content_hash``). Where copies are free
+(``StorageBackend.cheap_copy``: hard links on local disk) the model's own
+key, ``models/<shard>/<id>/model.stl``, is linked to the blob so
+``/uploads/m/<id>/model.stl`` keeps working; on object stores the row
+points at the blob key itself.
+
+Uploads are hashed while they stream into a staging key. If the content is
+already stored, the staged copy is dropped instead of kept, and the new
+model shares the first one's metadata and derived files (see
+``model_ingest.ingest_blob``).
+
+Refcounts go up in the same transaction as the model rows. Models only go
+away with their user, by cascade, so the garbage collector recounts the
+references instead of anything decrementing them. A blob whose count is 0
+(or that never got a row because its upload failed) is left to the
+collector rather than deleted inline, so a concurrent upload of the same
+content can never lose its file.
+
+Files derived from a blob (format conversions, see
+``app.services.conversions``) are keyed by its digest too, under
+``blobs/derived/<ab>/<cd>/<digest>.<format>``, and go when it goes.
+"""
+
+import hashlib
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Blob, ModelMetadata
+from app.services.storage import StorageBackend
+from app.services.storage.base import Data, iter_chunks
+
+BLOB_PREFIX = "blobs/sha256/"
+STAGING_PREFIX = "blobs/staging/"
+DERIVED_PREFIX = "blobs/derived/"
+
+
+def blob_key(sha256: str) -> str:
+    return f"{BLOB_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def derived_key(sha256: str, fmt: str = "") -> str:
+    """Key of the blob's content converted to FMT (without FMT: their common prefix)."""
+    return f"{DERIVED_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}.{fmt}"
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    sha256: str
+    size: int
+    created: bool  # False: the content was already in the store
+
+    @property
+    def key(self) -> str:
+        return blob_key(self.sha256)
+
+
+async def store(storage: StorageBackend, data: Data, content_type: str | None = None) -> StoredBlob:
+    """Stream DATA into the store, hashing it on the way."""
+    digest = hashlib.sha256()
+    size = 0
+
+    async def hashing():
+        nonlocal size
+        async for chunk in iter_chunks(data):
+            digest.update(chunk)
+            size += len(chunk)
+            yield chunk
+
+    staging = f"{STAGING_PREFIX}{uuid.uuid4().hex}"
+    await storage.put(staging, hashing(), content_type)
+    try:
+        return await _promote(storage, staging, digest.hexdigest(), size)
+    finally:
+        await storage.delete(staging)
+
+
+async def adopt(storage: StorageBackend, key: str) -> StoredBlob:
+    """Add the object already stored at KEY to the store; KEY is left in place."""
+    digest = hashlib.sha256()
+    size = 0
+    async for chunk in storage.stream(key):
+        digest.update(chunk)
+        size += len(chunk)
+    return await _promote(storage, key, digest.hexdigest(), size)
+
+
+async def _promote(storage: StorageBackend, source: str, sha256: str, size: int) -> StoredBlob:
+    if await storage.exists(blob_key(sha256)):
+        return StoredBlob(sha256, size, created=False)
+    await storage.copy(source, blob_key(sha256))
+    return StoredBlob(sha256, size, created=True)
+
+
+async def attach(storage: StorageBackend, blob: StoredBlob, key: str) -> str:
+    """
+    The storage key a model should record for BLOB: KEY, linked to the
+    blob, where copies are free; the blob's own key otherwise.
+    """
+    if not storage.cheap_copy:
+        return blob.key
+    await storage.copy(blob.key, key)
+    return key
+
+
+async def acquire(db: AsyncSession, blob: StoredBlob) -> None:
+    """Count one more reference to BLOB (commit with the model row)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    statement = insert(Blob).values(sha256=blob.sha256, size=blob.size, refcount=1)
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[Blob.sha256], set_={"refcount": Blob.refcount + 1}
+        )
+    )
+
+
+async def find(
+    db: AsyncSession, storage: StorageBackend, sha256: str, size: int
+) -> StoredBlob | None:
+    """
+    The stored blob with this digest and SIZE, if it is referenced by at
+    least one model (unreferenced blobs may be collected at any moment).
+    """
+    row = await db.get(Blob, sha256)
+    if row is None or row.refcount < 1 or row.size != size:
+        return None
+    if not await storage.exists(blob_key(sha256)):
+        return None
+    return StoredBlob(sha256, row.size, created=False)
+
+
+async def model_with_content(db: AsyncSession, sha256: str) -> ModelMetadata | None:
+    """The first model stored with this content, whose derived files can be shared."""
+    result = await db.execute(
+        select(ModelMetadata)
+        .where(ModelMetadata.content_hash == sha256)
+        .order_by(ModelMetadata.uploaded_at)
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
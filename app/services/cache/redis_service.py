@@ -1,6 +1,11 @@
+import asyncio
 import logging
+import os
+import socket
 import time
-from typing import AsyncGenerator
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
 
 from redis.asyncio import Redis
 from app.config.settings import settings
@@ -57,6 +62,42 @@ async def clear_expired_keys(namespace: str = "makerworks:*") -> None:
             logger.debug(f"🗑️ Deleted expired key: {key}")
     logger.info("✅ Redis expired key scan complete.")
 
+# ──────────────────────────────────────────────────────────────
+# Locks for jobs that must not overlap across processes
+# ──────────────────────────────────────────────────────────────
+LOCK_TTL = 300
+
+
+async def renew_lock(client: Redis, key: str, token: str, ttl: int) -> None:
+    """Extend KEY every third of its TTL for as long as TOKEN owns it."""
+    while True:
+        await asyncio.sleep(ttl / 3)
+        if await client.get(key) != token:
+            return
+        await client.expire(key, ttl)
+
+
+@asynccontextmanager
+async def exclusive(client: Redis, name: str, ttl: int = LOCK_TTL) -> AsyncIterator[bool]:
+    """
+    Hold ``makerworks:lock:NAME`` for the body, renewed while it runs; a
+    crashed holder's lock expires after TTL. Yields False, without waiting,
+    when another process holds it.
+    """
+    key = f"makerworks:lock:{name}"
+    token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+    if not await client.set(key, token, nx=True, ex=ttl):
+        yield False
+        return
+    renew = asyncio.create_task(renew_lock(client, key, token, ttl))
+    try:
+        yield True
+    finally:
+        renew.cancel()
+        await asyncio.gather(renew, return_exceptions=True)
+        if await client.get(key) == token:
+            await client.delete(key)
+
 # ──────────────────────────────────────────────────────────────
 # Dependency-injectable accessor
 # ──────────────────────────────────────────────────────────────
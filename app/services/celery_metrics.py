@@ -0,0 +1,225 @@
+"""
+Prometheus metrics for Celery tasks and queues.
+
+Signal hooks record, per task name and queue:
+
+- how long a message waited in the broker before a worker picked it up,
+- how long the task body ran,
+- how often it was retried or failed.
+
+Publishers stamp every message with its send time, so the wait histogram
+measures real broker latency rather than prefetch buffering. A background
+inspector samples the depth of each queue straight from Redis.
+
+Prefork children record into files under ``PROMETHEUS_MULTIPROC_DIR``; see
+``app.celery_worker`` for how the worker's HTTP exporter aggregates them.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_process_shutdown,
+    worker_ready,
+    worker_shutdown,
+)
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger("makerworks.celery.metrics")
+
+SENT_AT_HEADER = "mw_sent_at"
+
+# Seconds; wide enough to separate "instant" from "stuck behind a backfill".
+_WAIT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900, 1800)
+_RUN_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800)
+
+task_queue_wait_seconds = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time between publishing a task and a worker starting it",
+    ["task", "queue"],
+    buckets=_WAIT_BUCKETS,
+)
+task_runtime_seconds = Histogram(
+    "celery_task_runtime_seconds",
+    "Time spent executing the task body",
+    ["task", "queue", "state"],
+    buckets=_RUN_BUCKETS,
+)
+task_retries_total = Counter(
+    "celery_task_retries_total", "Task retries requested", ["task", "queue"]
+)
+task_failures_total = Counter(
+    "celery_task_failures_total",
+    "Tasks that raised an exception",
+    ["task", "queue", "exception"],
+)
+queue_depth = Gauge(
+    "celery_queue_depth",
+    "Messages waiting in the broker queue",
+    ["queue"],
+    multiprocess_mode="max",
+)
+
+# task_id -> perf_counter() at prerun; lives in whichever process runs the task.
+_started: dict[str, float] = {}
+
+
+def _queue_of(task) -> str:
+    delivery_info = getattr(task.request, "delivery_info", None) or {}
+    return delivery_info.get("routing_key") or "unknown"
+
+
+# ────────────── SIGNAL HOOKS ──────────────
+@before_task_publish.connect
+def _stamp_sent_at(headers=None, **_) -> None:
+    if headers is not None:
+        headers.setdefault(SENT_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def _on_prerun(task_id=None, task=None, **_) -> None:
+    _started[task_id] = time.perf_counter()
+
+    sent_at = getattr(task.request, SENT_AT_HEADER, None)
+    if sent_at is None:
+        return
+    # A countdown/eta retry is not waiting for capacity; measure from its eta.
+    eta = task.request.eta
+    if eta:
+        try:
+            sent_at = max(float(sent_at), datetime.fromisoformat(eta).timestamp())
+        except (TypeError, ValueError):
+            pass
+    wait = max(0.0, time.time() - float(sent_at))
+    task_queue_wait_seconds.labels(task.name, _queue_of(task)).observe(wait)
+
+
+@task_postrun.connect
+def _on_postrun(task_id=None, task=None, state=None, **_) -> None:
+    started = _started.pop(task_id, None)
+    if started is None:
+        return
+    task_runtime_seconds.labels(task.name, _queue_of(task), state or "UNKNOWN").observe(
+        time.perf_counter() - started
+    )
+
+
+@task_retry.connect
+def _on_retry(sender=None, request=None, **_) -> None:
+    delivery_info = getattr(request, "delivery_info", None) or {}
+    task_retries_total.labels(
+        sender.name, delivery_info.get("routing_key") or "unknown"
+    ).inc()
+
+
+@task_failure.connect
+def _on_failure(sender=None, exception=None, **_) -> None:
+    task_failures_total.labels(
+        sender.name, _queue_of(sender), type(exception).__name__
+    ).inc()
+
+
+# ────────────── QUEUE DEPTH INSPECTOR ──────────────
+class QueueDepthSampler:
+    """
+    Periodically read queue lengths from the Redis broker.
+
+    Kombu's Redis transport stores each queue as a list, plus one extra list
+    per non-zero priority step, so all of them are summed.
+    """
+
+    PRIORITY_STEPS = (0, 3, 6, 9)
+    PRIORITY_SEP = "\x06\x16"
+
+    def __init__(self, broker_url: str, queues: list[str], interval: float = 15.0):
+        self.broker_url = broker_url
+        self.queues = queues
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._client = None
+
+    def _keys(self, queue: str) -> list[str]:
+        return [
+            queue if step == 0 else f"{queue}{self.PRIORITY_SEP}{step}"
+            for step in self.PRIORITY_STEPS
+        ]
+
+    def sample_once(self) -> dict[str, int]:
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self.broker_url, socket_timeout=2)
+
+        pipe = self._client.pipeline(transaction=False)
+        for queue in self.queues:
+            for key in self._keys(queue):
+                pipe.llen(key)
+        lengths = pipe.execute()
+
+        depths = {}
+        step_count = len(self.PRIORITY_STEPS)
+        for i, queue in enumerate(self.queues):
+            depths[queue] = sum(lengths[i * step_count : (i + 1) * step_count])
+            queue_depth.labels(queue).set(depths[queue])
+        return depths
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                logger.warning("Queue depth sample failed: %s", e)
+                self._client = None
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="celery-queue-depth", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_sampler: QueueDepthSampler | None = None
+
+
+@worker_ready.connect
+def _start_depth_sampler(sender=None, **_) -> None:
+    global _sampler
+    interval = float(os.getenv("CELERY_QUEUE_DEPTH_INTERVAL", 15))
+    if interval <= 0 or _sampler is not None:
+        return
+
+    from app.worker import CELERY_BROKER_URL, TASK_QUEUES
+
+    _sampler = QueueDepthSampler(
+        CELERY_BROKER_URL, [q.name for q in TASK_QUEUES], interval
+    )
+    _sampler.start()
+    logger.info("📊 Sampling Celery queue depth every %ss", interval)
+
+
+@worker_shutdown.connect
+def _stop_depth_sampler(**_) -> None:
+    if _sampler is not None:
+        _sampler.stop()
+
+
+@worker_process_shutdown.connect
+def _mark_child_dead(pid=None, **_) -> None:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -0,0 +1,203 @@
+"""
+Model files converted to other formats on request.
+
+Web viewers want GLB or the compact mesh (``app.utils.compact_mesh``) and
+printers want 3MF, whatever was uploaded. A conversion runs once per
+content and target format: the result is stored next to the model's blob
+(``blobs.derived_key``) and every model with the same content is served
+from there afterwards. GLBs are also attached to the model itself
+(``ModelMetadata.glb_path``), linked into its directory where copies are
+free, like the model file.
+
+Conversions run on the ``cpu`` Celery workers, not in the API process.
+The first request for a missing conversion claims it in Redis and queues
+the task; requests that arrive meanwhile, from any API process, see the
+claim and are told to come back (HTTP 202), so concurrent requests cost one
+conversion. A failed conversion keeps its claim, marked failed, for
+``CONVERT_FAILURE_TTL`` seconds so broken files aren't retried on every
+request.
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+from uuid import UUID
+
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import settings
+from app.models.models import ModelMetadata
+from app.services import tiering
+from app.services.blobs import derived_key
+from app.services.cache.redis_service import redis
+from app.services.storage import StorageBackend, get_storage
+from app.services.storage.layout import GLB, artifact_key
+from app.utils import compact_mesh
+
+logger = logging.getLogger(__name__)
+
+# Target format -> source formats it can be made from
+CONVERSIONS = {
+    "glb": {"stl", "obj", "3mf"},
+    "3mf": {"stl", "obj"},
+    "stl": {"3mf", "obj"},
+    compact_mesh.FORMAT: {"stl", "obj", "3mf"},
+}
+MEDIA_TYPES = {
+    "glb": "model/gltf-binary",
+    "3mf": "model/3mf",
+    "stl": "model/stl",
+    compact_mesh.FORMAT: compact_mesh.MEDIA_TYPE,
+}
+# Fetched by the web viewer rather than downloaded
+VIEWER_FORMATS = {"glb", compact_mesh.FORMAT}
+
+PENDING = "pending"
+FAILED = "failed"
+
+conversions_total = Counter(
+    "makerworks_model_conversions_total",
+    "Model format conversions run by the workers",
+    ["target", "result"],  # result: converted | failed
+)
+
+
+class ConversionError(Exception):
+    """The model could not be converted (unreadable or empty mesh)."""
+
+
+def source_format(model: ModelMetadata) -> str:
+    return Path(model.filename or model.filepath).suffix.lstrip(".").lower()
+
+
+def can_convert(source: str, target: str) -> bool:
+    return source in CONVERSIONS.get(target, ())
+
+
+def _claim_key(sha256: str, target: str) -> str:
+    return f"makerworks:convert:{sha256}:{target}"
+
+
+def convert_file(path: Path, source: str, target: str) -> bytes:
+    """
+    The mesh at PATH (in SOURCE format) as TARGET bytes. CPU-bound: run it
+    in a worker thread.
+    """
+    import trimesh  # heavy (numpy, pyglet); only needed once a model arrives
+
+    from app.utils.threemf import read_3mf, write_3mf
+
+    try:
+        if source == "3mf":
+            mesh = trimesh.Trimesh(*read_3mf(path))
+        else:
+            mesh = trimesh.load(str(path), file_type=source, force="mesh")
+    except Exception as e:
+        raise ConversionError(f"Cannot read {source.upper()}: {e}") from e
+    if not len(mesh.faces):
+        raise ConversionError("The model has no triangles")
+
+    if target == "3mf":
+        return write_3mf(mesh.vertices, mesh.faces)
+    if target == compact_mesh.FORMAT:
+        return compact_mesh.encode(mesh.vertices, mesh.faces)
+    return mesh.export(file_type=target)
+
+
+async def attach_glb(db: AsyncSession, storage: StorageBackend, model: ModelMetadata, key: str) -> None:
+    """Record the GLB at KEY as MODEL's ``glb_path``."""
+    if storage.cheap_copy:
+        target = artifact_key(model.id, GLB)
+        await storage.copy(key, target)
+    else:
+        target = key  # on object stores the row points at the shared copy
+    model.glb_path = target
+    await db.commit()
+
+
+async def converted_key(
+    db: AsyncSession, storage: StorageBackend, model: ModelMetadata, target: str
+) -> str | None:
+    """
+    Key of MODEL's file in TARGET format, or None while its conversion is
+    queued (queueing it if nobody has). Raises ConversionError if the last
+    attempt failed.
+    """
+    if source_format(model) == target:
+        return model.filepath
+    if target == "glb" and model.glb_path and await storage.exists(model.glb_path):
+        return model.glb_path
+    if not model.content_hash:
+        raise ConversionError("The model predates content hashing (run `mw storage dedupe`)")
+
+    key = derived_key(model.content_hash, target)
+    if await storage.exists(key):
+        if target == "glb":
+            await attach_glb(db, storage, model, key)
+            return model.glb_path
+        return key
+
+    claim = _claim_key(model.content_hash, target)
+    try:
+        if not await redis.set(claim, PENDING, nx=True, ex=settings.convert_timeout):
+            if await redis.get(claim) == FAILED:
+                raise ConversionError(f"{model.filename} could not be converted to {target.upper()}")
+            return None
+    except RedisError as e:
+        # Without Redis concurrent requests may convert twice; still convert
+        logger.warning("Conversion claim for %s not recorded: %s", model.id, e)
+    await enqueue_conversion(model.id, target)
+    logger.info("🔁 Queued %s -> %s for model %s", source_format(model), target, model.id)
+    return None
+
+
+async def enqueue_conversion(model_id, target: str) -> None:
+    from app.tasks.models import convert_model  # imports the Celery app
+
+    # .delay() talks to the broker synchronously
+    await asyncio.to_thread(convert_model.delay, str(model_id), target)
+
+
+async def convert_model(
+    model_id: str, target: str, session_factory=None, storage: StorageBackend | None = None
+) -> str | None:
+    """
+    Worker side: store MODEL_ID's file converted to TARGET (unless another
+    model with the same content got there first) and release the claim.
+    Returns the derived key, None if the model is gone or can't be
+    converted. Storage errors propagate so the task can retry.
+    """
+    if session_factory is None:
+        from app.db.database import async_session_maker as session_factory
+    storage = storage or get_storage()
+
+    async with session_factory() as db:
+        model = await db.get(ModelMetadata, UUID(str(model_id)))
+        if model is None or not model.content_hash:
+            return None
+        key = derived_key(model.content_hash, target)
+        claim = _claim_key(model.content_hash, target)
+
+        if not await storage.exists(key):
+            found = await tiering.stat(storage, model.filepath)
+            if found is not None:
+                # A read like any download, or the tier job takes it for unused
+                await tiering.record_access(model.filepath, found[1])
+            try:
+                async with tiering.open_local(storage, model.filepath) as path:
+                    data = await asyncio.to_thread(convert_file, path, source_format(model), target)
+            except ConversionError as e:
+                conversions_total.labels(target=target, result="failed").inc()
+                logger.warning("⚠️ Converting model %s to %s failed: %s", model.id, target, e)
+                await redis.set(claim, FAILED, ex=settings.convert_failure_ttl)
+                return None
+            await storage.put(key, data, content_type=MEDIA_TYPES[target])
+            conversions_total.labels(target=target, result="converted").inc()
+            logger.info("🔁 Converted model %s to %s (%d bytes)", model.id, target, len(data))
+
+        if target == "glb" and not model.glb_path:
+            await attach_glb(db, storage, model, key)
+    await redis.delete(claim)
+    return key
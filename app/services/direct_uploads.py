@@ -0,0 +1,163 @@
+"""
+Direct-to-storage uploads.
+
+The API only handles control messages; model bytes go from the client
+straight to the object store:
+
+1. ``POST /upload/presign`` checks name and size, records an ``UploadJob``
+   (``pending``) and returns a presigned PUT URL for the job's storage key;
+2. the client PUTs the file to that URL;
+3. ``POST /upload/{id}/complete`` from the client, or the bucket's
+   ObjectCreated notification, whichever arrives first, verifies the object
+   and moves the job to ``uploaded``. Exactly one of them queues
+   ``app.tasks.models.process_upload``;
+4. a ``cpu`` worker adds the file to the blob store (``app.services.blobs``),
+   extracts metadata and the thumbnail unless the content is already known,
+   creates the ``ModelMetadata`` row and marks the job ``done`` (or ``failed``).
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from urllib.parse import unquote_plus
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import settings
+from app.models.models import ModelMetadata, UploadJob
+from app.services import blobs
+from app.services.model_ingest import ingest_blob
+from app.services.storage import StorageBackend, StorageError, get_storage
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+UPLOADED = "uploaded"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+REJECTED = "rejected"
+
+
+async def complete_upload(
+    db: AsyncSession, storage: StorageBackend, job: UploadJob, max_size: int
+) -> str:
+    """
+    Verify JOB's object landed and queue its processing. Safe to call any
+    number of times, concurrently: only the first successful call enqueues.
+    Returns the job's status.
+    """
+    if job.status != PENDING:
+        return job.status
+
+    info = await storage.stat(job.storage_key)
+    if info is None:
+        raise HTTPException(409, "File has not been uploaded yet")
+
+    if info.size != job.size or info.size > max_size:
+        await storage.delete(job.storage_key)
+        await _transition(db, job.id, PENDING, REJECTED, error=f"Unexpected size {info.size}")
+        raise HTTPException(400, f"Uploaded file is {info.size} bytes, expected {job.size}")
+
+    if await _transition(db, job.id, PENDING, UPLOADED):
+        try:
+            await enqueue_processing(job.id)
+        except Exception as e:
+            # Back to pending, so the client's retry or the notification queues it
+            await _transition(db, job.id, UPLOADED, PENDING)
+            logger.warning("[UPLOAD] Processing of %s not queued: %s", job.id, e)
+            raise HTTPException(503, "Upload received but not queued; try again") from e
+        logger.info("[UPLOAD] Direct upload %s received (%d bytes)", job.id, info.size)
+    await db.refresh(job)
+    return job.status
+
+
+async def _transition(db: AsyncSession, job_id, source: str, target: str, **values) -> bool:
+    """Compare-and-set the job's status; False if someone else moved it first."""
+    result = await db.execute(
+        update(UploadJob)
+        .where(UploadJob.id == job_id, UploadJob.status == source)
+        .values(status=target, **values)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def enqueue_processing(upload_id) -> None:
+    from app.tasks.models import process_upload  # imports the Celery app
+
+    # .delay() talks to the broker synchronously
+    await asyncio.to_thread(process_upload.delay, str(upload_id))
+
+
+def created_keys(event: dict, prefix: str = "") -> list[str]:
+    """
+    Storage keys from an S3 / MinIO ``ObjectCreated`` event notification,
+    with the backend's key PREFIX removed.
+    """
+    keys = []
+    for record in event.get("Records") or []:
+        if "ObjectCreated" not in record.get("eventName", ""):
+            continue
+        key = unquote_plus(record.get("s3", {}).get("object", {}).get("key", ""))
+        if key.startswith(prefix):
+            keys.append(key[len(prefix) :])
+    return keys
+
+
+async def job_for_key(db: AsyncSession, key: str) -> UploadJob | None:
+    result = await db.execute(select(UploadJob).where(UploadJob.storage_key == key))
+    return result.scalar_one_or_none()
+
+
+async def process_direct_upload(upload_id: str, session_factory=None, storage=None) -> str:
+    """
+    Worker side of a direct upload: build the model from the stored object.
+    Storage errors propagate so the task can retry.
+    """
+    if session_factory is None:
+        from app.db.database import async_session_maker as session_factory
+    storage = storage or get_storage()
+
+    async with session_factory() as db:
+        job = await db.get(UploadJob, UUID(str(upload_id)))
+        if job is None or job.status not in (UPLOADED, PROCESSING):
+            return job.status if job else "missing"
+        job.status = PROCESSING
+        await db.commit()
+
+        try:
+            blob = await blobs.adopt(storage, job.storage_key)
+            key = await blobs.attach(storage, blob, job.storage_key)
+            values = await ingest_blob(
+                db,
+                storage,
+                blob,
+                key,
+                model_id=job.id,
+                user_id=job.user_id,
+                filename=job.filename,
+                name=job.name,
+                description=job.description,
+                base_url=settings.base_url.rstrip("/"),
+            )
+        except HTTPException as e:
+            await storage.delete(job.storage_key)
+            job.status, job.error, job.completed_at = FAILED, str(e.detail), datetime.utcnow()
+            await db.commit()
+            logger.warning("[UPLOAD] Direct upload %s failed: %s", job.id, e.detail)
+            return FAILED
+        except StorageError:
+            await db.rollback()
+            raise
+
+        db.add(ModelMetadata(**values))
+        job.status, job.completed_at = DONE, datetime.utcnow()
+        await db.commit()
+        if key != job.storage_key:
+            await storage.delete(job.storage_key)  # the model now refers to the blob
+        logger.info("[UPLOAD] Model %s created from direct upload", job.id)
+        return DONE
@@ -0,0 +1,41 @@
+"""
+Model download accounting.
+
+Counts live in Redis (one key per model) so every worker and the proxy
+offload path share them; a Prometheus counter tracks totals by serving mode.
+"""
+
+import logging
+
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+
+from app.services.cache.redis_service import redis
+
+logger = logging.getLogger("makerworks.downloads")
+
+model_downloads_total = Counter(
+    "makerworks_model_downloads_total",
+    "Authorized model downloads",
+    ["mode"],
+)
+
+
+def _key(model_id) -> str:
+    return f"makerworks:downloads:model:{model_id}"
+
+
+async def record_download(model_id, mode: str = "direct") -> int | None:
+    """Count one download; returns the new total, or None if Redis is down."""
+    model_downloads_total.labels(mode=mode).inc()
+    try:
+        return await redis.incr(_key(model_id))
+    except (RedisError, OSError) as e:
+        # Never fail a download over its bookkeeping.
+        logger.warning("Download count for %s not recorded: %s", model_id, e)
+        return None
+
+
+async def get_download_count(model_id) -> int:
+    value = await redis.get(_key(model_id))
+    return int(value) if value else 0
@@ -0,0 +1,169 @@
+"""
+Coarser versions of dense models for the viewer's first paint.
+
+Scans and sculpts run to millions of triangles, more than a browser wants
+to download before showing anything. After ingest, a ``cpu`` worker
+simplifies such models (``app.utils.decimate``) to about
+``LEVEL_TRIANGLES[level]`` triangles per level and stores each level as a
+compact mesh next to the content's other derived files:
+``blobs/derived/<ab>/<cd>/<sha256>.lod<level>.mwm``. Level 0 is the full
+compact mesh. A level is only made from at least ``MIN_REDUCTION`` times
+its triangles, so small models have none.
+
+Binary STL, the format of nearly every dense upload, is read straight
+from disk in chunks, so a job's memory is bounded by one chunk plus the
+levels it makes rather than by the model.
+"""
+
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+from prometheus_client import Counter
+
+from app.services import tiering
+from app.services.blobs import blob_key, derived_key
+from app.services.storage import StorageBackend, get_storage
+from app.utils import compact_mesh
+
+logger = logging.getLogger(__name__)
+
+# Level -> triangles it aims for; higher levels are coarser
+LEVEL_TRIANGLES = {1: 200_000, 2: 25_000}
+MIN_REDUCTION = 2
+
+_STL_HEADER = 84
+_STL_RECORD = 50
+
+lod_levels_total = Counter(
+    "makerworks_model_lod_levels_total",
+    "Levels of detail generated for dense models",
+)
+
+
+def lod_key(sha256: str, level: int) -> str:
+    return derived_key(sha256, f"lod{level}.{compact_mesh.FORMAT}")
+
+
+def levels_for(faces: int | None) -> list[int]:
+    """Levels worth making for a model of FACES triangles, finest first."""
+    return [
+        level
+        for level, target in sorted(LEVEL_TRIANGLES.items())
+        if (faces or 0) >= MIN_REDUCTION * target
+    ]
+
+
+async def available(storage: StorageBackend, sha256: str) -> list[int]:
+    """Levels stored for the content SHA256, coarsest first."""
+    return [
+        level
+        for level in sorted(LEVEL_TRIANGLES, reverse=True)
+        if await storage.exists(lod_key(sha256, level))
+    ]
+
+
+def _binary_stl_count(path: Path) -> int | None:
+    """Triangle count of a binary STL at PATH, None if it isn't one."""
+    size = os.path.getsize(path)
+    if size < _STL_HEADER:
+        return None
+    with open(path, "rb") as f:
+        f.seek(80)
+        count = int.from_bytes(f.read(4), "little")
+    return count if size == _STL_HEADER + _STL_RECORD * count else None
+
+
+def _triangle_chunks(path: Path, file_type: str):
+    """A function yielding the model's triangles in chunks, for ``decimate.simplify``."""
+    import numpy as np
+
+    from app.utils.decimate import CHUNK_TRIANGLES
+
+    count = _binary_stl_count(path) if file_type == "stl" else None
+    if count is not None:
+        record = np.dtype(
+            [("normal", "<f4", 3), ("corners", "<f4", (3, 3)), ("attributes", "<u2")]
+        )
+
+        def chunks():
+            with open(path, "rb") as f:
+                f.seek(_STL_HEADER)
+                for _ in range(0, count, CHUNK_TRIANGLES):
+                    yield np.fromfile(f, dtype=record, count=CHUNK_TRIANGLES)["corners"]
+
+        return chunks
+
+    # ASCII STL, OBJ, 3MF: parsed whole, then cut up the same way
+    if file_type == "3mf":
+        from app.utils.threemf import read_3mf
+
+        vertices, faces = read_3mf(path)
+    else:
+        import trimesh
+
+        mesh = trimesh.load(str(path), file_type=file_type, force="mesh")
+        vertices, faces = mesh.vertices, mesh.faces
+
+    def chunks():
+        for start in range(0, len(faces), CHUNK_TRIANGLES):
+            yield vertices[faces[start : start + CHUNK_TRIANGLES]]
+
+    return chunks
+
+
+def build_levels(path: Path, file_type: str) -> dict[int, bytes]:
+    """
+    Compact meshes of each level worth making for the model at PATH.
+    CPU-bound: run it in a worker thread.
+    """
+    from app.utils import decimate
+
+    chunks = _triangle_chunks(path, file_type)
+    bounds = decimate.measure(chunks())
+    levels = levels_for(bounds[3])
+    if not levels:
+        return {}
+    meshes = decimate.simplify(chunks, [LEVEL_TRIANGLES[level] for level in levels], bounds)
+    return {
+        level: compact_mesh.encode(vertices, faces)
+        for level, (vertices, faces) in zip(levels, meshes)
+        if len(faces)
+    }
+
+
+async def generate(sha256: str, file_type: str, storage: StorageBackend | None = None) -> list[int]:
+    """
+    Worker side: store the levels of detail of the content SHA256 (a
+    FILE_TYPE model) that aren't stored yet. Returns the levels made.
+    """
+    storage = storage or get_storage()
+    wanted = [
+        level for level in LEVEL_TRIANGLES if not await storage.exists(lod_key(sha256, level))
+    ]
+    if not wanted:
+        return []
+    async with tiering.open_local(storage, blob_key(sha256)) as path:
+        built = await asyncio.to_thread(build_levels, path, file_type)
+    for level, data in built.items():
+        if level in wanted:
+            await storage.put(lod_key(sha256, level), data, content_type=compact_mesh.MEDIA_TYPE)
+            lod_levels_total.inc()
+    logger.info(
+        "🪶 Levels of detail for %s: %s",
+        sha256[:12],
+        ", ".join(f"{level} ({len(data)} bytes)" for level, data in sorted(built.items())) or "none",
+    )
+    return sorted(built)
+
+
+async def enqueue(sha256: str, file_type: str) -> None:
+    """Queue level generation; the full mesh is served meanwhile, or if this fails."""
+    from app.tasks.models import generate_lods  # imports the Celery app
+
+    try:
+        # .delay() talks to the broker synchronously
+        await asyncio.to_thread(generate_lods.delay, sha256, file_type)
+    except Exception as e:
+        logger.warning("Levels of detail for %s not queued: %s", sha256[:12], e)
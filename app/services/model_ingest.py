@@ -0,0 +1,223 @@
+"""
+Turn a stored model file into a ``ModelMetadata`` row: mesh metadata,
+thumbnail and URLs, or those of an earlier model with the same content.
+Shared by the streaming upload route (in the API process) and the
+direct-upload task (in a ``cpu`` worker).
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import blobs, lods
+from app.services.blobs import BLOB_PREFIX, StoredBlob, derived_key
+from app.services.storage import StorageBackend
+from app.services.storage.layout import (
+    COMPRESSED_SUFFIXES,
+    GLB,
+    THUMBNAIL,
+    TURNTABLE,
+    artifact_key,
+)
+from app.utils import compact_mesh
+from app.utils.static_files import object_url
+
+logger = logging.getLogger(__name__)
+
+
+def process_model_file(model_path: Path, file_type: str | None = None) -> dict:
+    """
+    Metadata, a PNG thumbnail and the viewer's compact mesh (bytes, or None
+    if they could not be made) for the model at MODEL_PATH. FILE_TYPE
+    (``"stl"``) is needed when the path has no extension, as blobs don't.
+    CPU-bound: run it in a worker thread.
+    """
+    import trimesh  # heavy (numpy, pyglet); only needed once a model arrives
+
+    objects = None
+    try:
+        if file_type == "3mf":
+            # Streamed rather than through trimesh, which builds a DOM (and needs networkx)
+            from app.utils.threemf import read_plate
+
+            plate = read_plate(model_path)
+            mesh = trimesh.Trimesh(plate.vertices, plate.faces, process=False)
+            objects = plate.objects
+        else:
+            mesh = trimesh.load(str(model_path), file_type=file_type, force="mesh")
+    except Exception as e:
+        logger.exception(f"[UPLOAD] Failed to load model: {e}")
+        raise HTTPException(400, "Invalid 3D model") from e
+
+    metadata = {
+        "volume": float(mesh.volume) if mesh.is_volume else None,
+        "bbox": mesh.bounding_box.extents.tolist(),
+        "faces": int(len(mesh.faces)),
+        "vertices": int(len(mesh.vertices)),
+        "objects": objects,
+    }
+
+    png = None
+    try:
+        scene = mesh.scene()
+        png = scene.save_image(resolution=(512, 512), visible=False) or None
+    except Exception as e:
+        logger.exception(f"[UPLOAD] Thumbnail generation failed: {e}")
+
+    compact = None
+    try:
+        compact = compact_mesh.encode(mesh.vertices, mesh.faces)
+    except Exception as e:
+        logger.warning(f"[UPLOAD] Compact mesh not generated: {e}")
+
+    return {"metadata": metadata, "thumbnail": png, "mesh": compact}
+
+
+async def ingest_model(
+    storage: StorageBackend,
+    key: str,
+    *,
+    model_id,
+    user_id,
+    filename: str,
+    name: str | None,
+    description: str | None,
+    base_url: str,
+    uploaded_at: datetime | None = None,
+    content_hash: str | None = None,
+) -> dict:
+    """
+    Extract metadata from the object at KEY, store its thumbnail (and, given
+    its CONTENT_HASH, the viewer's compact mesh, queueing coarser levels of
+    detail for dense models) and return the ``ModelMetadata`` column
+    values. An unreadable mesh is deleted from storage and reported as
+    HTTPException(400).
+    """
+    file_type = Path(filename).suffix.lstrip(".").lower() or None
+    try:
+        async with storage.open_local(key) as local_file:
+            result = await asyncio.to_thread(process_model_file, local_file, file_type)
+    except HTTPException:
+        if not key.startswith(BLOB_PREFIX):  # shared blobs are left to the collector
+            await storage.delete(key)
+        raise
+
+    metadata = result.get("metadata", {})
+    thumbnail_key = None
+    if result.get("thumbnail"):
+        thumbnail_key = artifact_key(model_id, THUMBNAIL)
+        await storage.put(thumbnail_key, result["thumbnail"], content_type="image/png")
+    if content_hash and result.get("mesh"):
+        # Shared by every model with this content, like conversions
+        await storage.put(
+            derived_key(content_hash, compact_mesh.FORMAT),
+            result["mesh"],
+            content_type=compact_mesh.MEDIA_TYPE,
+        )
+    if content_hash and lods.levels_for(metadata.get("faces")):
+        await lods.enqueue(content_hash, file_type)
+
+    # Content-addressed (?v=<hash>) on local storage so /uploads can mark them immutable
+    file_url = await object_url(storage, key, base_url)
+    thumbnail_url = await object_url(storage, thumbnail_key, base_url) if thumbnail_key else None
+
+    return {
+        "id": model_id,
+        "name": name or filename,
+        "description": description,
+        "filename": filename,
+        "filepath": key,
+        "file_url": file_url,
+        "user_id": user_id,
+        "uploaded_at": uploaded_at or datetime.utcnow(),
+        "geometry_hash": None,
+        "is_duplicate": False,
+        "volume": metadata.get("volume"),
+        "bbox": json.dumps(metadata.get("bbox", [])),
+        "faces": metadata.get("faces", 0),
+        "vertices": metadata.get("vertices", 0),
+        "objects": metadata.get("objects"),
+        "thumbnail_url": thumbnail_url,
+    }
+
+
+async def reuse_model(
+    storage: StorageBackend,
+    source,
+    key: str,
+    *,
+    model_id,
+    user_id,
+    filename: str,
+    name: str | None,
+    description: str | None,
+    base_url: str,
+    uploaded_at: datetime | None = None,
+) -> dict:
+    """
+    Column values for a new model whose file (at KEY) has the same content
+    as SOURCE's: mesh metadata is copied and derived files are linked into
+    the new model's directory, nothing is recomputed.
+    """
+    urls = {}
+    for artifact, column in ((THUMBNAIL, "thumbnail_url"), (TURNTABLE, "webm_url"), (GLB, None)):
+        shared = artifact_key(source.id, artifact)
+        if await storage.exists(shared):
+            target = artifact_key(model_id, artifact)
+            await storage.copy(shared, target)
+            urls[column or "glb_path"] = target
+    if storage.cheap_copy and key != source.filepath:
+        # precompressed .br/.gz siblings of the model file
+        for suffix in COMPRESSED_SUFFIXES:
+            if await storage.exists(source.filepath + suffix):
+                await storage.copy(source.filepath + suffix, key + suffix)
+
+    return {
+        "id": model_id,
+        "name": name or filename,
+        "description": description,
+        "filename": filename,
+        "filepath": key,
+        "file_url": await object_url(storage, key, base_url),
+        "user_id": user_id,
+        "uploaded_at": uploaded_at or datetime.utcnow(),
+        "geometry_hash": source.geometry_hash,
+        "is_duplicate": True,
+        "volume": source.volume,
+        "bbox": source.bbox,
+        "faces": source.faces,
+        "vertices": source.vertices,
+        "objects": source.objects,
+        "thumbnail_url": (
+            await object_url(storage, urls["thumbnail_url"], base_url)
+            if "thumbnail_url" in urls
+            else None
+        ),
+        "webm_url": (
+            await object_url(storage, urls["webm_url"], base_url) if "webm_url" in urls else None
+        ),
+        "glb_path": urls.get("glb_path"),
+    }
+
+
+async def ingest_blob(
+    db: AsyncSession, storage: StorageBackend, blob: StoredBlob, key: str, **fields
+) -> dict:
+    """
+    ``ModelMetadata`` values for a model whose file is BLOB, stored at KEY
+    (see ``blobs.attach``), counting the new reference to BLOB. Content seen
+    before is not processed again. FIELDS are ``ingest_model``'s keywords.
+    """
+    source = None if blob.created else await blobs.model_with_content(db, blob.sha256)
+    if source is not None:
+        values = await reuse_model(storage, source, key, **fields)
+    else:
+        values = await ingest_model(storage, key, content_hash=blob.sha256, **fields)
+    values["content_hash"] = blob.sha256
+    await blobs.acquire(db, blob)
+    return values
@@ -0,0 +1,74 @@
+"""
+Pluggable storage for uploads (models, thumbnails, avatars).
+
+``get_storage()`` returns the backend chosen by ``STORAGE_BACKEND``:
+
+- ``local`` (default): files under ``UPLOADS_PATH``, served at ``/uploads``;
+- ``s3``: any S3-compatible service (AWS, MinIO, R2), so API nodes need no
+  shared volume and can scale horizontally;
+- ``memory``: in-process, for tests.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+from app.services.storage.base import (
+    ObjectInfo,
+    ObjectNotFound,
+    InvalidKey,
+    StorageBackend,
+    StorageError,
+    iter_upload,
+    validate_key,
+)
+from app.services.storage.local import LocalStorage
+from app.services.storage.memory import MemoryStorage
+from app.services.storage.s3 import MIN_PART_SIZE, S3Storage
+
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+
+@lru_cache()
+def get_storage() -> StorageBackend:
+    from app.config.settings import settings
+
+    backend = (settings.storage_backend or "local").lower()
+    base_url = settings.base_url.rstrip("/")
+    if backend == "local":
+        return LocalStorage(PROJECT_ROOT / settings.uploads_path, base_url=base_url)
+    if backend == "memory":
+        return MemoryStorage(base_url=f"{base_url}/uploads")
+    if backend == "s3":
+        missing = [
+            name
+            for name in ("s3_endpoint_url", "s3_bucket", "s3_access_key_id", "s3_secret_access_key")
+            if not getattr(settings, name)
+        ]
+        if missing:
+            raise StorageError(f"STORAGE_BACKEND=s3 needs {', '.join(m.upper() for m in missing)}")
+        return S3Storage(
+            endpoint_url=settings.s3_endpoint_url,
+            bucket=settings.s3_bucket,
+            access_key=settings.s3_access_key_id,
+            secret_key=settings.s3_secret_access_key,
+            region=settings.s3_region,
+            prefix=settings.s3_prefix,
+            public_url=settings.s3_public_url,
+            part_size=max(MIN_PART_SIZE, settings.s3_part_size_mb * 1024 * 1024),
+        )
+    raise StorageError(f"Unknown STORAGE_BACKEND: {backend!r}")
+
+
+__all__ = [
+    "InvalidKey",
+    "LocalStorage",
+    "MemoryStorage",
+    "ObjectInfo",
+    "ObjectNotFound",
+    "S3Storage",
+    "StorageBackend",
+    "StorageError",
+    "get_storage",
+    "iter_upload",
+    "validate_key",
+]
@@ -0,0 +1,175 @@
+"""
+Backend interface shared by the storage drivers.
+
+Keys are relative, ``/``-separated paths such as
+``models/3f/a2/<model_id>/model.stl`` (see ``layout``): the same strings the
+database stores in ``filepath``. ``/uploads`` serves them under the public
+paths ``layout.public_path`` gives.
+"""
+
+import os
+import posixpath
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator
+
+import anyio
+
+CHUNK_SIZE = 256 * 1024
+
+Data = bytes | AsyncIterable[bytes]
+
+
+class StorageError(Exception):
+    """A storage backend could not complete an operation."""
+
+
+class ObjectNotFound(StorageError, FileNotFoundError):
+    def __init__(self, key: str) -> None:
+        super().__init__(f"No such object: {key}")
+        self.key = key
+
+
+class InvalidKey(StorageError, ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    key: str
+    size: int
+    etag: str
+    last_modified: float  # epoch seconds
+    content_type: str | None = None
+
+
+def validate_key(key: str) -> str:
+    """Reject keys that could escape the storage root or are not canonical."""
+    if (
+        not key
+        or key.startswith("/")
+        or "\\" in key
+        or "\x00" in key
+        or posixpath.normpath(key) != key
+        or any(part in ("", ".", "..") for part in key.split("/"))
+    ):
+        raise InvalidKey(f"Invalid storage key: {key!r}")
+    return key
+
+
+async def iter_chunks(data: Data) -> AsyncIterator[bytes]:
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        if data:
+            yield bytes(data)
+        return
+    async for chunk in data:
+        if chunk:
+            yield chunk
+
+
+async def iter_upload(file, chunk_size: int = 1024 * 1024) -> AsyncIterator[bytes]:
+    """Read a FastAPI ``UploadFile`` chunk by chunk (off the event loop)."""
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+class StorageBackend(ABC):
+    """
+    Async object storage. Writes are atomic: readers see either the previous
+    object or the complete new one, and a failed or cancelled ``put`` leaves
+    nothing behind.
+    """
+
+    name: str
+    # copy() shares the data (hard link, same buffer) instead of duplicating it
+    cheap_copy: bool = False
+
+    @abstractmethod
+    async def put(self, key: str, data: Data, content_type: str | None = None) -> ObjectInfo:
+        """Store DATA (bytes or an async iterable of chunks) under KEY."""
+
+    @abstractmethod
+    def stream(
+        self, key: str, start: int = 0, length: int | None = None, chunk_size: int = CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Yield the object's bytes (or LENGTH bytes from START); raises ObjectNotFound."""
+
+    @abstractmethod
+    async def stat(self, key: str) -> ObjectInfo | None:
+        """Object metadata, or None if KEY does not exist."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove KEY; deleting a missing key is not an error."""
+
+    @abstractmethod
+    def list(self, prefix: str = "") -> AsyncIterator[ObjectInfo]:
+        """Objects whose key starts with PREFIX, in no particular order."""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """URL clients can fetch the object from."""
+
+    async def get(self, key: str) -> bytes:
+        return b"".join([chunk async for chunk in self.stream(key)])
+
+    async def exists(self, key: str) -> bool:
+        return await self.stat(key) is not None
+
+    async def copy(self, source: str, target: str) -> ObjectInfo:
+        """Copy SOURCE to TARGET (replacing it). Backends override this to avoid the round trip."""
+        info = await self.stat(source)
+        if info is None:
+            raise ObjectNotFound(source)
+        return await self.put(target, self.stream(source), info.content_type)
+
+    def presigned_put(
+        self, key: str, content_type: str, size: int, expires: int
+    ) -> tuple[str, dict[str, str]]:
+        """
+        URL (and headers) a client can PUT exactly SIZE bytes of KEY to
+        without going through the API. Only object stores support this.
+        """
+        raise NotImplementedError(f"{self.name} storage does not accept direct uploads")
+
+    def local_path(self, key: str) -> Path | None:
+        """Filesystem path of KEY when the backend is a local directory."""
+        return None
+
+    async def put_file(self, key: str, path: str | Path, content_type: str | None = None) -> ObjectInfo:
+        return await self.put(key, _read_file(Path(path)), content_type)
+
+    @asynccontextmanager
+    async def open_local(self, key: str) -> AsyncIterator[Path]:
+        """
+        A filesystem path with KEY's content for code that needs one (trimesh,
+        Pillow, subprocesses). Remote objects are downloaded to a temporary
+        file that is removed on exit.
+        """
+        path = self.local_path(key)
+        if path is not None:
+            if not await anyio.to_thread.run_sync(path.is_file):
+                raise ObjectNotFound(key)
+            yield path
+            return
+
+        fd, tmp = tempfile.mkstemp(suffix=posixpath.splitext(key)[1])
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in self.stream(key):
+                    await anyio.to_thread.run_sync(f.write, chunk)
+            yield Path(tmp)
+        finally:
+            os.unlink(tmp)
+
+
+async def _read_file(path: Path) -> AsyncIterator[bytes]:
+    f = await anyio.to_thread.run_sync(path.open, "rb")
+    try:
+        while chunk := await anyio.to_thread.run_sync(f.read, 1024 * 1024):
+            yield chunk
+    finally:
+        f.close()
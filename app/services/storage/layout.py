@@ -0,0 +1,118 @@
+"""
+Where model files live in storage.
+
+Models used to sit in one flat directory per user
+(``users/<user_id>/models/<model_id>.stl`` with ``<model_id>_thumbnail.png``,
+``.png`` and ``.webm`` siblings), which grows to tens of thousands of entries
+for active uploaders. Each model now has its own directory, fanned out over
+two levels of 256 shards taken from a hash of its id:
+
+    models/3f/a2/<model_id>/model.stl
+                           /model.stl.br, model.stl.gz   (precompressed)
+                           /thumbnail.png
+                           /turntable.webm
+                           /model.glb
+
+The shard never leaves the server: URLs name the model and the artifact
+(``/uploads/m/<model_id>/thumbnail.png``) and the uploads server resolves
+them, so the fan-out can change without breaking a link. Legacy paths keep
+resolving to the migrated files (``mw storage reshard`` moves them).
+"""
+
+import hashlib
+import posixpath
+from uuid import UUID
+
+MODELS_PREFIX = "models/"
+PUBLIC_PREFIX = "m/"
+LEGACY_PREFIX = "users/"
+
+MODEL_STEM = "model"
+THUMBNAIL = "thumbnail.png"
+TURNTABLE = "turntable.webm"
+GLB = "model.glb"
+
+COMPRESSED_SUFFIXES = (".br", ".gz")
+
+
+def shard(model_id) -> str:
+    digest = hashlib.sha256(str(model_id).encode()).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}"
+
+
+def model_dir(model_id) -> str:
+    """Storage prefix holding every artifact of MODEL_ID."""
+    return f"{MODELS_PREFIX}{shard(model_id)}/{model_id}"
+
+
+def artifact_key(model_id, name: str) -> str:
+    return f"{model_dir(model_id)}/{name}"
+
+
+def model_key(model_id, ext: str) -> str:
+    """Storage key of a model's original file."""
+    return artifact_key(model_id, f"{MODEL_STEM}{ext.lower()}")
+
+
+def parse_key(key: str) -> tuple[str, str] | None:
+    """``(model_id, artifact)`` for a sharded KEY, None for anything else."""
+    parts = key.split("/")
+    if len(parts) != 5 or f"{parts[0]}/" != MODELS_PREFIX:
+        return None
+    return parts[3], parts[4]
+
+
+def public_path(key: str) -> str:
+    """Path below /uploads that clients see for KEY (without the shard)."""
+    parsed = parse_key(key)
+    return f"{PUBLIC_PREFIX}{parsed[0]}/{parsed[1]}" if parsed else key
+
+
+def _legacy_parts(key: str) -> tuple[UUID, str] | None:
+    """``(model_id, artifact)`` for a legacy ``users/<user_id>/models/...`` KEY."""
+    parts = key.split("/")
+    if len(parts) != 4 or f"{parts[0]}/" != LEGACY_PREFIX or parts[2] != "models":
+        return None
+
+    name, compressed = parts[3], ""
+    if name.endswith(COMPRESSED_SUFFIXES):
+        name, compressed = name[:-3], name[-3:]
+    stem, ext = posixpath.splitext(name)
+    ext = ext.lower()
+    if stem.endswith("_thumbnail") and ext == ".png":
+        stem, artifact = stem[: -len("_thumbnail")], THUMBNAIL
+    elif ext == ".png":
+        artifact = THUMBNAIL
+    elif ext == ".webm":
+        artifact = TURNTABLE
+    elif ext == ".glb":
+        artifact = GLB
+    else:
+        artifact = f"{MODEL_STEM}{ext}"
+    try:
+        return UUID(stem), artifact + compressed
+    except ValueError:
+        return None  # files dropped in by hand were never registered as models
+
+
+def legacy_model_id(key: str) -> UUID | None:
+    """Id of the model a legacy ``users/<user_id>/models/...`` KEY belongs to."""
+    parsed = _legacy_parts(key)
+    return parsed[0] if parsed else None
+
+
+def legacy_target(key: str) -> str | None:
+    """Sharded key a legacy ``users/<user_id>/models/...`` KEY migrates to."""
+    parsed = _legacy_parts(key)
+    return artifact_key(*parsed) if parsed else None
+
+
+def candidate_keys(path: str) -> list[str]:
+    """Storage keys that may hold ``/uploads/<PATH>``, in lookup order."""
+    if path.startswith(PUBLIC_PREFIX):
+        parts = path.split("/")
+        if len(parts) != 3 or not parts[1] or not parts[2]:
+            return []
+        return [artifact_key(parts[1], parts[2])]
+    migrated = legacy_target(path)
+    return [path, migrated] if migrated else [path]
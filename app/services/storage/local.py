@@ -0,0 +1,159 @@
+import hashlib
+import mimetypes
+import os
+import shutil
+import stat
+import uuid
+from pathlib import Path
+from typing import AsyncIterator
+
+import anyio
+
+from app.services.storage.base import (
+    CHUNK_SIZE,
+    Data,
+    ObjectInfo,
+    ObjectNotFound,
+    StorageBackend,
+    iter_chunks,
+    validate_key,
+)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Objects as files below ROOT. All file I/O runs in worker threads; writes
+    go to a hidden temporary file that is renamed into place when complete.
+    """
+
+    name = "local"
+    cheap_copy = True
+
+    def __init__(self, root: str | Path, base_url: str = "") -> None:
+        self.root = Path(os.path.realpath(root))
+        self.base_url = base_url.rstrip("/")
+
+    def local_path(self, key: str) -> Path:
+        return self.root / validate_key(key)
+
+    async def put(self, key: str, data: Data, content_type: str | None = None) -> ObjectInfo:
+        path = self.local_path(key)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        await anyio.to_thread.run_sync(lambda: path.parent.mkdir(parents=True, exist_ok=True))
+        f = await anyio.to_thread.run_sync(tmp.open, "wb")
+        try:
+            try:
+                async for chunk in iter_chunks(data):
+                    await anyio.to_thread.run_sync(f.write, chunk)
+            finally:
+                await anyio.to_thread.run_sync(f.close)
+            await anyio.to_thread.run_sync(os.replace, tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return await self.stat(key)
+
+    async def stream(
+        self, key: str, start: int = 0, length: int | None = None, chunk_size: int = CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        path = self.local_path(key)
+        try:
+            fd = await anyio.to_thread.run_sync(os.open, path, os.O_RDONLY)
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            raise ObjectNotFound(key) from None
+        try:
+            if length is None:
+                length = max(0, os.fstat(fd).st_size - start)
+            offset, remaining = start, length
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(
+                    os.pread, fd, min(chunk_size, remaining), offset
+                )
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            os.close(fd)
+
+    async def stat(self, key: str) -> ObjectInfo | None:
+        path = self.local_path(key)
+        try:
+            st = await anyio.to_thread.run_sync(os.stat, path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return self._info(key, st)
+
+    async def copy(self, source: str, target: str) -> ObjectInfo:
+        """Hard-link TARGET to SOURCE: no data is copied (a real copy across filesystems)."""
+        src, dst = self.local_path(source), self.local_path(target)
+        if not await anyio.to_thread.run_sync(src.is_file):
+            raise ObjectNotFound(source)
+        await anyio.to_thread.run_sync(_link, src, dst)
+        return await self.stat(target)
+
+    async def delete(self, key: str) -> None:
+        await anyio.to_thread.run_sync(lambda: self.local_path(key).unlink(missing_ok=True))
+
+    async def list(self, prefix: str = "") -> AsyncIterator[ObjectInfo]:
+        base = self.root / prefix.rsplit("/", 1)[0] if "/" in prefix else self.root
+        entries = await anyio.to_thread.run_sync(_walk, self.root, base, prefix)
+        for key, st in entries:
+            yield self._info(key, st)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/uploads/{validate_key(key)}"
+
+    @staticmethod
+    def _info(key: str, st: os.stat_result) -> ObjectInfo:
+        # Cheap validator, not a content hash: changes whenever the file does.
+        etag = hashlib.md5(f"{st.st_ino}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()
+        return ObjectInfo(
+            key=key,
+            size=st.st_size,
+            etag=etag,
+            last_modified=st.st_mtime,
+            content_type=mimetypes.guess_type(key)[0],
+        )
+
+
+def _link(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        os.link(src, tmp)
+    except OSError:  # EXDEV, or a filesystem without hard links
+        shutil.copy2(src, tmp)
+    try:
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _walk(root: Path, base: Path, prefix: str) -> list[tuple[str, os.stat_result]]:
+    found = []
+    for dirpath, dirnames, filenames in os.walk(base):
+        rel_dir = os.path.relpath(dirpath, root).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else f"{rel_dir}/"
+        # Only descend into directories that can hold keys starting with PREFIX
+        dirnames[:] = [
+            d
+            for d in dirnames
+            if not d.startswith(".")
+            and (f"{rel_dir}{d}/".startswith(prefix) or prefix.startswith(f"{rel_dir}{d}/"))
+        ]
+        for filename in filenames:
+            if filename.startswith("."):  # in-flight writes, dotfiles
+                continue
+            full = os.path.join(dirpath, filename)
+            key = os.path.relpath(full, root).replace(os.sep, "/")
+            if key.startswith(prefix):
+                try:
+                    found.append((key, os.stat(full)))
+                except FileNotFoundError:
+                    continue
+    return found
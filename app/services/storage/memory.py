@@ -0,0 +1,74 @@
+import hashlib
+import mimetypes
+import time
+from dataclasses import replace
+from typing import AsyncIterator
+
+from app.services.storage.base import (
+    CHUNK_SIZE,
+    Data,
+    ObjectInfo,
+    ObjectNotFound,
+    StorageBackend,
+    iter_chunks,
+    validate_key,
+)
+
+
+class MemoryStorage(StorageBackend):
+    """Process-local backend for tests and throwaway development instances."""
+
+    name = "memory"
+    cheap_copy = True
+
+    def __init__(self, base_url: str = "memory://") -> None:
+        self.base_url = base_url.rstrip("/")
+        self.objects: dict[str, tuple[bytes, ObjectInfo]] = {}
+
+    async def put(self, key: str, data: Data, content_type: str | None = None) -> ObjectInfo:
+        validate_key(key)
+        body = b"".join([chunk async for chunk in iter_chunks(data)])
+        info = ObjectInfo(
+            key=key,
+            size=len(body),
+            etag=hashlib.md5(body).hexdigest(),
+            last_modified=time.time(),
+            content_type=content_type or mimetypes.guess_type(key)[0],
+        )
+        self.objects[key] = (body, info)
+        return info
+
+    async def stream(
+        self, key: str, start: int = 0, length: int | None = None, chunk_size: int = CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        try:
+            body = self.objects[validate_key(key)][0]
+        except KeyError:
+            raise ObjectNotFound(key) from None
+        end = len(body) if length is None else min(len(body), start + length)
+        for offset in range(start, end, chunk_size):
+            yield body[offset : min(offset + chunk_size, end)]
+
+    async def stat(self, key: str) -> ObjectInfo | None:
+        entry = self.objects.get(validate_key(key))
+        return entry[1] if entry else None
+
+    async def copy(self, source: str, target: str) -> ObjectInfo:
+        try:
+            body, info = self.objects[validate_key(source)]
+        except KeyError:
+            raise ObjectNotFound(source) from None
+        info = replace(info, key=validate_key(target), last_modified=time.time())
+        self.objects[target] = (body, info)
+        return info
+
+    async def delete(self, key: str) -> None:
+        self.objects.pop(validate_key(key), None)
+
+    async def list(self, prefix: str = "") -> AsyncIterator[ObjectInfo]:
+        for key, (_, info) in list(self.objects.items()):
+            if key.startswith(prefix):
+                yield info
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{validate_key(key)}"
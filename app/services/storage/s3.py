@@ -0,0 +1,339 @@
+import hashlib
+import logging
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator
+from urllib.parse import quote
+from xml.etree import ElementTree
+
+import httpx
+
+from app.services.storage.base import (
+    CHUNK_SIZE,
+    Data,
+    ObjectInfo,
+    ObjectNotFound,
+    StorageBackend,
+    StorageError,
+    iter_chunks,
+    validate_key,
+)
+from app.services.storage.sigv4 import EMPTY_SHA256, presign_url, sign_headers
+
+logger = logging.getLogger(__name__)
+
+S3_NS = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+# S3's minimum for every part but the last.
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+# (part number, ETag) of each uploaded part
+Parts = list[tuple[int, str]]
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-compatible object storage (AWS S3, MinIO, Cloudflare R2, ...) over
+    httpx with path-style addressing: ``<endpoint>/<bucket>/<prefix><key>``.
+
+    Uploads larger than PART_SIZE go through the multipart API one part at a
+    time, so memory stays at one part whatever the object size; a failed
+    upload is aborted so no orphaned parts accrue storage charges. Reads
+    stream the response body and support byte ranges.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        prefix: str = "",
+        public_url: str | None = None,
+        part_size: int = 8 * 1024 * 1024,
+        url_expiry: int = 3600,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.part_size = part_size
+        self.url_expiry = url_expiry
+        self._client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        )
+
+    # ────── Requests ──────
+
+    def _object_url(self, key: str) -> str:
+        return f"{self.endpoint_url}/{self.bucket}/{quote(self.prefix + validate_key(key))}"
+
+    def _bucket_url(self) -> str:
+        return f"{self.endpoint_url}/{self.bucket}"
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        query: dict | None = None,
+        headers: dict | None = None,
+        body: bytes = b"",
+    ) -> httpx.Request:
+        query = {k: str(v) for k, v in (query or {}).items()}
+        payload_hash = hashlib.sha256(body).hexdigest() if body else EMPTY_SHA256
+        signed = sign_headers(
+            method,
+            url,
+            query,
+            headers or {},
+            payload_hash,
+            self.access_key,
+            self.secret_key,
+            self.region,
+        )
+        return self._client.build_request(method, url, params=query, headers=signed, content=body)
+
+    async def _send(self, request: httpx.Request, ok=(200,), key: str | None = None) -> httpx.Response:
+        try:
+            response = await self._client.send(request)
+        except httpx.HTTPError as e:
+            raise StorageError(f"S3 {request.method} {request.url.path} failed: {e}") from e
+        if response.status_code == 404 and key is not None:
+            raise ObjectNotFound(key)
+        if response.status_code not in ok:
+            raise StorageError(_error_message(request, response))
+        return response
+
+    # ────── Backend API ──────
+
+    async def put(self, key: str, data: Data, content_type: str | None = None) -> ObjectInfo:
+        url = self._object_url(key)
+        headers = {"content-type": content_type} if content_type else {}
+        buffer = bytearray()
+        upload_id = None
+        parts: Parts = []
+        try:
+            async for chunk in iter_chunks(data):
+                buffer += chunk
+                while len(buffer) >= self.part_size:
+                    if upload_id is None:
+                        upload_id = await self._create_multipart(url, headers)
+                    part = bytes(buffer[: self.part_size])
+                    parts.append(await self._upload_part(url, upload_id, len(parts) + 1, part))
+                    del buffer[: self.part_size]
+
+            if upload_id is None:
+                await self._send(self._request("PUT", url, headers=headers, body=bytes(buffer)))
+            else:
+                if buffer or not parts:
+                    parts.append(await self._upload_part(url, upload_id, len(parts) + 1, bytes(buffer)))
+                await self._complete_multipart(url, upload_id, parts)
+        except BaseException:
+            if upload_id is not None:
+                await self._abort_multipart(url, upload_id)
+            raise
+
+        info = await self.stat(key)
+        if info is None:
+            raise StorageError(f"S3 object {key} missing right after upload")
+        return info
+
+    async def stream(
+        self, key: str, start: int = 0, length: int | None = None, chunk_size: int = CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        if length == 0:
+            return
+        headers = {}
+        if start or length is not None:
+            end = "" if length is None else str(start + length - 1)
+            headers["range"] = f"bytes={start}-{end}"
+        request = self._request("GET", self._object_url(key), headers=headers)
+        try:
+            response = await self._client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            raise StorageError(f"S3 GET {key} failed: {e}") from e
+        try:
+            if response.status_code == 404:
+                raise ObjectNotFound(key)
+            if response.status_code == 416:  # range starts past the end
+                return
+            if response.status_code not in (200, 206):
+                await response.aread()
+                raise StorageError(_error_message(request, response))
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def stat(self, key: str) -> ObjectInfo | None:
+        request = self._request("HEAD", self._object_url(key))
+        try:
+            response = await self._send(request, key=key)
+        except ObjectNotFound:
+            return None
+        return ObjectInfo(
+            key=key,
+            size=int(response.headers.get("content-length", 0)),
+            etag=response.headers.get("etag", "").strip('"'),
+            last_modified=_http_date(response.headers.get("last-modified")),
+            content_type=response.headers.get("content-type"),
+        )
+
+    async def copy(self, source: str, target: str) -> ObjectInfo:
+        """Server-side CopyObject (objects up to 5 GB, far above the upload limit)."""
+        headers = {"x-amz-copy-source": f"/{self.bucket}/{quote(self.prefix + validate_key(source))}"}
+        response = await self._send(
+            self._request("PUT", self._object_url(target), headers=headers), key=source
+        )
+        if b"<Error>" in response.content:
+            raise StorageError(f"S3 CopyObject failed: {response.text[:500]}")
+        info = await self.stat(target)
+        if info is None:
+            raise StorageError(f"S3 object {target} missing right after copy")
+        return info
+
+    async def delete(self, key: str) -> None:
+        await self._send(self._request("DELETE", self._object_url(key)), ok=(200, 204))
+
+    async def list(self, prefix: str = "") -> AsyncIterator[ObjectInfo]:
+        token = None
+        while True:
+            query = {"list-type": "2", "prefix": self.prefix + prefix}
+            if token:
+                query["continuation-token"] = token
+            response = await self._send(self._request("GET", self._bucket_url(), query=query))
+            root = ElementTree.fromstring(response.content)
+            for item in root.iter(f"{S3_NS}Contents"):
+                yield ObjectInfo(
+                    key=item.findtext(f"{S3_NS}Key")[len(self.prefix) :],
+                    size=int(item.findtext(f"{S3_NS}Size") or 0),
+                    etag=(item.findtext(f"{S3_NS}ETag") or "").strip('"'),
+                    last_modified=_iso_date(item.findtext(f"{S3_NS}LastModified")),
+                )
+            if root.findtext(f"{S3_NS}IsTruncated") != "true":
+                return
+            token = root.findtext(f"{S3_NS}NextContinuationToken")
+
+    def url(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{quote(self.prefix + validate_key(key))}"
+        return self.presigned_url(key, expires=self.url_expiry)
+
+    def presigned_url(
+        self,
+        key: str,
+        method: str = "GET",
+        expires: int = 3600,
+        download_name: str | None = None,
+    ) -> str:
+        """Signed URL for METHOD on KEY; DOWNLOAD_NAME sets the GET's Content-Disposition."""
+        query = {}
+        if download_name:
+            query["response-content-disposition"] = (
+                f"attachment; filename*=UTF-8''{quote(download_name, safe='')}"
+            )
+        return presign_url(
+            method,
+            self._object_url(key),
+            self.access_key,
+            self.secret_key,
+            self.region,
+            expires,
+            query=query,
+        )
+
+    def presigned_put(
+        self, key: str, content_type: str, size: int, expires: int
+    ) -> tuple[str, dict[str, str]]:
+        # Content-Length is signed too: S3 rejects a body of any other size,
+        # so the size checked when the URL was issued is the size stored.
+        url = presign_url(
+            "PUT",
+            self._object_url(key),
+            self.access_key,
+            self.secret_key,
+            self.region,
+            expires,
+            headers={"content-type": content_type, "content-length": str(size)},
+        )
+        return url, {"Content-Type": content_type}
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    # ────── Multipart ──────
+
+    async def _create_multipart(self, url: str, headers: dict) -> str:
+        response = await self._send(self._request("POST", url, query={"uploads": ""}, headers=headers))
+        upload_id = ElementTree.fromstring(response.content).findtext(f"{S3_NS}UploadId")
+        if not upload_id:
+            raise StorageError("S3 CreateMultipartUpload returned no UploadId")
+        return upload_id
+
+    async def _upload_part(self, url: str, upload_id: str, number: int, body: bytes) -> tuple[int, str]:
+        response = await self._send(
+            self._request("PUT", url, query={"partNumber": number, "uploadId": upload_id}, body=body)
+        )
+        return number, response.headers["etag"]
+
+    async def _complete_multipart(self, url: str, upload_id: str, parts: Parts) -> None:
+        body = (
+            "<CompleteMultipartUpload>"
+            + "".join(
+                f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>" for n, etag in parts
+            )
+            + "</CompleteMultipartUpload>"
+        ).encode()
+        response = await self._send(
+            self._request("POST", url, query={"uploadId": upload_id}, body=body)
+        )
+        # S3 may report a failed completion with a 200 and an <Error> body.
+        if b"<Error>" in response.content:
+            raise StorageError(f"S3 CompleteMultipartUpload failed: {response.text[:500]}")
+
+    async def _abort_multipart(self, url: str, upload_id: str) -> None:
+        try:
+            await self._send(
+                self._request("DELETE", url, query={"uploadId": upload_id}), ok=(200, 204, 404)
+            )
+        except StorageError as e:
+            # A bucket lifecycle rule should reap what we could not.
+            logger.warning("⚠️ Could not abort multipart upload %s: %s", upload_id, e)
+
+
+def _error_message(request: httpx.Request, response: httpx.Response) -> str:
+    code = message = ""
+    try:
+        root = ElementTree.fromstring(response.content)
+        code, message = root.findtext("Code") or "", root.findtext("Message") or ""
+    except ElementTree.ParseError:
+        pass
+    return (
+        f"S3 {request.method} {request.url.path} -> {response.status_code} "
+        f"{code} {message}".rstrip()
+    )
+
+
+def _http_date(value: str | None) -> float:
+    if not value:
+        return 0.0
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _iso_date(value: str | None) -> float:
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
@@ -0,0 +1,157 @@
+"""
+AWS Signature Version 4 for S3-compatible services (AWS, MinIO, R2, ...).
+
+Just enough of the spec for the S3 driver: header-signed requests and
+query-string presigned URLs. Keeping it here avoids pulling in botocore for
+a few dozen lines of HMAC.
+"""
+
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote, urlsplit
+
+ALGORITHM = "AWS4-HMAC-SHA256"
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _uri_encode(value: str, safe: str = "") -> str:
+    return quote(value, safe="-_.~" + safe)
+
+
+def _canonical_query(params: dict[str, str]) -> str:
+    return "&".join(
+        f"{_uri_encode(k)}={_uri_encode(v)}"
+        for k, v in sorted((str(k), str(v)) for k, v in params.items())
+    )
+
+
+def _scope(date: str, region: str, service: str) -> str:
+    return f"{date}/{region}/{service}/aws4_request"
+
+
+def _signature(
+    secret_key: str, date: str, region: str, service: str, string_to_sign: str
+) -> str:
+    key = _hmac(f"AWS4{secret_key}".encode("utf-8"), date)
+    key = _hmac(key, region)
+    key = _hmac(key, service)
+    key = _hmac(key, "aws4_request")
+    return hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def _sign(
+    method: str,
+    path: str,
+    query: dict[str, str],
+    headers: dict[str, str],
+    payload_hash: str,
+    secret_key: str,
+    region: str,
+    service: str,
+    amz_date: str,
+) -> tuple[str, str]:
+    """Return (signed_headers, signature)."""
+    canonical_headers = {k.lower(): " ".join(str(v).split()) for k, v in headers.items()}
+    signed_headers = ";".join(sorted(canonical_headers))
+    canonical_request = "\n".join(
+        [
+            method.upper(),
+            _uri_encode(unquote(path) or "/", safe="/"),
+            _canonical_query(query),
+            "".join(f"{k}:{canonical_headers[k]}\n" for k in sorted(canonical_headers)),
+            signed_headers,
+            payload_hash,
+        ]
+    )
+    date = amz_date[:8]
+    string_to_sign = "\n".join(
+        [
+            ALGORITHM,
+            amz_date,
+            _scope(date, region, service),
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ]
+    )
+    return signed_headers, _signature(secret_key, date, region, service, string_to_sign)
+
+
+def _amz_date(now: datetime | None) -> str:
+    return (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+
+
+def sign_headers(
+    method: str,
+    url: str,
+    query: dict[str, str],
+    headers: dict[str, str],
+    payload_hash: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    service: str = "s3",
+    now: datetime | None = None,
+) -> dict[str, str]:
+    """
+    Headers to send with the request: HEADERS plus ``host``,
+    ``x-amz-date``, ``x-amz-content-sha256`` and ``authorization``.
+    URL is the request URL, path already percent-encoded, without its query
+    string (passed as QUERY).
+    """
+    amz_date = _amz_date(now)
+    parts = urlsplit(url)
+    signed = {
+        **{k.lower(): v for k, v in headers.items()},
+        "host": parts.netloc,
+        "x-amz-date": amz_date,
+        "x-amz-content-sha256": payload_hash,
+    }
+    signed_headers, signature = _sign(
+        method, parts.path, query, signed, payload_hash, secret_key, region, service, amz_date
+    )
+    signed["authorization"] = (
+        f"{ALGORITHM} Credential={access_key}/{_scope(amz_date[:8], region, service)}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}"
+    )
+    return signed
+
+
+def presign_url(
+    method: str,
+    url: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    expires: int = 3600,
+    headers: dict[str, str] | None = None,
+    query: dict[str, str] | None = None,
+    service: str = "s3",
+    now: datetime | None = None,
+) -> str:
+    """
+    Query-string signed URL valid for EXPIRES seconds. Any HEADERS given are
+    signed too, and the client must then send them with the same values;
+    extra QUERY parameters (e.g. ``response-content-disposition``) are signed
+    into the URL.
+    """
+    amz_date = _amz_date(now)
+    parts = urlsplit(url)
+    signed = {"host": parts.netloc, **{k.lower(): v for k, v in (headers or {}).items()}}
+    query = {
+        **(query or {}),
+        "X-Amz-Algorithm": ALGORITHM,
+        "X-Amz-Credential": f"{access_key}/{_scope(amz_date[:8], region, service)}",
+        "X-Amz-Date": amz_date,
+        "X-Amz-Expires": str(expires),
+        "X-Amz-SignedHeaders": ";".join(sorted(signed)),
+    }
+    _, signature = _sign(
+        method, parts.path, query, signed, UNSIGNED_PAYLOAD, secret_key, region, service, amz_date
+    )
+    base = f"{parts.scheme}://{parts.netloc}{parts.path or '/'}"
+    return f"{base}?{_canonical_query(query)}&X-Amz-Signature={signature}"
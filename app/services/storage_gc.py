@@ -0,0 +1,354 @@
+"""
+Collector for stored files no database row accounts for.
+
+Deleting a user cascades through the database but leaves
+``users/<user_id>/`` in storage, failed uploads leave model directories
+without a ``models`` row, avatar renders used to leave their ``input.*``
+behind, and blobs (``app.services.blobs``) are never deleted inline. The
+collector finds these by listing storage one shard at a time and checking
+each listing against ``users``, ``models``, ``upload_jobs`` and ``blobs``
+with batched ``IN`` queries, so memory stays bounded by one shard whatever
+the size of the catalog.
+
+A run examines ``GC_SHARDS_PER_RUN`` of the 769 shards (256 for ``users/``,
+``models/`` and ``blobs/sha256/`` each, plus ``blobs/staging/``) and
+saves where it stopped in ``.gc/state.json``; the next run carries on from
+there and wraps around. Nothing is deleted on first sight:
+
+1. an orphan is remembered as a *suspect*. Uploads write files before they
+   commit rows, so a file may only look orphaned for a moment;
+2. if it is still an orphan when its shard comes round again, at least
+   ``GC_GRACE_SECONDS`` later, it is moved to ``.quarantine/<key>``;
+3. after ``GC_RETENTION_HOURS`` in quarantine it is checked once more and
+   deleted, or put back if a row now claims it. A deleted blob's
+   conversions (``blobs/derived/``) are deleted with it.
+
+Dot-prefixed keys are invisible to listings and to ``/uploads``, so
+quarantined files are never served. Sizes are reported as stored object
+sizes; on local disk a hard-linked model file only frees its space once the
+blob it links to goes as well.
+"""
+
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from uuid import UUID
+
+from prometheus_client import Counter
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import settings
+from app.models.models import Blob, ModelMetadata, UploadJob, User
+from app.services.cache.redis_service import exclusive, redis
+from app.services.blobs import BLOB_PREFIX, STAGING_PREFIX, blob_key, derived_key
+from app.services.direct_uploads import PENDING, PROCESSING, UPLOADED
+from app.services.storage import ObjectInfo, ObjectNotFound, StorageBackend, get_storage
+from app.services.storage.layout import LEGACY_PREFIX, legacy_model_id, model_dir, parse_key
+from app.utils.static_files import COLD_SUFFIX
+
+logger = logging.getLogger(__name__)
+
+QUARANTINE_PREFIX = ".quarantine/"
+STATE_KEY = ".gc/state.json"
+
+AVATAR = "avatar.png"
+# Rows in flight: their files exist before the model row does
+ACTIVE_UPLOADS = (PENDING, UPLOADED, PROCESSING)
+
+# Keeps each IN (...) well below database parameter limits
+LOOKUP_BATCH = 1000
+
+_HEX = "0123456789abcdef"
+_PAIRS = [a + b for a in _HEX for b in _HEX]
+SHARDS = (
+    [f"{LEGACY_PREFIX}{p}" for p in _PAIRS]
+    + [f"models/{p}/" for p in _PAIRS]
+    + [f"{BLOB_PREFIX}{p}/" for p in _PAIRS]
+    + [STAGING_PREFIX]
+)
+
+gc_objects_total = Counter(
+    "makerworks_storage_gc_objects_total",
+    "Orphaned storage objects handled by the collector",
+    ["action"],  # quarantined | restored | deleted
+)
+gc_reclaimed_bytes_total = Counter(
+    "makerworks_storage_gc_reclaimed_bytes_total",
+    "Bytes of orphaned objects deleted from storage",
+)
+
+
+@dataclass
+class GCStats:
+    shards: int = 0
+    objects: int = 0
+    suspects: int = 0
+    quarantined: int = 0
+    restored: int = 0
+    deleted: int = 0
+    reclaimed_bytes: int = 0
+    skipped: bool = False  # another run held the lock
+
+
+@dataclass
+class GCState:
+    cursor: int = 0
+    # unit -> epoch seconds it was first seen orphaned, or quarantined at
+    suspects: dict[str, float] = field(default_factory=dict)
+    quarantine: dict[str, float] = field(default_factory=dict)
+
+
+async def load_state(storage: StorageBackend) -> GCState:
+    try:
+        raw = b"".join([chunk async for chunk in storage.stream(STATE_KEY)])
+    except ObjectNotFound:
+        return GCState()
+    return GCState(**json.loads(raw))
+
+
+async def save_state(storage: StorageBackend, state: GCState) -> None:
+    body = json.dumps(state.__dict__, sort_keys=True).encode()
+    await storage.put(STATE_KEY, body, content_type="application/json")
+
+
+def _uuid(value: str) -> UUID | None:
+    try:
+        return UUID(value)
+    except ValueError:
+        return None
+
+
+async def _existing(db: AsyncSession, column, values, *criteria) -> set:
+    """The subset of VALUES present in COLUMN (on rows matching CRITERIA)."""
+    values, found = list(values), set()
+    for start in range(0, len(values), LOOKUP_BATCH):
+        chunk = values[start : start + LOOKUP_BATCH]
+        query = select(column).where(column.in_(chunk), *criteria)
+        found.update((await db.execute(query)).scalars())
+    return found
+
+
+async def _reference_counts(db: AsyncSession, digests) -> dict[str, int]:
+    """
+    Models referencing each digest. User deletes cascade past ``blobs``, so
+    ``Blob.refcount`` is brought back in line with the real count here, in
+    one statement that counts as it writes and can't undo a concurrent
+    ``blobs.acquire``.
+    """
+    digests, counts = list(digests), {}
+    for start in range(0, len(digests), LOOKUP_BATCH):
+        chunk = digests[start : start + LOOKUP_BATCH]
+        counts.update(
+            (
+                await db.execute(
+                    select(ModelMetadata.content_hash, func.count())
+                    .where(ModelMetadata.content_hash.in_(chunk))
+                    .group_by(ModelMetadata.content_hash)
+                )
+            ).all()
+        )
+        real = (
+            select(func.count())
+            .where(ModelMetadata.content_hash == Blob.sha256)
+            .scalar_subquery()
+        )
+        await db.execute(
+            update(Blob)
+            .where(Blob.sha256.in_(chunk), Blob.refcount != real)
+            .values(refcount=real)
+            .execution_options(synchronize_session=False)
+        )
+    return counts
+
+
+async def find_orphans(db: AsyncSession, infos: list[ObjectInfo]) -> dict[str, list[ObjectInfo]]:
+    """
+    Group the orphans among INFOS into units, the prefix or key that is
+    quarantined and deleted as a whole: a deleted user's tree, a model
+    directory, a single stray file.
+    """
+    users, models, legacy = defaultdict(list), defaultdict(list), defaultdict(list)
+    digests, orphans = defaultdict(list), defaultdict(list)
+    for info in infos:
+        parts = info.key.split("/")
+        if info.key.startswith(STAGING_PREFIX):
+            orphans[info.key].append(info)  # a staged upload never outlives its request
+        elif info.key.startswith(BLOB_PREFIX) and len(parts) == 5:
+            digests[parts[4].removesuffix(COLD_SUFFIX)].append(info)  # either tier
+        elif parsed := parse_key(info.key):
+            if model_id := _uuid(parsed[0]):
+                models[model_id].append(info)
+        elif info.key.startswith(LEGACY_PREFIX) and len(parts) >= 3:
+            if user_id := _uuid(parts[1]):
+                users[user_id].append(info)
+
+    live_users = await _existing(db, User.id, users)
+    for user_id, objects in users.items():
+        if user_id not in live_users:
+            orphans[f"{LEGACY_PREFIX}{user_id}/"] = objects
+            continue
+        for info in objects:
+            parts = info.key.split("/")
+            if len(parts) == 4 and parts[2] == "avatars" and parts[3] != AVATAR:
+                orphans[info.key].append(info)
+            elif model_id := legacy_model_id(info.key):
+                legacy[model_id].append(info)
+
+    live_models = await _existing(db, ModelMetadata.id, [*models, *legacy])
+    live_models |= await _existing(
+        db,
+        UploadJob.id,
+        set(models).difference(live_models),
+        UploadJob.status.in_(ACTIVE_UPLOADS),
+    )
+    for model_id, objects in models.items():
+        if model_id not in live_models:
+            orphans[f"{model_dir(model_id)}/"] = objects
+    for model_id, objects in legacy.items():
+        if model_id not in live_models:
+            for info in objects:
+                orphans[info.key].append(info)
+
+    references = await _reference_counts(db, digests)
+    for digest, objects in digests.items():
+        if not references.get(digest):
+            orphans[blob_key(digest)] = objects
+    return dict(orphans)
+
+
+async def _move(storage: StorageBackend, source: str, target: str) -> None:
+    await storage.copy(source, target)
+    await storage.delete(source)
+
+
+async def _scan(
+    db: AsyncSession,
+    storage: StorageBackend,
+    state: GCState,
+    shard: str,
+    now: float,
+    grace: float,
+    dry_run: bool,
+    stats: GCStats,
+) -> None:
+    infos = [info async for info in storage.list(shard)]
+    stats.objects += len(infos)
+    orphans = await find_orphans(db, infos)
+
+    # A suspect that is no longer an orphan got its row after all
+    for unit in [u for u in state.suspects if u.startswith(shard) and u not in orphans]:
+        del state.suspects[unit]
+
+    for unit, objects in orphans.items():
+        first_seen = state.suspects.setdefault(unit, now)
+        if now - first_seen < grace or dry_run:
+            stats.suspects += 1
+            continue
+        for info in objects:
+            await _move(storage, info.key, QUARANTINE_PREFIX + info.key)
+        del state.suspects[unit]
+        state.quarantine[unit] = now
+        stats.quarantined += len(objects)
+        gc_objects_total.labels(action="quarantined").inc(len(objects))
+        logger.info("🧹 Quarantined %s (%d object(s))", unit, len(objects))
+
+
+async def _expire(
+    db: AsyncSession, storage: StorageBackend, state: GCState, now: float, retention: float, stats: GCStats
+) -> None:
+    """Delete quarantined units past RETENTION, or restore them if they are wanted again."""
+    for unit, quarantined_at in list(state.quarantine.items()):
+        if now - quarantined_at < retention:
+            continue
+        held = [info async for info in storage.list(QUARANTINE_PREFIX + unit)]
+        originals = [replace(info, key=info.key[len(QUARANTINE_PREFIX) :]) for info in held]
+        if unit in await find_orphans(db, originals):
+            if unit.startswith(BLOB_PREFIX):
+                digest = unit.rsplit("/", 1)[1]
+                held += [info async for info in storage.list(derived_key(digest))]
+                await db.execute(delete(Blob).where(Blob.sha256 == digest, Blob.refcount < 1))
+            for info in held:
+                await storage.delete(info.key)
+            reclaimed = sum(info.size for info in held)
+            stats.deleted += len(held)
+            stats.reclaimed_bytes += reclaimed
+            gc_objects_total.labels(action="deleted").inc(len(held))
+            gc_reclaimed_bytes_total.inc(reclaimed)
+            logger.info("🗑️ Deleted %s (%d bytes)", unit, reclaimed)
+        else:
+            for info, original in zip(held, originals):
+                await _move(storage, info.key, original.key)
+            stats.restored += len(held)
+            gc_objects_total.labels(action="restored").inc(len(held))
+            logger.warning("♻️ Restored %s from quarantine: it is referenced again", unit)
+        del state.quarantine[unit]
+    await db.commit()
+
+
+async def collect_garbage(
+    shards: int | None = None,
+    dry_run: bool = False,
+    session_factory=None,
+    storage: StorageBackend | None = None,
+    now: float | None = None,
+) -> GCStats:
+    """
+    Examine the next SHARDS listing shards, quarantining confirmed orphans,
+    and delete quarantined units past their retention. With DRY_RUN only
+    suspects are recorded and nothing is moved or deleted.
+
+    Runs (beat's and ``mw storage gc``) share ``.gc/state.json``, so one
+    that finds another in progress is skipped.
+    """
+    async with exclusive(redis, "storage-gc") as held:
+        if not held:
+            logger.info("🧹 GC skipped: another run is in progress")
+            return GCStats(skipped=True)
+        return await _collect(shards, dry_run, session_factory, storage, now)
+
+
+async def _collect(
+    shards: int | None,
+    dry_run: bool,
+    session_factory,
+    storage: StorageBackend | None,
+    now: float | None,
+) -> GCStats:
+    if session_factory is None:
+        from app.db.database import async_session_maker as session_factory
+    storage = storage or get_storage()
+    shards = min(shards or settings.gc_shards_per_run, len(SHARDS))
+    now = time.time() if now is None else now
+
+    state = await load_state(storage)
+    stats = GCStats()
+    async with session_factory() as db:
+        if not dry_run:
+            await _expire(db, storage, state, now, settings.gc_retention_hours * 3600, stats)
+            await save_state(storage, state)
+        for _ in range(shards):
+            shard = SHARDS[state.cursor % len(SHARDS)]
+            await _scan(db, storage, state, shard, now, settings.gc_grace_seconds, dry_run, stats)
+            # Keeps the refcounts reconciled for this shard
+            await (db.rollback() if dry_run else db.commit())
+            state.cursor = (state.cursor + 1) % len(SHARDS)
+            stats.shards += 1
+            if not dry_run:
+                # Saved per shard: an interrupted run repeats at most one
+                await save_state(storage, state)
+
+    logger.info(
+        "🧹 GC examined %d shard(s), %d object(s): %d suspect, %d quarantined, "
+        "%d restored, %d deleted (%d bytes)",
+        stats.shards,
+        stats.objects,
+        stats.suspects,
+        stats.quarantined,
+        stats.restored,
+        stats.deleted,
+        stats.reclaimed_bytes,
+    )
+    return stats
@@ -0,0 +1,158 @@
+"""
+Bounded system snapshot history with downsampled tiers.
+
+Samples are averaged into fixed-width buckets for each tier and appended to a
+capped list once the bucket closes:
+
+    tier   step   kept     span
+    1s       1s   3600     1 hour
+    10s     10s   8640     1 day
+    1m      60s  10080     1 week
+
+The per-host sampling leader writes to Redis (``RPUSH`` + ``LTRIM``), so every
+worker serves the same history and memory stays bounded no matter how long
+the process runs. ``MemoryHistoryStore`` keeps the same shape in-process for
+tests and Redis-less setups.
+"""
+
+import json
+import socket
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from redis.asyncio import Redis
+
+# tier -> (bucket width in seconds, points kept)
+TIERS: dict[str, tuple[int, int]] = {
+    "1s": (1, 3600),
+    "10s": (10, 8640),
+    "1m": (60, 10080),
+}
+
+# Columns recorded from each snapshot, in `_extract` order.
+FIELDS = ("load_1m", "memory_percent")
+
+
+def _extract(snapshot: dict) -> list[float | None]:
+    return [
+        (snapshot.get("load_avg") or {}).get("1min"),
+        snapshot.get("memory_percent"),
+    ]
+
+
+class HistoryStore(Protocol):
+    async def append(self, tier: str, point: list) -> None: ...
+
+    async def read(self, tier: str, limit: int | None = None) -> list[list]: ...
+
+
+class MemoryHistoryStore:
+    """Fixed-size in-process ring buffers, one per tier."""
+
+    def __init__(self, tiers: dict[str, tuple[int, int]] = TIERS) -> None:
+        self._rings = {tier: deque(maxlen=cap) for tier, (_, cap) in tiers.items()}
+
+    async def append(self, tier: str, point: list) -> None:
+        self._rings[tier].append(point)
+
+    async def read(self, tier: str, limit: int | None = None) -> list[list]:
+        points = list(self._rings[tier])
+        return points[-limit:] if limit else points
+
+
+class RedisHistoryStore:
+    """Capped Redis lists, one per tier and host."""
+
+    def __init__(
+        self,
+        redis: Redis,
+        tiers: dict[str, tuple[int, int]] = TIERS,
+        host: str | None = None,
+    ) -> None:
+        self.redis = redis
+        self.tiers = tiers
+        self.prefix = f"makerworks:system:history:{host or socket.gethostname()}"
+
+    def _key(self, tier: str) -> str:
+        return f"{self.prefix}:{tier}"
+
+    async def append(self, tier: str, point: list) -> None:
+        key = self._key(tier)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.rpush(key, json.dumps(point, separators=(",", ":")))
+        pipe.ltrim(key, -self.tiers[tier][1], -1)
+        await pipe.execute()
+
+    async def read(self, tier: str, limit: int | None = None) -> list[list]:
+        start = -limit if limit else 0
+        return [json.loads(raw) for raw in await self.redis.lrange(self._key(tier), start, -1)]
+
+
+@dataclass
+class _Bucket:
+    start: int
+    count: list[int] = field(default_factory=lambda: [0] * len(FIELDS))
+    sums: list[float] = field(default_factory=lambda: [0.0] * len(FIELDS))
+
+    def add(self, values: list[float | None]) -> None:
+        for i, value in enumerate(values):
+            if value is not None:
+                self.count[i] += 1
+                self.sums[i] += value
+
+    def point(self) -> list:
+        return [self.start] + [
+            round(s / c, 3) if c else None for s, c in zip(self.sums, self.count)
+        ]
+
+
+class SnapshotHistory:
+    """Downsample snapshots into every tier of a ``HistoryStore``."""
+
+    def __init__(
+        self, store: HistoryStore, tiers: dict[str, tuple[int, int]] = TIERS
+    ) -> None:
+        self.store = store
+        self.tiers = tiers
+        self._open: dict[str, _Bucket] = {}
+
+    @property
+    def resolution(self) -> int:
+        """Finest bucket width; how often ``record`` is worth calling."""
+        return min(step for step, _ in self.tiers.values())
+
+    def use(self, store: HistoryStore) -> None:
+        """Swap the backing store (e.g. to Redis once it is reachable)."""
+        self.store = store
+        self._open.clear()
+
+    async def record(self, snapshot: dict, now: float) -> None:
+        ts = int(now)
+        values = _extract(snapshot)
+        for tier, (step, _) in self.tiers.items():
+            start = ts - ts % step
+            bucket = self._open.get(tier)
+            if bucket is not None and bucket.start != start:
+                await self.store.append(tier, bucket.point())
+                bucket = None
+            if bucket is None:
+                bucket = self._open[tier] = _Bucket(start)
+            bucket.add(values)
+
+    async def read(self, tier: str, limit: int | None = None) -> dict:
+        """Return one tier as a columnar series: parallel arrays per field."""
+        if tier not in self.tiers:
+            raise KeyError(tier)
+        points = await self.store.read(tier, limit)
+        columns = list(zip(*points)) if points else [()] * (len(FIELDS) + 1)
+        return {
+            "tier": tier,
+            "step_seconds": self.tiers[tier][0],
+            "t": list(columns[0]),
+            **{name: list(columns[i + 1]) for i, name in enumerate(FIELDS)},
+        }
+
+
+# Process-wide history; starts in memory and is pointed at Redis on startup.
+snapshot_history = SnapshotHistory(MemoryHistoryStore())
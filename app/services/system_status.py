@@ -0,0 +1,258 @@
+"""
+Shared system-status sampling and WebSocket fan-out.
+
+``SnapshotSampler`` keeps a process-local snapshot fresh in the background:
+static host facts (platform, cores, memory, GPU) are probed once in a worker
+thread, and only uptime and load are re-read on a fixed cadence. Request
+handlers read the cached value and never touch the host.
+
+One process per host wins a short Redis lease and samples system metrics
+once per interval; the sample is published on a per-host pub/sub channel.
+Every worker process subscribes to that channel and hands each frame to its
+local ``StatusHub``, which fans it out to connected sockets.
+
+Each socket gets a one-slot send queue: a slow consumer simply skips stale
+frames and always receives the newest one next, so nobody can build up a
+backlog or hold up the others.
+
+If Redis is unreachable, the process falls back to sampling for itself and
+publishing only to its own hub.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.services.system_history import HistoryStore, MemoryHistoryStore, SnapshotHistory
+from app.utils.system_info import get_static_host_facts, get_system_status_snapshot
+
+logger = logging.getLogger("makerworks.system_status")
+
+SAMPLE_INTERVAL = float(os.getenv("SYSTEM_STATUS_INTERVAL", 10))
+SNAPSHOT_INTERVAL = float(os.getenv("SYSTEM_SNAPSHOT_INTERVAL", 1))
+
+_HOST = socket.gethostname()
+CHANNEL = f"makerworks:system:status:{_HOST}"
+LEADER_KEY = f"makerworks:system:sampler:{_HOST}"
+
+
+class SnapshotSampler:
+    """Process-local, background-refreshed system snapshot."""
+
+    def __init__(self, interval: float = SNAPSHOT_INTERVAL) -> None:
+        self.interval = interval
+        self.latest: dict | None = None
+        self._static_ready = False
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    async def refresh(self) -> dict:
+        if not self._static_ready:
+            async with self._lock:
+                if not self._static_ready:
+                    # Spawns nvidia-smi once; keep it off the event loop.
+                    await asyncio.to_thread(get_static_host_facts)
+                    self._static_ready = True
+        self.latest = get_system_status_snapshot()
+        return self.latest
+
+    async def current(self) -> dict:
+        """Return the cached snapshot, sampling once if nothing is cached yet."""
+        if self.latest is None:
+            return await self.refresh()
+        return self.latest
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("System snapshot refresh failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="system-snapshot")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+snapshot_sampler = SnapshotSampler()
+
+
+class StatusHub:
+    """In-process fan-out of status frames to WebSocket clients."""
+
+    def __init__(self) -> None:
+        self._clients: set[asyncio.Queue[str]] = set()
+        self.latest: str | None = None
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    @contextmanager
+    def subscribe(self) -> Iterator[asyncio.Queue[str]]:
+        """Register a client queue, primed with the latest frame if any."""
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=1)
+        if self.latest is not None:
+            queue.put_nowait(self.latest)
+        self._clients.add(queue)
+        try:
+            yield queue
+        finally:
+            self._clients.discard(queue)
+
+    def publish(self, frame: str) -> None:
+        """Deliver a frame to every client, replacing any frame not yet sent."""
+        self.latest = frame
+        for queue in self._clients:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(frame)
+
+
+class SystemStatusBroadcaster:
+    """Background sampler + Redis pub/sub relay feeding a ``StatusHub``."""
+
+    def __init__(
+        self,
+        redis: Redis,
+        hub: StatusHub,
+        interval: float = SAMPLE_INTERVAL,
+        sampler: Callable[[], Awaitable[dict]] = snapshot_sampler.current,
+        history: SnapshotHistory | None = None,
+    ) -> None:
+        self.redis = redis
+        self.hub = hub
+        self.interval = interval
+        self.sampler = sampler
+        self.history = history
+        self._token = f"{_HOST}:{os.getpid()}"
+        self._redis_ok = True
+        self._leader = False
+        self._shared_history: HistoryStore | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._sample_loop(), name="system-status-sampler"),
+            asyncio.create_task(self._listen_loop(), name="system-status-listener"),
+        ]
+        if self.history is not None:
+            self._tasks.append(
+                asyncio.create_task(self._history_loop(), name="system-history")
+            )
+        logger.info("📡 System status broadcaster started (every %ss)", self.interval)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _is_leader(self) -> bool:
+        """Hold a lease slightly longer than one interval; renew while alive."""
+        ttl = max(1, int(self.interval * 3))
+        if await self.redis.set(LEADER_KEY, self._token, nx=True, ex=ttl):
+            return True
+        if await self.redis.get(LEADER_KEY) == self._token:
+            await self.redis.expire(LEADER_KEY, ttl)
+            return True
+        return False
+
+    async def _sample(self) -> str:
+        return json.dumps(await self.sampler())
+
+    async def _tick(self) -> None:
+        if self._redis_ok:
+            try:
+                self._leader = await self._is_leader()
+            except (RedisError, OSError) as e:
+                logger.warning("Redis unavailable, sampling locally: %s", e)
+                self._redis_ok = False
+                self._leader = False
+            else:
+                if self._leader:
+                    await self.redis.publish(CHANNEL, await self._sample())
+                return
+        self.hub.publish(await self._sample())
+
+    async def _sample_loop(self) -> None:
+        while True:
+            try:
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("System status sample failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def _record_history(self) -> None:
+        """
+        Feed the shared history; only the host's sampling leader writes. While
+        Redis is down every process records into its own in-memory history
+        instead, and goes back to the shared one once Redis returns.
+        """
+        if self._redis_ok:
+            if self._shared_history is not None:
+                self.history.use(self._shared_history)
+                self._shared_history = None
+            if not self._leader:
+                return
+        elif self._shared_history is None:
+            self._shared_history = self.history.store
+            self.history.use(MemoryHistoryStore(self.history.tiers))
+        await self.history.record(await self.sampler(), time.time())
+
+    async def _history_loop(self) -> None:
+        while True:
+            try:
+                await self._record_history()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug("System history record failed: %s", e)
+            await asyncio.sleep(self.history.resolution)
+
+    async def _listen_loop(self) -> None:
+        backoff = 1.0
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(CHANNEL)
+                self._redis_ok = True
+                backoff = 1.0
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.hub.publish(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("System status subscription lost: %s", e)
+                self._redis_ok = False
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+status_hub = StatusHub()
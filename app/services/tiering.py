@@ -0,0 +1,432 @@
+"""
+Cold tier for model files nobody downloads any more.
+
+Most models are fetched in their first week and rarely after. Model files
+are stored once per content (``app.services.blobs``), and a blob whose
+models have not been read for ``TIER_COLD_AFTER_DAYS`` is *demoted*: its
+bytes are rewritten as a zstd frame under ``<key>.zst`` (binary STL shrinks
+3-5x), every model key linked to it gets a ``.zst`` link instead, and the
+uncompressed objects and their ``.br``/``.gz`` variants are removed. Rows
+are untouched: paths, URLs and mesh metadata stay exactly as they were.
+
+Readers go through ``stat``/``stream``/``open_local`` here (and the
+``/uploads`` servers), which fall back to the ``.zst`` object and
+decompress it as a stream, so a cold file looks like any other. Clients
+that accept ``zstd`` get the frame as is.
+
+Access is tracked in Redis by the uploads servers (``record_access``): the
+last read of every model file, and reads of cold files since the last run.
+A cold blob read ``TIER_PROMOTE_HITS`` times between two runs is *promoted*
+back to plain files. Hot and cold copies overlap during both moves, so a
+reader always finds one of them.
+"""
+
+import logging
+import mimetypes
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator
+
+import anyio
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import settings
+from app.models.models import Blob, ModelMetadata
+from app.services.blobs import BLOB_PREFIX, blob_key
+from app.services.cache.redis_service import exclusive, redis
+from app.services.storage import ObjectInfo, ObjectNotFound, StorageBackend, get_storage
+from app.services.storage.base import CHUNK_SIZE
+from app.services.storage.layout import COMPRESSED_SUFFIXES, GLB, MODEL_STEM, parse_key
+from app.utils.compression import zstandard
+from app.utils.static_files import COLD_SUFFIX, PRECOMPRESS_SUFFIXES, write_precompressed_variants
+
+logger = logging.getLogger(__name__)
+
+# A zstd frame header is at most 18 bytes and carries the content size
+FRAME_HEADER_MAX = 18
+# Keep a cold copy only if it saves at least this fraction
+MIN_SAVING = 0.1
+
+LAST_ACCESS = "makerworks:tiering:last_access"  # zset: key -> epoch seconds
+COLD_HITS = "makerworks:tiering:cold_hits"  # zset: key -> reads since the last run
+# Hot reads of one key refresh LAST_ACCESS at most this often per process
+ACCESS_RESOLUTION = 300
+_recorded: dict[str, float] = {}
+
+tier_moves_total = Counter(
+    "makerworks_storage_tier_moves_total",
+    "Blobs moved between storage tiers",
+    ["direction"],  # demoted | promoted
+)
+tier_saved_bytes_total = Counter(
+    "makerworks_storage_tier_saved_bytes_total",
+    "Bytes saved by compressing demoted blobs",
+)
+
+
+def cold_key(key: str) -> str:
+    return key + COLD_SUFFIX
+
+
+def is_model_file(key: str) -> bool:
+    """Whether KEY is a model's original (the files the tier manages)."""
+    if key.startswith(BLOB_PREFIX):
+        return True
+    parsed = parse_key(key)
+    return bool(
+        parsed
+        and parsed[1].startswith(f"{MODEL_STEM}.")
+        and parsed[1] != GLB
+        and not parsed[1].endswith(COMPRESSED_SUFFIXES)
+    )
+
+
+# ────── Reads ──────
+
+
+def content_size(header: bytes) -> int:
+    """Decompressed size recorded in a zstd frame HEADER."""
+    size = zstandard.frame_content_size(header)
+    if size < 0:
+        raise ValueError("zstd frame without a content size")
+    return size
+
+
+async def stat(storage: StorageBackend, key: str) -> tuple[ObjectInfo, bool] | None:
+    """KEY's metadata (decompressed size for cold objects) and whether it is cold."""
+    info = await storage.stat(key)
+    if info is not None:
+        return info, False
+    info = await storage.stat(cold_key(key))
+    if info is None:
+        return None
+    header = b"".join([chunk async for chunk in storage.stream(cold_key(key), 0, FRAME_HEADER_MAX)])
+    logical = replace(
+        info, key=key, size=content_size(header), content_type=mimetypes.guess_type(key)[0]
+    )
+    return logical, True
+
+
+async def decompress(
+    chunks: AsyncIterator[bytes],
+    start: int = 0,
+    length: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """Decompress a zstd stream, yielding LENGTH bytes from START."""
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    skip, remaining = start, length
+    async for compressed in chunks:
+        data = await anyio.to_thread.run_sync(decompressor.decompress, compressed)
+        if skip:
+            data, skip = data[skip:], max(0, skip - len(data))
+        if remaining is not None:
+            data = data[:remaining]
+            remaining -= len(data)
+        for offset in range(0, len(data), chunk_size):
+            yield data[offset : offset + chunk_size]
+        if remaining == 0:
+            return
+
+
+async def stream(
+    storage: StorageBackend,
+    key: str,
+    start: int = 0,
+    length: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """``storage.stream`` for either tier; raises ObjectNotFound."""
+    hot = storage.stream(key, start, length, chunk_size)
+    try:
+        first = await hot.__anext__()
+    except StopAsyncIteration:
+        return
+    except ObjectNotFound:
+        async for chunk in decompress(storage.stream(cold_key(key)), start, length, chunk_size):
+            yield chunk
+        return
+    yield first
+    async for chunk in hot:
+        yield chunk
+
+
+@asynccontextmanager
+async def open_local(storage: StorageBackend, key: str) -> AsyncIterator[Path]:
+    """``storage.open_local`` for either tier: cold objects are decompressed to a temporary file."""
+    if await storage.exists(key):
+        async with storage.open_local(key) as path:
+            yield path
+        return
+
+    fd, tmp = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in decompress(storage.stream(cold_key(key))):
+                await anyio.to_thread.run_sync(f.write, chunk)
+        yield Path(tmp)
+    finally:
+        os.unlink(tmp)
+
+
+# ────── Access tracking ──────
+
+
+async def record_access(key: str, cold: bool = False) -> None:
+    """Note a read of KEY for the tier job; never fails the request."""
+    if not is_model_file(key):
+        return
+    now = time.time()
+    if not cold and now - _recorded.get(key, 0) < ACCESS_RESOLUTION:
+        return
+    if len(_recorded) > 10_000:
+        _recorded.clear()
+    _recorded[key] = now
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(LAST_ACCESS, {key: now})
+            if cold:
+                pipe.zincrby(COLD_HITS, 1, key)
+            await pipe.execute()
+    except (RedisError, OSError) as e:
+        logger.debug("Access to %s not recorded: %s", key, e)
+
+
+async def _last_access(keys: list[str]) -> dict[str, float]:
+    if not keys:
+        return {}
+    scores = await redis.zmscore(LAST_ACCESS, keys)
+    return {key: score for key, score in zip(keys, scores) if score is not None}
+
+
+async def _take_cold_hits() -> dict[str, float]:
+    """Cold reads since the last run; the count starts over."""
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.zrange(COLD_HITS, 0, -1, withscores=True)
+        pipe.delete(COLD_HITS)
+        hits, _ = await pipe.execute()
+    return dict(hits)
+
+
+async def _wanted_again(db: AsyncSession, hits: dict[str, float]) -> list[Blob]:
+    """Cold blobs read at least ``TIER_PROMOTE_HITS`` times, over all their keys."""
+    reads: dict[str, float] = {}
+    model_keys = []
+    for key, count in hits.items():
+        if key.startswith(BLOB_PREFIX):
+            digest = key.rsplit("/", 1)[1]
+            reads[digest] = reads.get(digest, 0) + count
+        else:
+            model_keys.append(key)
+    if model_keys:
+        rows = await db.execute(
+            select(ModelMetadata.filepath, ModelMetadata.content_hash).where(
+                ModelMetadata.filepath.in_(model_keys), ModelMetadata.content_hash.is_not(None)
+            )
+        )
+        for key, digest in rows.all():
+            reads[digest] = reads.get(digest, 0) + hits[key]
+
+    wanted = [digest for digest, count in reads.items() if count >= settings.tier_promote_hits]
+    if not wanted:
+        return []
+    result = await db.execute(
+        select(Blob).where(Blob.sha256.in_(wanted), Blob.cold_since.is_not(None))
+    )
+    return list(result.scalars())
+
+
+# ────── Moves ──────
+
+
+async def _compress(storage: StorageBackend, key: str, size: int) -> int:
+    """Write KEY's zstd frame to ``cold_key(KEY)``; returns its size."""
+    compressor = zstandard.ZstdCompressor(
+        level=settings.tier_zstd_level, write_checksum=True
+    ).compressobj(size=size)
+
+    async def frames():
+        async for chunk in storage.stream(key):
+            if out := await anyio.to_thread.run_sync(compressor.compress, chunk):
+                yield out
+        yield compressor.flush()
+
+    return (await storage.put(cold_key(key), frames(), "application/zstd")).size
+
+
+async def _models(db: AsyncSession, sha256: str) -> list[tuple[str, str]]:
+    """``(filepath, filename)`` of the models sharing blob SHA256."""
+    result = await db.execute(
+        select(ModelMetadata.filepath, ModelMetadata.filename).where(
+            ModelMetadata.content_hash == sha256
+        )
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def _model_keys(db: AsyncSession, sha256: str) -> list[str]:
+    """Keys of the models linked to blob SHA256 (not the blob's own key)."""
+    keys = {filepath for filepath, _ in await _models(db, sha256)}
+    return sorted(key for key in keys if key and key != blob_key(sha256))
+
+
+async def demote(db: AsyncSession, storage: StorageBackend, blob: Blob) -> int:
+    """
+    Move BLOB and the model keys linked to it to the cold tier; returns the
+    bytes saved, 0 if compressing did not pay off (nothing is changed then).
+    """
+    key = blob_key(blob.sha256)
+    stored = await _compress(storage, key, blob.size)
+    if stored > blob.size * (1 - MIN_SAVING):
+        await storage.delete(cold_key(key))
+        return 0
+
+    for model_key in await _model_keys(db, blob.sha256):
+        if await storage.exists(model_key):
+            await storage.copy(cold_key(key), cold_key(model_key))
+            await storage.delete(model_key)
+        for suffix in COMPRESSED_SUFFIXES:
+            await storage.delete(model_key + suffix)
+    await storage.delete(key)
+    blob.cold_since = datetime.utcnow()
+    tier_moves_total.labels(direction="demoted").inc()
+    tier_saved_bytes_total.inc(blob.size - stored)
+    logger.info("🧊 Demoted blob %s: %d -> %d bytes", blob.sha256[:12], blob.size, stored)
+    return blob.size - stored
+
+
+async def promote(db: AsyncSession, storage: StorageBackend, blob: Blob) -> None:
+    """Bring BLOB and its model keys back to plain, uncompressed files."""
+    key = blob_key(blob.sha256)
+    if not await storage.exists(key):
+        # A re-upload of the same content may have stored it again already
+        await storage.put(key, decompress(storage.stream(cold_key(key))))
+
+    for model_key in await _model_keys(db, blob.sha256):
+        if storage.cheap_copy:
+            await storage.copy(key, model_key)
+        await storage.delete(cold_key(model_key))
+        path = storage.local_path(model_key)
+        if path is not None and Path(model_key).suffix.lower() in PRECOMPRESS_SUFFIXES:
+            await anyio.to_thread.run_sync(write_precompressed_variants, path)
+    await storage.delete(cold_key(key))
+    blob.cold_since = None
+    tier_moves_total.labels(direction="promoted").inc()
+    logger.info("🔥 Promoted blob %s back to the hot tier", blob.sha256[:12])
+
+
+@dataclass
+class TieringStats:
+    scanned: int = 0
+    demoted: int = 0
+    promoted: int = 0
+    saved_bytes: int = 0
+    skipped: bool = False  # another run held the lock
+
+
+async def rebalance(
+    batch_size: int | None = None,
+    dry_run: bool = False,
+    session_factory=None,
+    storage: StorageBackend | None = None,
+    now: datetime | None = None,
+) -> TieringStats:
+    """
+    Promote cold blobs that are being read again, then demote up to
+    BATCH_SIZE blobs whose models have not been read for
+    ``TIER_COLD_AFTER_DAYS``. With DRY_RUN only counts what would move.
+
+    Runs (beat's and ``mw storage tier``) don't overlap: one that finds
+    another in progress is skipped, so a blob is never demoted and promoted
+    at once.
+    """
+    if zstandard is None:
+        logger.warning("zstandard is not installed: storage tiering is disabled")
+        return TieringStats()
+    async with exclusive(redis, "storage-tier") as held:
+        if not held:
+            logger.info("🧊 Tiering skipped: another run is in progress")
+            return TieringStats(skipped=True)
+        return await _rebalance(batch_size, dry_run, session_factory, storage, now)
+
+
+async def _rebalance(
+    batch_size: int | None,
+    dry_run: bool,
+    session_factory,
+    storage: StorageBackend | None,
+    now: datetime | None,
+) -> TieringStats:
+    if session_factory is None:
+        from app.db.database import async_session_maker as session_factory
+    storage = storage or get_storage()
+    batch_size = batch_size or settings.tier_batch_size
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=settings.tier_cold_after_days)
+
+    stats = TieringStats()
+    if not dry_run:
+        # Older reads say no more than no reads at all
+        await redis.zremrangebyscore(LAST_ACCESS, "-inf", cutoff.timestamp())
+    async with session_factory() as db:
+        promoted = set()
+        if not dry_run:
+            for blob in await _wanted_again(db, await _take_cold_hits()):
+                await promote(db, storage, blob)
+                await db.commit()
+                promoted.add(blob.sha256)
+                stats.promoted += 1
+
+        last_sha = ""
+        while stats.demoted < batch_size:
+            blobs = (
+                await db.execute(
+                    select(Blob)
+                    .where(
+                        Blob.sha256 > last_sha,
+                        Blob.cold_since.is_(None),
+                        Blob.refcount > 0,
+                        Blob.created_at < cutoff,
+                    )
+                    .order_by(Blob.sha256)
+                    .limit(batch_size)
+                )
+            ).scalars().all()
+            if not blobs:
+                break
+            last_sha = blobs[-1].sha256
+            for blob in blobs:
+                if blob.sha256 in promoted:
+                    continue
+                stats.scanned += 1
+                models = await _models(db, blob.sha256)
+                if not any(Path(name).suffix.lower() in PRECOMPRESS_SUFFIXES for _, name in models):
+                    continue  # 3MF and friends are compressed already
+                accessed = await _last_access([blob_key(blob.sha256), *(k for k, _ in models)])
+                if accessed and max(accessed.values()) >= cutoff.timestamp():
+                    continue
+                if dry_run:
+                    stats.demoted += 1
+                elif saved := await demote(db, storage, blob):
+                    await db.commit()
+                    stats.demoted += 1
+                    stats.saved_bytes += saved
+                if stats.demoted >= batch_size:
+                    break
+
+    logger.info(
+        "🧊 Tiering scanned %d blob(s): %d demoted (%d bytes saved), %d promoted",
+        stats.scanned,
+        stats.demoted,
+        stats.saved_bytes,
+        stats.promoted,
+    )
+    return stats
@@ -0,0 +1,143 @@
+"""
+Dependency-ordered, concurrent application startup.
+
+Startup work is declared as ``StartupStep``s naming the steps they depend on.
+``run_startup`` starts every step as soon as its dependencies have finished,
+so independent work (Redis checks, schema creation, host probing) overlaps
+instead of running back to back. Each step's duration is exported as
+``makerworks_startup_step_seconds{step}``.
+
+``run_once`` guards deployment-wide work such as schema creation and admin
+seeding: the first worker to take a Redis lock runs it and records a
+fingerprint; every other worker waits for the lock and then skips the step.
+The holder keeps extending the lock while the step runs.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from prometheus_client import Gauge
+from redis.asyncio import Redis
+
+from app.services.cache.redis_service import renew_lock
+
+logger = logging.getLogger("makerworks.startup")
+
+ONCE_LOCK_TTL = int(os.getenv("STARTUP_ONCE_LOCK_TTL", 120))
+ONCE_DONE_TTL = int(os.getenv("STARTUP_ONCE_DONE_TTL", 86400))
+
+startup_step_seconds = Gauge(
+    "makerworks_startup_step_seconds",
+    "Duration of each application startup step in the last boot",
+    ["step"],
+)
+
+
+@dataclass(frozen=True)
+class StartupStep:
+    name: str
+    run: Callable[[], Awaitable[object]]
+    requires: tuple[str, ...] = ()
+
+
+def _check_graph(steps: list[StartupStep]) -> None:
+    names = {step.name for step in steps}
+    if len(names) != len(steps):
+        raise ValueError("Duplicate startup step names")
+    for step in steps:
+        missing = set(step.requires) - names
+        if missing:
+            raise ValueError(f"Startup step {step.name!r} requires unknown {sorted(missing)}")
+
+    # Kahn's algorithm: anything left over sits on a cycle.
+    pending = {step.name: set(step.requires) for step in steps}
+    while True:
+        ready = [name for name, deps in pending.items() if not deps]
+        if not ready:
+            break
+        for name in ready:
+            del pending[name]
+        for deps in pending.values():
+            deps.difference_update(ready)
+    if pending:
+        raise ValueError(f"Startup steps form a cycle: {sorted(pending)}")
+
+
+async def run_startup(steps: list[StartupStep]) -> dict[str, float]:
+    """
+    Run STEPS concurrently in dependency order and return their durations.
+
+    The first failing step cancels everything still running and its
+    exception propagates, so a broken dependency still aborts startup.
+    """
+    _check_graph(steps)
+    done: dict[str, asyncio.Event] = {step.name: asyncio.Event() for step in steps}
+    timings: dict[str, float] = {}
+
+    async def run(step: StartupStep) -> None:
+        for dep in step.requires:
+            await done[dep].wait()
+        start = time.perf_counter()
+        await step.run()
+        elapsed = time.perf_counter() - start
+        timings[step.name] = elapsed
+        startup_step_seconds.labels(step=step.name).set(elapsed)
+        logger.info("⏱️ Startup step %s done in %.3fs", step.name, elapsed)
+        done[step.name].set()
+
+    tasks = [asyncio.create_task(run(step), name=f"startup:{step.name}") for step in steps]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return timings
+
+
+async def run_once(
+    redis: Redis,
+    name: str,
+    fingerprint: str,
+    func: Callable[[], Awaitable[object]],
+    lock_ttl: int = ONCE_LOCK_TTL,
+    done_ttl: int = ONCE_DONE_TTL,
+    poll: float = 0.25,
+) -> bool:
+    """
+    Run FUNC once across all workers for a given FINGERPRINT.
+
+    Returns True if this process ran it. The holder renews the lock while FUNC
+    runs, so a slow step isn't started again by a waiting worker; a crashed
+    holder stops renewing and the lock expires after LOCK_TTL, so it cannot
+    wedge the deployment. The done marker expires after DONE_TTL so a reset
+    database is eventually re-initialised.
+    """
+    done_key = f"makerworks:startup:{name}:done"
+    lock_key = f"makerworks:startup:{name}:lock"
+    token = f"{socket.gethostname()}:{os.getpid()}"
+
+    while True:
+        if await redis.get(done_key) == fingerprint:
+            logger.info("⏭️ Startup step %s already done for this deployment", name)
+            return False
+        if await redis.set(lock_key, token, nx=True, ex=lock_ttl):
+            renew = asyncio.create_task(renew_lock(redis, lock_key, token, lock_ttl))
+            try:
+                if await redis.get(done_key) == fingerprint:
+                    return False
+                await func()
+                await redis.set(done_key, fingerprint, ex=done_ttl)
+                return True
+            finally:
+                renew.cancel()
+                await asyncio.gather(renew, return_exceptions=True)
+                if await redis.get(lock_key) == token:
+                    await redis.delete(lock_key)
+        await asyncio.sleep(poll)
@@ -0,0 +1,42 @@
+import logging
+
+from app.services.storage import StorageError
+from app.worker import celery_app, run_async
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, max_retries=5, default_retry_delay=30)
+def process_upload(self, upload_id: str) -> str:
+    """Extract metadata and a thumbnail for a direct-to-storage upload."""
+    from app.services.direct_uploads import process_direct_upload
+
+    try:
+        return run_async(process_direct_upload(upload_id))
+    except StorageError as exc:
+        logger.warning("[TASK] Storage unavailable for upload %s: %s", upload_id, exc)
+        raise self.retry(exc=exc)
+
+
+@celery_app.task(bind=True, max_retries=5, default_retry_delay=30)
+def convert_model(self, model_id: str, target: str) -> str | None:
+    """Convert a model's file to another format (see app.services.conversions)."""
+    from app.services.conversions import convert_model as convert
+
+    try:
+        return run_async(convert(model_id, target))
+    except StorageError as exc:
+        logger.warning("[TASK] Storage unavailable converting model %s: %s", model_id, exc)
+        raise self.retry(exc=exc)
+
+
+@celery_app.task(bind=True, max_retries=5, default_retry_delay=30)
+def generate_lods(self, sha256: str, file_type: str) -> list[int]:
+    """Simplify a dense model into levels of detail (see app.services.lods)."""
+    from app.services.lods import generate
+
+    try:
+        return run_async(generate(sha256, file_type))
+    except StorageError as exc:
+        logger.warning("[TASK] Storage unavailable for levels of detail of %s: %s", sha256[:12], exc)
+        raise self.retry(exc=exc)
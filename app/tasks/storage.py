@@ -0,0 +1,19 @@
+from dataclasses import asdict
+
+from app.worker import celery_app, run_async
+
+
+@celery_app.task
+def collect_garbage() -> dict:
+    """Advance the orphaned-file collector by one run (see app.services.storage_gc)."""
+    from app.services.storage_gc import collect_garbage as collect
+
+    return asdict(run_async(collect()))
+
+
+@celery_app.task
+def rebalance_tiers() -> dict:
+    """Promote cold model files that are read again, demote the ones nobody reads."""
+    from app.services.tiering import rebalance
+
+    return asdict(run_async(rebalance()))
@@ -0,0 +1,108 @@
+"""
+Content-coding helpers shared by the compression middleware and the
+precompressed static file server.
+
+brotli and zstandard are optional: when a module is missing its coding is
+simply never offered, and gzip (stdlib) remains.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Server preference, best first. Only codings whose library is importable.
+AVAILABLE_ENCODINGS: tuple[str, ...] = tuple(
+    name
+    for name, lib in (("zstd", zstandard), ("br", brotli), ("gzip", zlib))
+    if lib is not None
+)
+
+# Dynamic responses worth compressing on the fly. Images, video, archives and
+# 3MF (a zip) are already compressed; mesh downloads use precompressed files.
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+
+
+def is_compressible(content_type: str | None) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith("+json")
+        or media_type.endswith("+xml")
+    )
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """``"gzip, br;q=0.8, *;q=0"`` -> ``{"gzip": 1.0, "br": 0.8, "*": 0.0}``"""
+    accepted: dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def negotiate(header: str | None, offered: tuple[str, ...] = AVAILABLE_ENCODINGS) -> str | None:
+    """Pick the coding from OFFERED (in preference order) the client rates highest."""
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in offered:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class StreamEncoder:
+    """Incremental encoder; each chunk is flushed so streamed bodies stay live."""
+
+    def __init__(self, encoding: str, level: int | None = None) -> None:
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=4 if level is None else level)
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+        else:
+            raise ValueError(f"Unsupported content coding: {encoding}")
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "gzip":
+            out = self._obj.compress(data)
+            return out + self._obj.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            out = self._obj.process(data)
+            return out + (self._obj.finish() if final else self._obj.flush())
+        out = self._obj.compress(data)
+        if final:
+            return out + self._obj.flush()
+        return out + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
@@ -47,13 +47,13 @@ def get_storage_paths(upload_dir: str, filename: str) -> tuple[str, str]:
 
 async def save_upload_to_disk(upload_file: UploadFile, destination_path: str) -> None:
     """
-    Save an UploadFile to disk at destination_path.
+    Save an UploadFile to disk at destination_path (streamed, written off the
+    event loop, renamed into place when complete).
     """
-    dest = Path(destination_path)
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    with dest.open("wb") as f:
-        while chunk := await upload_file.read(1024 * 1024):
-            f.write(chunk)
+    from app.services.storage import LocalStorage, iter_upload
+
+    dest = Path(destination_path).resolve()
+    await LocalStorage(dest.parent).put(dest.name, iter_upload(upload_file))
 
 
 def move_file(src: str, dest: str) -> None:
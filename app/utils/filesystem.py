@@ -3,7 +3,6 @@
 from pathlib import Path
 import uuid
 import logging
-import trimesh
 
 from app.config.settings import settings
 
@@ -55,6 +54,8 @@ def ensure_user_model_thumbnails(user_id: str) -> None:
             continue
 
         try:
+            import trimesh  # deferred: most scans find nothing to render
+
             mesh = trimesh.load(str(model_file), force="mesh")
             scene = mesh.scene()
             png = scene.save_image(resolution=(512, 512), visible=False)
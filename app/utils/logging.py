@@ -1,15 +1,11 @@
 import logging
 import os
 import platform
-import subprocess
 import sys
 import time
 
 import psutil
-import psycopg2
-import redis
 from prometheus_client import Gauge
-from psycopg2 import OperationalError
 
 from app.utils.boot_messages import random_boot_message
 
@@ -73,6 +69,9 @@ gpu_info = Gauge("makerworks_gpu_info", "GPU detected on system (1 if present, 0
 
 # ────────────── CHECKERS ──────────────
 def check_redis_available(url: str) -> bool:
+    # Sync client and psycopg2 are only needed by the banner; import lazily.
+    import redis
+
     try:
         r = redis.Redis.from_url(url, socket_connect_timeout=1)
         return r.ping()
@@ -80,6 +79,9 @@ def check_redis_available(url: str) -> bool:
         return False
 
 def check_postgres_available() -> bool:
+    import psycopg2
+    from psycopg2 import OperationalError
+
     try:
         dsn = os.getenv("DATABASE_URL", "")
         clean_dsn = dsn.replace("postgresql+psycopg2://", "postgresql://")
@@ -90,30 +92,9 @@ def check_postgres_available() -> bool:
         return False
 
 def detect_gpu() -> str:
-    try:
-        result = subprocess.run(
-            ["nvidia-smi", "--query-gpu=name", "--format=csv,noheader"],
-            capture_output=True, text=True, check=True
-        )
-        gpus = [line.strip() for line in result.stdout.splitlines() if line.strip()]
-        if gpus:
-            return ", ".join(gpus)
-    except Exception:
-        pass
+    from app.utils.system_info import get_static_host_facts
 
-    try:
-        import torch
-        if torch.cuda.is_available():
-            gpus = [torch.cuda.get_device_name(i) for i in range(torch.cuda.device_count())]
-            if gpus:
-                return ", ".join(gpus)
-    except ImportError:
-        pass
-
-    if platform.system() == "Darwin" and platform.machine().startswith("arm"):
-        return "Apple Metal"
-
-    return "None"
+    return get_static_host_facts()["gpu"]
 
 # ────────────── BANNER ──────────────
 def startup_banner():
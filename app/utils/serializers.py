@@ -1,3 +1,10 @@
+from functools import lru_cache
+from typing import Any, Iterable
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import PydanticUndefined, to_json
+
 from app.models import ModelMetadata
 
 
@@ -9,3 +16,67 @@ def model_to_dict(model: ModelMetadata):
         "uploaded_at": model.uploaded_at.isoformat(),
         "preview_image": model.preview_image,
     }
+
+
+# ────── Fast list responses ──────
+#
+# FastAPI validates a returned list once per item and then re-encodes it
+# through `jsonable_encoder`. For large lists it is much cheaper to validate
+# (or, for our own ORM rows, simply project) the rows in one pass and hand the
+# encoded bytes straight to the response.
+
+
+class JSONBytesResponse(Response):
+    """A response whose body is already-encoded JSON."""
+
+    media_type = "application/json"
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[schema])
+
+
+@lru_cache(maxsize=None)
+def _projection(schema: type[BaseModel], by_alias: bool) -> tuple:
+    plan = []
+    for name, field in schema.model_fields.items():
+        key = (field.serialization_alias or field.alias or name) if by_alias else name
+        default = None if field.default is PydanticUndefined else field.default
+        plan.append((key, name, default))
+    return tuple(plan)
+
+
+def validated_json(
+    schema: type[BaseModel], rows: Iterable[Any], by_alias: bool = True
+) -> bytes:
+    """Validate ROWS (dicts or ORM objects) against SCHEMA in one call and encode."""
+    adapter = _list_adapter(schema)
+    items = adapter.validate_python(list(rows), from_attributes=True)
+    return adapter.dump_json(items, by_alias=by_alias)
+
+
+def trusted_json(
+    schema: type[BaseModel], rows: Iterable[Any], by_alias: bool = True
+) -> bytes:
+    """
+    Encode ROWS shaped like SCHEMA without validating them.
+
+    Only for rows we produced ourselves (ORM results, server-built dicts):
+    attributes are read by field name and missing ones fall back to the field
+    default. UUIDs and datetimes are encoded natively.
+    """
+    plan = _projection(schema, by_alias)
+    rows = list(rows)
+    get = dict.get if rows and isinstance(rows[0], dict) else getattr
+    return to_json([{key: get(row, name, default) for key, name, default in plan} for row in rows])
+
+
+def json_list_response(
+    schema: type[BaseModel],
+    rows: Iterable[Any],
+    trusted: bool = False,
+    by_alias: bool = True,
+) -> JSONBytesResponse:
+    encode = trusted_json if trusted else validated_json
+    return JSONBytesResponse(encode(schema, rows, by_alias=by_alias))
@@ -0,0 +1,732 @@
+"""
+File server for ``/uploads``.
+
+``UploadsFileServer`` is a small ASGI app tuned for model files, thumbnails
+and avatars:
+
+- strong ETags from a SHA-256 of the content (cached per inode/mtime/size),
+  so unchanged files revalidate with a 304 even across deploys and hosts;
+- ``Cache-Control: immutable`` for content-addressed URLs (``?v=<hash>``, see
+  ``content_url``), ``no-cache`` (always revalidate) for everything else;
+- single-range ``Range`` / ``If-Range`` support for partial STL downloads and
+  viewers that stream;
+- zero-copy transfer through the ASGI ``zerocopy`` / ``pathsend`` extensions
+  when the server offers them (they map to ``os.sendfile``), chunked reads
+  in a worker thread otherwise.
+
+STL and OBJ files compress well (ASCII STL by 70-80%, binary STL by 20-40%)
+but are too big to recompress on every request. At ingest we write
+``model.stl.br`` / ``model.stl.gz`` next to the original once, and the
+server hands out the best variant the client accepts with the matching
+``Content-Encoding``.
+
+Model files in the cold tier (``app.services.tiering``) exist only as
+``model.stl.zst``: clients that accept zstd get that file as is, everyone
+else a decompressed stream.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import stat
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+from typing import Awaitable, Callable
+from urllib.parse import parse_qs, quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Message, Receive, Scope, Send
+
+from app.utils.compression import brotli, negotiate
+
+logger = logging.getLogger(__name__)
+
+mimetypes.add_type("model/stl", ".stl")
+mimetypes.add_type("model/obj", ".obj")
+mimetypes.add_type("model/3mf", ".3mf")
+mimetypes.add_type("model/gltf-binary", ".glb")
+mimetypes.add_type("application/vnd.makerworks.mesh", ".mwm")  # app.utils.compact_mesh
+
+PRECOMPRESS_SUFFIXES = {".stl", ".obj"}
+# Cold-tier copies (app.services.tiering); kept here to avoid importing it
+COLD_SUFFIX = ".zst"
+BROTLI_QUALITY = int(os.getenv("PRECOMPRESS_BROTLI_QUALITY", 9))
+GZIP_LEVEL = 9
+# Keep a variant only if it saves at least this fraction of the original.
+MIN_SAVING = 0.05
+
+# content coding -> file suffix, in serving preference order
+VARIANTS: dict[str, str] = {"br": ".br", "gzip": ".gz"} if brotli else {"gzip": ".gz"}
+
+
+def variant_path(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + VARIANTS[encoding])
+
+
+def _encode(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def write_precompressed_variants(path: Path) -> list[Path]:
+    """
+    Write compressed siblings of PATH for every available coding and return
+    the ones kept. Variants that don't save MIN_SAVING are discarded.
+    Blocking and CPU-heavy: run it off the event loop.
+    """
+    path = Path(path)
+    if path.suffix.lower() not in PRECOMPRESS_SUFFIXES:
+        return []
+    data = path.read_bytes()
+    written = []
+    for encoding in VARIANTS:
+        target = variant_path(path, encoding)
+        encoded = _encode(data, encoding)
+        if len(encoded) > len(data) * (1 - MIN_SAVING):
+            target.unlink(missing_ok=True)
+            continue
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_bytes(encoded)
+        os.replace(tmp, target)
+        written.append(target)
+    if written:
+        logger.info(
+            "🗜️ Precompressed %s (%d bytes) -> %s",
+            path.name,
+            len(data),
+            ", ".join(f"{p.suffix[1:]}={p.stat().st_size}" for p in written),
+        )
+    return written
+
+
+def remove_precompressed_variants(path: Path) -> None:
+    for encoding in VARIANTS:
+        variant_path(Path(path), encoding).unlink(missing_ok=True)
+
+
+# ────── Content hashes ──────
+
+HASH_CACHE_SIZE = 8192
+CHUNK_SIZE = 256 * 1024
+_hash_cache: "OrderedDict[str, tuple[tuple, str]]" = OrderedDict()
+_hash_lock = Lock()
+
+
+def _fingerprint(st: os.stat_result) -> tuple:
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def content_hash(path: str | Path, st: os.stat_result | None = None) -> str:
+    """SHA-256 hex digest of PATH, cached until the file changes."""
+    path = str(path)
+    st = st or os.stat(path)
+    key = _fingerprint(st)
+    with _hash_lock:
+        cached = _hash_cache.get(path)
+        if cached and cached[0] == key:
+            _hash_cache.move_to_end(path)
+            return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    value = digest.hexdigest()
+
+    with _hash_lock:
+        _hash_cache[path] = (key, value)
+        _hash_cache.move_to_end(path)
+        while len(_hash_cache) > HASH_CACHE_SIZE:
+            _hash_cache.popitem(last=False)
+    return value
+
+
+def content_url(base_url: str, path: str | Path, rel_path: str) -> str:
+    """
+    Content-addressed URL for a file under /uploads: ``...?v=<hash>``. The
+    file server marks such URLs immutable, so clients never re-request them.
+    """
+    return f"{base_url}/uploads/{rel_path}?v={content_hash(path)[:16]}"
+
+
+async def object_url(storage, key: str, base_url: str) -> str:
+    """URL to store for a freshly written object: ``content_url`` for local files."""
+    from app.services.storage.layout import public_path
+
+    rel_path = public_path(key)
+    path = storage.local_path(key)
+    if path is None:
+        return f"{base_url}/uploads/{rel_path}"
+    return await anyio.to_thread.run_sync(content_url, base_url, path, rel_path)
+
+
+# ────── Range parsing ──────
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None | bool:
+    """
+    Parse a single ``bytes=`` range against SIZE.
+
+    Returns ``(start, end)`` inclusive, ``None`` to ignore the header (bad
+    syntax or several ranges: the full body is served) or ``False`` if the
+    range cannot be satisfied (416).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if first == "":
+            if not last:
+                return None
+            length = int(last)
+            if length == 0:
+                return False
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return False
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+# ────── Server ──────
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+
+
+# offload mode -> response header the front proxy acts on
+OFFLOAD_HEADERS = {"nginx": b"x-accel-redirect", "sendfile": b"x-sendfile"}
+
+# (storage key, served from the cold tier)
+AccessHook = Callable[[str, bool], Awaitable[None]]
+
+
+def _route_path(scope) -> str:
+    """The request path below the mount point (``root_path``)."""
+    path, root = scope["path"], scope.get("root_path", "")
+    if root and (path == root or path.startswith(root + "/")):
+        return path[len(root) :]
+    return path
+
+
+class UploadsFileServer:
+    """
+    ASGI app serving files below DIRECTORY (see module docstring). Request
+    paths are mapped to files by ``app.services.storage.layout``, which
+    hides the model shards and keeps pre-migration paths working.
+
+    With OFFLOAD set, headers and conditional requests are still answered
+    here but the body is left to the front proxy: the response carries
+    ``X-Accel-Redirect: <offload_prefix>/<path>`` (nginx) or
+    ``X-Sendfile: <offload_root>/<path>`` (Apache, lighttpd) instead.
+    Cold files are always sent from here.
+
+    ON_ACCESS, if given, is awaited with the storage key and whether the
+    file was cold for every GET that returns a body.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        offload: str | None = None,
+        offload_prefix: str = "/_protected_uploads",
+        offload_root: str | None = None,
+        on_access: AccessHook | None = None,
+    ) -> None:
+        if offload is not None and offload not in OFFLOAD_HEADERS:
+            raise ValueError(f"Unknown uploads offload mode: {offload!r}")
+        self.directory = os.path.realpath(directory)
+        self.offload = offload
+        self.offload_prefix = offload_prefix.rstrip("/")
+        self.offload_root = (offload_root or self.directory).rstrip("/")
+        self.on_access = on_access
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+        await self.serve(scope, send, _route_path(scope).lstrip("/"))
+
+    async def serve(
+        self, scope: Scope, send: Send, rel: str, download_name: str | None = None
+    ) -> None:
+        """Respond with the file at REL (relative to the uploads root)."""
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._empty(send, 405, [(b"allow", b"GET, HEAD")])
+            return
+
+        found = await anyio.to_thread.run_sync(self._locate, rel)
+        if found is None:
+            await self._empty(send, 404)
+            return
+        rel, full_path, st, cold = found
+        if cold:
+            await self._serve_cold(scope, send, rel, full_path, st, download_name)
+            return
+
+        request = Headers(scope=scope)
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        precompressible = os.path.splitext(full_path)[1].lower() in PRECOMPRESS_SUFFIXES
+
+        encoding = None
+        if precompressible and "range" not in request and not self.offload:
+            variant = await anyio.to_thread.run_sync(
+                self._pick_variant, full_path, st, request.get("accept-encoding")
+            )
+            if variant is not None:
+                encoding, variant_st = variant
+                body_path, body_st = full_path + VARIANTS[encoding], variant_st
+        if encoding is None:
+            body_path, body_st = full_path, st
+
+        identity_hash = await anyio.to_thread.run_sync(content_hash, full_path, st)
+        body_hash = (
+            identity_hash
+            if encoding is None
+            else await anyio.to_thread.run_sync(content_hash, body_path, body_st)
+        )
+        etag = f'"{body_hash[:32]}"'
+        versioned = query.get("v", [""])[0]
+        immutable = bool(versioned) and identity_hash.startswith(versioned)
+
+        headers = [
+            (b"content-type", _media_type(full_path).encode("latin-1")),
+            (b"etag", etag.encode("latin-1")),
+            (b"last-modified", formatdate(st.st_mtime, usegmt=True).encode("latin-1")),
+            (b"cache-control", (IMMUTABLE if immutable else REVALIDATE).encode("latin-1")),
+            (b"accept-ranges", b"bytes"),
+            (b"x-content-type-options", b"nosniff"),
+        ]
+        if precompressible:
+            headers.append((b"vary", b"Accept-Encoding"))
+        if encoding is not None:
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+        if download_name:
+            headers.append((b"content-disposition", _attachment(download_name)))
+
+        if _not_modified(request, etag, st.st_mtime):
+            await self._empty(send, 304, [h for h in headers if h[0] != b"content-type"])
+            return
+        if self.on_access is not None and scope["method"] == "GET":
+            await self.on_access(rel, False)
+
+        if self.offload:
+            # The proxy answers Range and precompressed variants itself.
+            target = (
+                f"{self.offload_prefix}/{quote(rel)}"
+                if self.offload == "nginx"
+                else f"{self.offload_root}/{rel}"
+            )
+            headers = [h for h in headers if h[0] != b"accept-ranges"]
+            headers.append((OFFLOAD_HEADERS[self.offload], target.encode("utf-8")))
+            await self._empty(send, 200, headers)
+            return
+
+        size = body_st.st_size
+        start, end, status = 0, size - 1, 200
+        range_header = request.get("range")
+        if range_header and encoding is None and _if_range_matches(request, etag, st.st_mtime):
+            parsed = parse_range(range_header, size)
+            if parsed is False:
+                await self._empty(
+                    send, 416, headers + [(b"content-range", f"bytes */{size}".encode())]
+                )
+                return
+            if parsed is not None:
+                start, end = parsed
+                status = 206
+                headers.append((b"content-range", f"bytes {start}-{end}/{size}".encode()))
+
+        length = end - start + 1 if size else 0
+        headers.append((b"content-length", str(length).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        if scope["method"] == "HEAD" or length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self._send_file(scope, send, body_path, start, length, whole=status == 200)
+
+    def _locate(self, rel: str) -> tuple[str, str, os.stat_result, bool] | None:
+        """
+        Storage key, filesystem path and stat of the file /uploads/REL
+        names, and whether it is the cold (zstd) copy.
+        """
+        from app.services.storage.layout import candidate_keys
+
+        for key in candidate_keys(rel):
+            full_path = self._resolve(key)
+            if full_path is None:
+                continue
+            for path, cold in ((full_path, False), (full_path + COLD_SUFFIX, True)):
+                st = _stat_file(path)
+                if st is not None:
+                    return key, path, st, cold
+        return None
+
+    async def _serve_cold(
+        self,
+        scope: Scope,
+        send: Send,
+        key: str,
+        path: str,
+        st: os.stat_result,
+        download_name: str | None,
+    ) -> None:
+        """Respond with a cold file: the zstd frame as is, or decompressed."""
+        from app.services.tiering import decompress
+
+        request = Headers(scope=scope)
+        size = await anyio.to_thread.run_sync(_frame_content_size, path)
+        encoding = None
+        if "range" not in request and negotiate(request.get("accept-encoding"), ("zstd",)):
+            encoding = "zstd"
+        stored_hash = await anyio.to_thread.run_sync(content_hash, path, st)
+        etag = f'"{stored_hash[:32]}{"-zstd" if encoding else ""}"'
+
+        headers = [
+            (b"content-type", _media_type(key).encode("latin-1")),
+            (b"etag", etag.encode("latin-1")),
+            (b"last-modified", formatdate(st.st_mtime, usegmt=True).encode("latin-1")),
+            (b"cache-control", REVALIDATE.encode("latin-1")),
+            (b"accept-ranges", b"bytes"),
+            (b"x-content-type-options", b"nosniff"),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        if encoding is not None:
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+        if download_name:
+            headers.append((b"content-disposition", _attachment(download_name)))
+        if _not_modified(request, etag, st.st_mtime):
+            await self._empty(send, 304, [h for h in headers if h[0] != b"content-type"])
+            return
+        if self.on_access is not None and scope["method"] == "GET":
+            await self.on_access(key, True)
+
+        if encoding is not None:
+            headers.append((b"content-length", str(st.st_size).encode()))
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            if scope["method"] == "HEAD" or not st.st_size:
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await self._send_file(scope, send, path, 0, st.st_size, whole=True)
+            return
+
+        start, length, status = 0, size, 200
+        range_header = request.get("range")
+        if range_header and _if_range_matches(request, etag, st.st_mtime):
+            parsed = parse_range(range_header, size)
+            if parsed is False:
+                await self._empty(
+                    send, 416, headers + [(b"content-range", f"bytes */{size}".encode())]
+                )
+                return
+            if parsed is not None:
+                start, end = parsed
+                length, status = end - start + 1, 206
+                headers.append((b"content-range", f"bytes {start}-{end}/{size}".encode()))
+
+        headers.append((b"content-length", str(length).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        if scope["method"] != "HEAD" and length:
+            async for chunk in decompress(_read_chunks(path), start, length, CHUNK_SIZE):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    def _resolve(self, rel: str) -> str | None:
+        if not rel or any(part.startswith(".") for part in rel.split("/")):
+            return None
+        full = os.path.realpath(os.path.join(self.directory, rel))
+        if os.path.commonpath([full, self.directory]) != self.directory:
+            return None
+        return full
+
+    @staticmethod
+    def _pick_variant(
+        full_path: str, st: os.stat_result, accept_encoding: str | None
+    ) -> tuple[str, os.stat_result] | None:
+        available = {}
+        for enc, suffix in VARIANTS.items():
+            vst = _stat_file(full_path + suffix)
+            if vst is not None and vst.st_mtime >= st.st_mtime:
+                available[enc] = vst
+        encoding = negotiate(accept_encoding, tuple(available))
+        return (encoding, available[encoding]) if encoding else None
+
+    @staticmethod
+    async def _empty(send: Send, status: int, headers: list | None = None) -> None:
+        headers = [h for h in headers or [] if h[0] != b"content-length"]
+        headers.append((b"content-length", b"0"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    @staticmethod
+    async def _send_file(
+        scope: Scope, send: Send, path: str, start: int, length: int, whole: bool
+    ) -> None:
+        extensions = scope.get("extensions") or {}
+        if whole and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": path})
+            return
+        if "http.response.zerocopy" in extensions:
+            with open(path, "rb") as f:
+                await send(
+                    {
+                        "type": "http.response.zerocopy",
+                        "file": f,
+                        "offset": start,
+                        "count": length,
+                        "more_body": False,
+                    }
+                )
+            return
+
+        fd = await anyio.to_thread.run_sync(os.open, path, os.O_RDONLY)
+        try:
+            offset, remaining = start, length
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(
+                    os.pread, fd, min(CHUNK_SIZE, remaining), offset
+                )
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": remaining > 0}
+                )
+            if remaining > 0:  # file shrank underneath us
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            os.close(fd)
+
+
+async def _read_chunks(path: str):
+    fd = await anyio.to_thread.run_sync(os.open, path, os.O_RDONLY)
+    try:
+        offset = 0
+        while chunk := await anyio.to_thread.run_sync(os.pread, fd, CHUNK_SIZE, offset):
+            offset += len(chunk)
+            yield chunk
+    finally:
+        os.close(fd)
+
+
+def _frame_content_size(path: str) -> int:
+    from app.services.tiering import FRAME_HEADER_MAX, content_size
+
+    with open(path, "rb") as f:
+        return content_size(f.read(FRAME_HEADER_MAX))
+
+
+def _stat_file(path: str) -> os.stat_result | None:
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+
+def _media_type(path: str) -> str:
+    media_type, _ = mimetypes.guess_type(path)
+    media_type = media_type or "application/octet-stream"
+    if media_type.startswith("text/"):
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def _attachment(filename: str) -> bytes:
+    fallback = filename.encode("ascii", "ignore").decode().replace('"', "") or "download"
+    return f'attachment; filename="{fallback}"; filename*=UTF-8\'\'{quote(filename)}'.encode(
+        "latin-1"
+    )
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified(request: Headers, etag: str, mtime: float) -> bool:
+    if_none_match = request.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _if_range_matches(request: Headers, etag: str, mtime: float) -> bool:
+    if_range = request.get("if-range")
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        return if_range.strip() == etag  # strong comparison only
+    try:
+        return int(mtime) == int(parsedate_to_datetime(if_range).timestamp())
+    except (TypeError, ValueError):
+        return False
+
+
+class StorageObjectServer:
+    """
+    ``/uploads`` when objects live in a remote backend (see
+    ``app.services.storage``). With REDIRECT (S3) clients get a 307 to a
+    presigned URL and fetch the bytes from the object store directly;
+    otherwise, and always for cold objects, the object is streamed through
+    (decompressed), with ETag and Range support. ON_ACCESS as for
+    ``UploadsFileServer``.
+    """
+
+    def __init__(self, storage, redirect: bool = False, on_access: AccessHook | None = None) -> None:
+        self.storage = storage
+        self.redirect = redirect
+        self.on_access = on_access
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+        await self.serve(scope, send, _route_path(scope).lstrip("/"))
+
+    async def serve(
+        self, scope: Scope, send: Send, rel: str, download_name: str | None = None
+    ) -> None:
+        from app.services import tiering
+        from app.services.storage import InvalidKey
+        from app.services.storage.layout import candidate_keys
+
+        if scope["method"] not in ("GET", "HEAD"):
+            await UploadsFileServer._empty(send, 405, [(b"allow", b"GET, HEAD")])
+            return
+        found = None
+        if any(part.startswith(".") for part in rel.split("/")):
+            rel = ""  # quarantine, collector state: never served
+        for key in candidate_keys(rel):
+            try:
+                found = await tiering.stat(self.storage, key)
+            except InvalidKey:
+                continue
+            if found is not None:
+                rel = key
+                break
+        if found is None:
+            await UploadsFileServer._empty(send, 404)
+            return
+        info, cold = found
+
+        if self.redirect and not cold:
+            if self.on_access is not None and scope["method"] == "GET":
+                await self.on_access(rel, False)
+            location = self.storage.presigned_url(rel, download_name=download_name)
+            await UploadsFileServer._empty(
+                send,
+                307,
+                [(b"location", location.encode("latin-1")), (b"cache-control", b"private, no-store")],
+            )
+            return
+
+        request = Headers(scope=scope)
+        etag = f'"{info.etag}"'
+        headers = [
+            (b"content-type", _media_type(rel).encode("latin-1")),
+            (b"etag", etag.encode("latin-1")),
+            (b"last-modified", formatdate(info.last_modified, usegmt=True).encode("latin-1")),
+            (b"cache-control", REVALIDATE.encode("latin-1")),
+            (b"accept-ranges", b"bytes"),
+            (b"x-content-type-options", b"nosniff"),
+        ]
+        if download_name:
+            headers.append((b"content-disposition", _attachment(download_name)))
+        if _not_modified(request, etag, info.last_modified):
+            await UploadsFileServer._empty(send, 304, headers[1:])
+            return
+        if self.on_access is not None and scope["method"] == "GET":
+            await self.on_access(rel, cold)
+
+        start, length, status = 0, info.size, 200
+        range_header = request.get("range")
+        if range_header and _if_range_matches(request, etag, info.last_modified):
+            parsed = parse_range(range_header, info.size)
+            if parsed is False:
+                await UploadsFileServer._empty(
+                    send, 416, headers + [(b"content-range", f"bytes */{info.size}".encode())]
+                )
+                return
+            if parsed is not None:
+                start, end = parsed
+                length, status = end - start + 1, 206
+                headers.append((b"content-range", f"bytes {start}-{end}/{info.size}".encode()))
+
+        headers.append((b"content-length", str(length).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        if scope["method"] != "HEAD" and length:
+            async for chunk in tiering.stream(self.storage, rel, start, length, CHUNK_SIZE):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+
+class UploadFileResponse(Response):
+    """
+    Return from a route to send an uploaded file through the shared uploads
+    server (ETag, Range, offload or presigned redirect and all), e.g. after
+    an access check.
+    """
+
+    def __init__(
+        self, rel_path: str, filename: str | None = None, headers: dict[str, str] | None = None
+    ) -> None:
+        super().__init__()
+        self.rel_path = rel_path.lstrip("/")
+        self.filename = filename
+        # Added to whatever the uploads server answers (e.g. a Link header)
+        self.extra_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in (headers or {}).items()
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message["headers"], *self.extra_headers]}
+            await send(message)
+
+        await get_uploads_server().serve(
+            scope, send_with_headers if self.extra_headers else send, self.rel_path, self.filename
+        )
+        if self.background is not None:
+            await self.background()
+
+
+@lru_cache()
+def get_uploads_server() -> UploadsFileServer | StorageObjectServer:
+    from app.config.settings import settings
+    from app.services.storage import LocalStorage, get_storage
+    from app.services.tiering import record_access
+
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        return StorageObjectServer(storage, redirect=storage.name == "s3", on_access=record_access)
+
+    storage.root.mkdir(parents=True, exist_ok=True)
+    return UploadsFileServer(
+        storage.root,
+        offload=settings.uploads_offload or None,
+        offload_prefix=settings.uploads_offload_prefix,
+        offload_root=settings.uploads_offload_root,
+        on_access=record_access,
+    )
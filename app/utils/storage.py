@@ -10,9 +10,10 @@ def is_valid_model_file(filename: str) -> bool:
 
 
 async def save_upload_to_disk(file: UploadFile, dest_path: str) -> None:
-    with open(dest_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    from app.services.storage import LocalStorage, iter_upload
+
+    directory, name = os.path.split(os.path.abspath(dest_path))
+    await LocalStorage(directory).put(name, iter_upload(file))
 
 
 def generate_unique_filename(original_name: str) -> str:
@@ -9,6 +9,7 @@ import sys
 import time
 import subprocess
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger("makerworks")
 
@@ -31,9 +32,25 @@ YELLOW = "\033[93m"
 CYAN = "\033[96m"
 
 # ────────────── SYSTEM SNAPSHOT ──────────────
-def get_system_status_snapshot() -> dict:
+@lru_cache(maxsize=1)
+def get_static_host_facts() -> dict:
     """
-    Return a minimal system status snapshot dict.
+    Return host facts that cannot change while the process runs.
+
+    Probed once per process: the GPU check spawns `nvidia-smi`, so call this
+    from a thread (e.g. `asyncio.to_thread`) when on the event loop.
+    """
+    return {
+        "platform": f"{platform.system()} {platform.release()}",
+        "cpu_cores": psutil.cpu_count(),
+        "memory_gb": round(psutil.virtual_memory().total / (1024 ** 3), 2),
+        "gpu": detect_gpu(),
+    }
+
+
+def sample_dynamic_status() -> dict:
+    """
+    Return the cheap, changing part of the snapshot (uptime, load, memory use).
     """
     uptime_sec = time.time() - psutil.boot_time()
     try:
@@ -41,19 +58,28 @@ def get_system_status_snapshot() -> dict:
     except Exception:
         load1 = load5 = load15 = None
 
-    gpu = detect_gpu()
-
     return {
-        "platform": f"{platform.system()} {platform.release()}",
-        "cpu_cores": psutil.cpu_count(),
-        "memory_gb": round(psutil.virtual_memory().total / (1024 ** 3), 2),
         "uptime_seconds": int(uptime_sec),
         "load_avg": {
             "1min": load1,
             "5min": load5,
             "15min": load15
         },
-        "gpu": gpu
+        "memory_percent": psutil.virtual_memory().percent,
+    }
+
+
+def get_system_status_snapshot() -> dict:
+    """
+    Return a minimal system status snapshot dict.
+    """
+    static = get_static_host_facts()
+    return {
+        "platform": static["platform"],
+        "cpu_cores": static["cpu_cores"],
+        "memory_gb": static["memory_gb"],
+        **sample_dynamic_status(),
+        "gpu": static["gpu"],
     }
 
 
@@ -86,11 +112,12 @@ def detect_gpu() -> str:
 
 
 # ────────────── STARTUP BANNER ──────────────
-def startup_banner():
+def startup_banner(snap: dict | None = None):
     """
     Logs a minimal, colorized system banner.
+    Pass a cached snapshot to avoid sampling the host again.
     """
-    snap = get_system_status_snapshot()
+    snap = snap or get_system_status_snapshot()
 
     logger.info(color("🚀 MakerWorks Backend Started", GREEN))
     logger.info(f"{color('🖥️  Platform:', CYAN)} {snap['platform']} | CPU: {snap['cpu_cores']} cores")
@@ -0,0 +1,381 @@
+"""
+Reading and writing 3MF packages.
+
+A 3MF file is a ZIP (an OPC package) whose ``3D/3dmodel.model`` part lists
+mesh objects as XML vertices and triangles, and a build that places them
+with affine transforms. trimesh only handles 3MF through networkx and lxml;
+the core specification is small enough for the standard library.
+
+Reading streams: the model part is inflated straight from the ZIP into an
+expat parser a block at a time, and vertices and triangles are collected
+in fixed-size numpy chunks, so no DOM is built and a package costs about
+its mesh arrays (32 bytes a vertex, 24 a triangle) however large its XML.
+``MAX_TRIANGLES`` and friends cap those arrays: the parse stops at the
+first chunk past a limit, so a small ZIP inflating to a huge mesh costs no
+more than an honest one at the limit.
+"""
+
+import io
+import posixpath
+import zipfile
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO
+from xml.etree import ElementTree
+from xml.parsers import expat
+
+import numpy as np
+
+CORE_NS = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
+MODEL_PART = "3D/3dmodel.model"
+RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+MODEL_RELATIONSHIP = "http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"
+
+# Bytes of XML handed to the parser at a time
+READ_SIZE = 1 << 20
+# Rows per numpy chunk while collecting vertices and triangles
+CHUNK_ROWS = 1 << 16
+# Larger packages are refused: they bound a parse's memory (the mesh
+# arrays, ~0.5 GB at the limit) and time (~2 µs per vertex or triangle)
+MAX_TRIANGLES = 5_000_000
+MAX_VERTICES = MAX_TRIANGLES
+MAX_MODEL_PART_BYTES = 512 * 1024 * 1024
+# Millimetres per model unit; meshes are read in millimetres, like STL
+UNITS = {
+    "micron": 0.001,
+    "millimeter": 1.0,
+    "centimeter": 10.0,
+    "inch": 25.4,
+    "foot": 304.8,
+    "meter": 1000.0,
+}
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    "</Types>"
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Target="/{MODEL_PART}" Id="rel0" Type="{MODEL_RELATIONSHIP}"/>'
+    "</Relationships>"
+)
+
+
+class ThreeMFError(ValueError):
+    """The package is not a readable 3MF file."""
+
+
+def write_3mf(vertices: np.ndarray, faces: np.ndarray, unit: str = "millimeter") -> bytes:
+    """A 3MF package holding one mesh object, built once at the origin."""
+    # 9 significant digits round-trip float32 coordinates exactly
+    vertex_xml = "".join(
+        f'<vertex x="{x:.9g}" y="{y:.9g}" z="{z:.9g}"/>' for x, y, z in vertices.tolist()
+    )
+    triangle_xml = "".join(
+        f'<triangle v1="{a}" v2="{b}" v3="{c}"/>' for a, b, c in faces.tolist()
+    )
+    model = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<model unit="{unit}" xml:lang="en-US" xmlns="{CORE_NS}">'
+        '<resources><object id="1" type="model"><mesh>'
+        f"<vertices>{vertex_xml}</vertices><triangles>{triangle_xml}</triangles>"
+        "</mesh></object></resources>"
+        '<build><item objectid="1"/></build></model>'
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        package.writestr("_rels/.rels", _RELS)
+        package.writestr(MODEL_PART, model)
+    return out.getvalue()
+
+
+def _transform(value: str | None) -> np.ndarray:
+    """4x3 matrix of a 3MF ``transform`` attribute (points are row vectors)."""
+    if not value:
+        return np.vstack([np.eye(3), np.zeros(3)])
+    numbers = value.split()
+    if len(numbers) != 12:
+        raise ThreeMFError(f"Bad transform {value!r}")
+    return np.array(numbers, dtype=np.float64).reshape(4, 3)
+
+
+def _compose(inner: np.ndarray, outer: np.ndarray) -> np.ndarray:
+    return np.vstack([inner[:3] @ outer[:3], inner[3] @ outer[:3] + outer[3]])
+
+
+class _Rows:
+    """An n x 3 array collected row by row, CHUNK_ROWS rows per numpy chunk."""
+
+    def __init__(self, typecode: str) -> None:
+        self.typecode = typecode
+        self.buffer = array(typecode)
+        self.chunks: list[np.ndarray] = []
+
+    def flush(self) -> int:
+        """Move the buffered rows to a chunk; returns how many there were."""
+        if not self.buffer:
+            return 0
+        # frombuffer keeps the full buffer alive; a fresh one takes its place
+        self.chunks.append(np.frombuffer(self.buffer, dtype=self.typecode).reshape(-1, 3))
+        self.buffer = array(self.typecode)
+        return len(self.chunks[-1])
+
+    def finish(self) -> np.ndarray:
+        if not self.chunks:
+            return np.zeros((0, 3), dtype=self.typecode)
+        return self.chunks[0] if len(self.chunks) == 1 else np.vstack(self.chunks)
+
+
+@dataclass
+class _Object:
+    id: str
+    name: str | None
+    vertices: _Rows | np.ndarray = field(default_factory=lambda: _Rows("d"))
+    faces: _Rows | np.ndarray = field(default_factory=lambda: _Rows("q"))
+    components: list[tuple[str, np.ndarray]] = field(default_factory=list)
+    is_mesh: bool = False
+
+
+@dataclass
+class Plate:
+    """Everything on a 3MF build plate, in millimetres."""
+
+    vertices: np.ndarray
+    faces: np.ndarray
+    # One entry per build item, see ``_item_metadata``
+    objects: list[dict]
+
+
+# Element names as expat reports them
+_VERTEX, _TRIANGLE, _OBJECT = (f"{CORE_NS} {tag}" for tag in ("vertex", "triangle", "object"))
+
+
+class _ModelParser:
+    """expat handlers collecting the objects and build items of a model part."""
+
+    def __init__(self, max_triangles: int, max_vertices: int, max_bytes: int) -> None:
+        self.limits = {"vertices": max_vertices, "triangles": max_triangles}
+        self.counts = {"vertices": 0, "triangles": 0}
+        self.max_bytes = max_bytes
+        self.objects: dict[str, _Object] = {}
+        self.items: list[tuple[str, np.ndarray]] = []
+        self.unit = "millimeter"
+        self.current: _Object | None = None
+        self.parser = expat.ParserCreate(namespace_separator=" ")
+        self.parser.StartElementHandler = self.start
+        self.parser.EndElementHandler = self.end
+        # No DTD, so no entity expansion to blow up memory
+        self.parser.StartDoctypeDeclHandler = self.doctype
+
+    @staticmethod
+    def doctype(*args) -> None:
+        raise ThreeMFError("3MF model parts cannot have a DOCTYPE")
+
+    def start(self, name: str, attrs: dict) -> None:
+        # vertex and triangle first: there are millions of them
+        if name == _VERTEX:
+            rows = self.current.vertices
+            rows.buffer.extend((float(attrs["x"]), float(attrs["y"]), float(attrs["z"])))
+            if len(rows.buffer) >= 3 * CHUNK_ROWS:
+                self.flush(rows, "vertices")
+            return
+        if name == _TRIANGLE:
+            rows = self.current.faces
+            rows.buffer.extend((int(attrs["v1"]), int(attrs["v2"]), int(attrs["v3"])))
+            if len(rows.buffer) >= 3 * CHUNK_ROWS:
+                self.flush(rows, "triangles")
+            return
+        ns, _, tag = name.rpartition(" ")
+        if ns != CORE_NS:
+            return
+        obj = self.current
+        if tag == "object":
+            self.current = _Object(attrs["id"], attrs.get("name"))
+        elif tag == "mesh" and obj is not None:
+            obj.is_mesh = True
+        elif tag == "component" and obj is not None:
+            obj.components.append((attrs["objectid"], _transform(attrs.get("transform"))))
+        elif tag == "item":
+            self.items.append((attrs["objectid"], _transform(attrs.get("transform"))))
+        elif tag == "model":
+            self.unit = attrs.get("unit", self.unit)
+
+    def end(self, name: str) -> None:
+        if name != _OBJECT:
+            return
+        obj, self.current = self.current, None
+        self.flush(obj.vertices, "vertices")
+        self.flush(obj.faces, "triangles")
+        obj.vertices, obj.faces = obj.vertices.finish(), obj.faces.finish()
+        if len(obj.faces) and (obj.faces.min() < 0 or obj.faces.max() >= len(obj.vertices)):
+            raise ThreeMFError(f"Object {obj.id} has triangles outside its vertices")
+        self.objects[obj.id] = obj
+
+    def flush(self, rows: _Rows, kind: str) -> None:
+        """Chunk ROWS (a ``kind`` of row), counting them against the limit."""
+        self.counts[kind] += rows.flush()
+        if self.counts[kind] > self.limits[kind]:
+            raise ThreeMFError(f"3MF model has more than {self.limits[kind]} {kind}")
+
+    def feed(self, stream: BinaryIO) -> None:
+        # Counted as inflated: the ZIP directory's sizes are the writer's word
+        inflated = 0
+        while block := stream.read(READ_SIZE):
+            inflated += len(block)
+            if inflated > self.max_bytes:
+                raise ThreeMFError(f"3MF model part is larger than {self.max_bytes} bytes")
+            self.parser.Parse(block, False)
+        self.parser.Parse(b"", True)
+
+
+def _model_part(package: zipfile.ZipFile) -> str:
+    """Name of the package's root model part, from its relationships."""
+    try:
+        rels = ElementTree.fromstring(package.read("_rels/.rels"))
+    except (KeyError, ElementTree.ParseError):
+        return MODEL_PART
+    for rel in rels.iterfind(f"{{{RELS_NS}}}Relationship"):
+        if rel.get("Type") == MODEL_RELATIONSHIP and rel.get("Target"):
+            return posixpath.normpath(rel.get("Target")).lstrip("/")
+    return MODEL_PART
+
+
+def _edge_keys(faces: np.ndarray, n: np.int64, reverse: bool) -> np.ndarray:
+    """Each triangle edge (a, b) as ``a * n + b``, sorted; (b, a) if REVERSE."""
+    keys = faces * n
+    for k in range(3):
+        other = faces[:, (k + 1) % 3]
+        if reverse:
+            keys[:, k] //= n
+            keys[:, k] += other * n
+        else:
+            keys[:, k] += other
+    keys = keys.reshape(-1)
+    keys.sort()
+    return keys
+
+
+def _closed(faces: np.ndarray) -> bool:
+    """Whether every edge of FACES is used once each way (an oriented, closed surface)."""
+    if not len(faces):
+        return False
+    n = np.int64(faces.max() + 1)
+    forward = _edge_keys(faces, n, reverse=False)
+    if not (forward[1:] > forward[:-1]).all():
+        return False
+    return bool((forward == _edge_keys(faces, n, reverse=True)).all())
+
+
+def _item_metadata(obj: _Object, matrix: np.ndarray, vertices: np.ndarray, faces: np.ndarray) -> dict:
+    """
+    What the build item of OBJ adds to the plate, measured on its placed
+    VERTICES and FACES. The transform is MATRIX as the file gives it, in
+    model units; everything else is in millimetres.
+    """
+    lo, hi = (vertices.min(axis=0), vertices.max(axis=0)) if len(vertices) else (np.zeros(3),) * 2
+    volume = None
+    if _closed(faces):
+        # Signed tetrahedra against the origin, a chunk of triangles at a time
+        volume = 0.0
+        for start in range(0, len(faces), CHUNK_ROWS):
+            a, b, c = (vertices[faces[start : start + CHUNK_ROWS, k]] for k in range(3))
+            volume += float(np.einsum("ij,ij->", a, np.cross(b, c)))
+        volume = abs(volume) / 6
+    return {
+        "object_id": obj.id,
+        "name": obj.name,
+        "transform": matrix.reshape(-1).tolist(),
+        "triangles": int(len(faces)),
+        "vertices": int(len(vertices)),
+        "volume": volume,
+        "bbox": (hi - lo).tolist(),
+        "bounds": [lo.tolist(), hi.tolist()],
+    }
+
+
+def _stack(parts: list[np.ndarray]) -> np.ndarray:
+    return parts[0] if len(parts) == 1 else np.vstack(parts)
+
+
+def _offset(faces: np.ndarray, start: int) -> np.ndarray:
+    return faces + start if start else faces
+
+
+def read_plate(
+    source: str | Path | BinaryIO,
+    max_triangles: int | None = None,
+    max_vertices: int | None = None,
+    max_part_bytes: int | None = None,
+) -> Plate:
+    """
+    The mesh (float64 vertices, int64 triangles) of everything on the build
+    plate of the 3MF package at SOURCE, transforms applied, and one
+    metadata entry per build item. A model part beyond the limits (by
+    default ``MAX_TRIANGLES`` and so on) is a ThreeMFError, raised as soon
+    as the parser gets there.
+    """
+    max_part_bytes = max_part_bytes or MAX_MODEL_PART_BYTES
+    model = _ModelParser(
+        max_triangles or MAX_TRIANGLES, max_vertices or MAX_VERTICES, max_part_bytes
+    )
+    try:
+        with zipfile.ZipFile(source) as package:
+            part = package.getinfo(_model_part(package))
+            if part.file_size > max_part_bytes:
+                raise ThreeMFError(f"3MF model part is larger than {max_part_bytes} bytes")
+            with package.open(part) as stream:
+                model.feed(stream)
+    except (zipfile.BadZipFile, KeyError, expat.ExpatError) as e:
+        raise ThreeMFError(f"Not a 3MF package: {e}") from e
+    except (AttributeError, TypeError, ValueError) as e:
+        # AttributeError: a vertex or triangle outside any object
+        if isinstance(e, ThreeMFError):
+            raise
+        raise ThreeMFError(f"Malformed 3MF model: {e}") from e
+
+    scale = UNITS.get(model.unit)
+    if scale is None:
+        raise ThreeMFError(f"Unknown unit {model.unit!r}")
+    objects = model.objects
+
+    def meshes(object_id: str, matrix: np.ndarray, depth: int = 0):
+        obj = objects.get(object_id)
+        if obj is None or depth > 16:
+            raise ThreeMFError(f"Unknown or cyclic object {object_id!r}")
+        if obj.is_mesh:
+            yield obj, matrix
+        for component_id, inner in obj.components:
+            yield from meshes(component_id, _compose(inner, matrix), depth + 1)
+
+    vertex_parts: list[np.ndarray] = []
+    face_parts: list[np.ndarray] = []
+    items = []
+    for object_id, matrix in model.items:
+        placed = list(meshes(object_id, matrix))
+        if not placed:
+            continue
+        item_vertices = _stack([(obj.vertices @ m[:3] + m[3]) * scale for obj, m in placed])
+        offsets = np.cumsum([0] + [len(obj.vertices) for obj, _ in placed])
+        item_faces = _stack([_offset(obj.faces, start) for (obj, _), start in zip(placed, offsets)])
+        items.append(_item_metadata(objects[object_id], matrix, item_vertices, item_faces))
+        face_parts.append(_offset(item_faces, sum(len(part) for part in vertex_parts)))
+        vertex_parts.append(item_vertices)
+    if not face_parts or not sum(len(faces) for faces in face_parts):
+        raise ThreeMFError("3MF package has nothing on its build plate")
+    return Plate(_stack(vertex_parts), _stack(face_parts), items)
+
+
+def read_3mf(source: str | Path | BinaryIO) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vertices (float64, n x 3, in millimetres) and triangles (int64, m x 3)
+    of everything on the build plate of the 3MF package at SOURCE,
+    transforms applied.
+    """
+    plate = read_plate(source)
+    return plate.vertices, plate.faces
@@ -0,0 +1,234 @@
+"""
+ZIP archives written as a stream.
+
+``stream_zip`` turns a sequence of entries into ZIP bytes as it reads
+them: each entry's data is read chunk by chunk, stored or deflated, and
+sent on, so memory stays at one chunk (plus a central-directory record
+per entry) whatever the archive size, and the first bytes go out before
+any file has been read in full. Sizes and CRCs follow each entry in a
+data descriptor (general purpose flag bit 3) because they are only known
+once the data has passed through.
+
+Entries, offsets and counts that do not fit the classic 32/16-bit fields
+use ZIP64 records (APPNOTE 4.5.3), decided per entry from its expected
+size so small archives stay readable by the oldest unzip tools.
+"""
+
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Iterable
+
+import anyio
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP64_COUNT_LIMIT = 0xFFFF
+
+STORED = 0
+DEFLATED = 8
+DEFLATE_LEVEL = 6
+
+_FLAGS = 0x0008 | 0x0800  # data descriptor follows, UTF-8 names
+_VERSION = 20
+_VERSION_ZIP64 = 45
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_DESCRIPTOR = struct.Struct("<IIII")
+_DESCRIPTOR_ZIP64 = struct.Struct("<IIQQ")
+_END = struct.Struct("<IHHHHIIH")
+_END_ZIP64 = struct.Struct("<IQHHIIQQQQ")
+_END_ZIP64_LOCATOR = struct.Struct("<IIQI")
+
+
+@dataclass
+class ZipEntry:
+    name: str
+    data: AsyncIterator[bytes]
+    size: int | None = None  # expected uncompressed size; None: assume it may be huge
+    modified: datetime | None = None
+    compress: bool = True
+
+
+@dataclass
+class _Record:
+    name: bytes
+    method: int
+    time: int
+    date: int
+    crc: int
+    compressed: int
+    size: int
+    offset: int
+    zip64: bool
+
+
+def _dos_time(moment: datetime | None) -> tuple[int, int]:
+    moment = moment or datetime.now()
+    if moment.year < 1980:
+        return 0, (1 << 5) | 1  # 1980-01-01, the earliest DOS date
+    time = (moment.hour << 11) | (moment.minute << 5) | (moment.second // 2)
+    date = ((moment.year - 1980) << 9) | (moment.month << 5) | moment.day
+    return time, date
+
+
+def _needs_zip64(size: int | None) -> bool:
+    # Deflate can grow incompressible data by a few bytes per 16 KiB block
+    return size is None or size + size // 1000 + 64 >= ZIP64_LIMIT
+
+
+def unique_names(names: Iterable[str]) -> list[str]:
+    """NAMES with later duplicates renamed ``part (2).stl``, ``part (3).stl``..."""
+    seen: set[str] = set()
+    unique = []
+    for name in names:
+        candidate, n = name, 1
+        while candidate.lower() in seen:
+            n += 1
+            stem, dot, ext = name.rpartition(".")
+            candidate = f"{stem} ({n}).{ext}" if dot and stem else f"{name} ({n})"
+        seen.add(candidate.lower())
+        unique.append(candidate)
+    return unique
+
+
+async def _aiter(entries: Iterable[ZipEntry] | AsyncIterable[ZipEntry]) -> AsyncIterator[ZipEntry]:
+    if isinstance(entries, AsyncIterable):
+        async for entry in entries:
+            yield entry
+    else:
+        for entry in entries:
+            yield entry
+
+
+async def stream_zip(
+    entries: Iterable[ZipEntry] | AsyncIterable[ZipEntry],
+) -> AsyncIterator[bytes]:
+    """
+    Yield a ZIP archive of ENTRIES, reading each entry's data once, in
+    order. ENTRIES may be produced lazily (an async iterable), so looking
+    up the next file need not delay the first byte.
+    """
+    records: list[_Record] = []
+    offset = 0
+
+    async for entry in _aiter(entries):
+        name = entry.name.replace("\\", "/").lstrip("/").encode("utf-8")
+        method = DEFLATED if entry.compress else STORED
+        time, date = _dos_time(entry.modified)
+        zip64 = _needs_zip64(entry.size)
+
+        extra = struct.pack("<HHQQ", 0x0001, 16, 0, 0) if zip64 else b""
+        header = _LOCAL_HEADER.pack(
+            0x04034B50,
+            _VERSION_ZIP64 if zip64 else _VERSION,
+            _FLAGS,
+            method,
+            time,
+            date,
+            0,
+            ZIP64_LIMIT if zip64 else 0,
+            ZIP64_LIMIT if zip64 else 0,
+            len(name),
+            len(extra),
+        )
+        yield header + name + extra
+        record = _Record(name, method, time, date, 0, 0, 0, offset, zip64)
+        offset += len(header) + len(name) + len(extra)
+
+        crc, size, compressed = 0, 0, 0
+        deflater = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -15) if entry.compress else None
+        async for chunk in entry.data:
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            if deflater is not None:
+                chunk = await anyio.to_thread.run_sync(deflater.compress, chunk)
+            if chunk:
+                compressed += len(chunk)
+                yield chunk
+        if deflater is not None:
+            tail = deflater.flush()
+            compressed += len(tail)
+            yield tail
+
+        if not zip64 and max(size, compressed) >= ZIP64_LIMIT:
+            raise ValueError(f"{entry.name}: larger than its announced size {entry.size}")
+        record.crc, record.size, record.compressed = crc, size, compressed
+        if zip64:
+            descriptor = _DESCRIPTOR_ZIP64.pack(0x08074B50, crc, compressed, size)
+        else:
+            descriptor = _DESCRIPTOR.pack(0x08074B50, crc, compressed, size)
+        yield descriptor
+        offset += compressed + len(descriptor)
+        records.append(record)
+
+    directory_offset = offset
+    for record in records:
+        entry = _central_record(record)
+        offset += len(entry)
+        yield entry
+    directory_size = offset - directory_offset
+
+    count = len(records)
+    if (
+        count >= ZIP64_COUNT_LIMIT
+        or directory_offset >= ZIP64_LIMIT
+        or directory_size >= ZIP64_LIMIT
+        or any(record.zip64 for record in records)
+    ):
+        yield _END_ZIP64.pack(
+            0x06064B50,
+            _END_ZIP64.size - 12,
+            _VERSION_ZIP64,
+            _VERSION_ZIP64,
+            0,
+            0,
+            count,
+            count,
+            directory_size,
+            directory_offset,
+        )
+        yield _END_ZIP64_LOCATOR.pack(0x07064B50, 0, offset, 1)
+    yield _END.pack(
+        0x06054B50,
+        0,
+        0,
+        min(count, ZIP64_COUNT_LIMIT),
+        min(count, ZIP64_COUNT_LIMIT),
+        min(directory_size, ZIP64_LIMIT),
+        min(directory_offset, ZIP64_LIMIT),
+        0,
+    )
+
+
+def _central_record(record: _Record) -> bytes:
+    large_offset = record.offset >= ZIP64_LIMIT
+    extra = b""
+    if record.zip64 or large_offset:
+        fields = []
+        if record.zip64:
+            fields += [record.size, record.compressed]
+        if large_offset:
+            fields.append(record.offset)
+        extra = struct.pack(f"<HH{len(fields)}Q", 0x0001, 8 * len(fields), *fields)
+    header = _CENTRAL_HEADER.pack(
+        0x02014B50,
+        _VERSION_ZIP64,
+        _VERSION_ZIP64 if extra else _VERSION,
+        _FLAGS,
+        record.method,
+        record.time,
+        record.date,
+        record.crc,
+        ZIP64_LIMIT if record.zip64 else record.compressed,
+        ZIP64_LIMIT if record.zip64 else record.size,
+        len(record.name),
+        len(extra),
+        0,
+        0,
+        0,
+        0,
+        ZIP64_LIMIT if large_offset else record.offset,
+    )
+    return header + record.name + extra
@@ -1,16 +1,198 @@
-# app/worker.py
+# app/worker.py — the single MakerWorks Celery application
+#
+# Every task module imports `celery_app` from here. Work is split across three
+# queues so that each can be served by a worker tuned for its workload:
+#
+#   priority — user-facing jobs someone is waiting on (paid-order G-code)
+#   cpu      — mesh parsing, thumbnails, slicing backfills
+#   io       — email, webhooks, Discord notifications
+#
+# Run one worker per profile (see `mw worker start PROFILE`) so a flood of
+# thumbnail backfills on `cpu` can never sit in front of a paid order.
 
+import asyncio
 import os
+import threading
+from dataclasses import dataclass
 
 from celery import Celery
+from kombu import Exchange, Queue
 
-CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
-CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://redis:6379/0")
+CELERY_BROKER_URL = os.getenv(
+    "CELERY_BROKER_URL", os.getenv("REDIS_URL", "redis://redis:6379/0")
+)
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", CELERY_BROKER_URL)
+
+# ─────────────────────────────────────────────────────────────
+# Queues
+# ─────────────────────────────────────────────────────────────
+QUEUE_PRIORITY = "priority"
+QUEUE_CPU = "cpu"
+QUEUE_IO = "io"
+
+TASK_QUEUES = tuple(
+    Queue(name, Exchange(name), routing_key=name)
+    for name in (QUEUE_PRIORITY, QUEUE_CPU, QUEUE_IO)
+)
+
+# Glob patterns are matched against the task name, first match wins.
+TASK_ROUTES = {
+    # User-facing: a paying customer is waiting on this.
+    "app.tasks.render.generate_gcode": {"queue": QUEUE_PRIORITY},
+    # CPU-heavy geometry work.
+    "app.tasks.render.*": {"queue": QUEUE_CPU},
+    "app.tasks.models.*": {"queue": QUEUE_CPU},
+    "app.tasks.thumbnails.*": {"queue": QUEUE_CPU},
+    "app.tasks.slicing.*": {"queue": QUEUE_CPU},
+    "app.tasks.storage.*": {"queue": QUEUE_CPU},
+    # I/O-bound fan-out.
+    "app.tasks.email.*": {"queue": QUEUE_IO},
+    "app.tasks.webhooks.*": {"queue": QUEUE_IO},
+    "app.tasks.discord.*": {"queue": QUEUE_IO},
+}
 
 celery_app = Celery(
     "makerworks",
     broker=CELERY_BROKER_URL,
     backend=CELERY_RESULT_BACKEND,
+    include=["app.tasks.render", "app.tasks.models", "app.tasks.storage"],
 )
 
-celery_app.conf.task_routes = {"app.tasks.*": {"queue": "makerworks"}}
+celery_app.conf.update(
+    task_queues=TASK_QUEUES,
+    task_routes=TASK_ROUTES,
+    # Anything unrouted lands on the cpu lane, never on priority.
+    task_default_queue=QUEUE_CPU,
+    task_default_exchange=QUEUE_CPU,
+    task_default_routing_key=QUEUE_CPU,
+    task_track_started=True,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    result_expires=3600,
+    broker_connection_retry_on_startup=True,
+    worker_send_task_events=True,
+    task_send_sent_event=True,
+    enable_utc=True,
+    timezone="UTC",
+    worker_enable_remote_control=True,
+    # Run by the `beat` service (see app.services.storage_gc and .tiering).
+    beat_schedule={
+        "storage-gc": {
+            "task": "app.tasks.storage.collect_garbage",
+            "schedule": float(os.getenv("GC_INTERVAL_SECONDS", 900)),
+        },
+        "storage-tiering": {
+            "task": "app.tasks.storage.rebalance_tiers",
+            "schedule": float(os.getenv("TIER_INTERVAL_SECONDS", 3600)),
+        },
+    },
+)
+
+# Registers the publish/run signal hooks that feed queue-wait and runtime
+# histograms; imported here so publishers and workers both get them.
+import app.services.celery_metrics  # noqa: E402, F401
+
+
+# ─────────────────────────────────────────────────────────────
+# Async task bodies
+# ─────────────────────────────────────────────────────────────
+_loops = threading.local()
+
+
+def run_async(coro):
+    """
+    Run CORO to completion on this worker process's event loop (one per
+    thread, for the threads pool). Tasks must not use asyncio.run(): the
+    clients they share — the Redis client, the cached storage backend's
+    HTTP pool, the database engine — keep connections bound to the loop
+    that opened them, and a fresh loop per task finds them closed.
+    """
+    loop = getattr(_loops, "loop", None)
+    if loop is None or loop.is_closed() or _loops.pid != os.getpid():
+        # New thread, or a prefork child that inherited its parent's loop
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _loops.loop, _loops.pid = loop, os.getpid()
+    return loop.run_until_complete(coro)
+
+
+# ─────────────────────────────────────────────────────────────
+# Worker profiles
+# ─────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class WorkerProfile:
+    """Execution settings for a worker that consumes one lane."""
+
+    queues: tuple[str, ...]
+    pool: str
+    concurrency: int
+    prefetch_multiplier: int
+    soft_time_limit: int
+    time_limit: int
+    max_tasks_per_child: int | None = None
+
+    def argv(self, name: str) -> list[str]:
+        """Return `celery worker` arguments for this profile."""
+        args = [
+            "worker",
+            "--hostname", f"{name}@%h",
+            "--queues", ",".join(self.queues),
+            "--pool", self.pool,
+            "--concurrency", str(self.concurrency),
+            "--prefetch-multiplier", str(self.prefetch_multiplier),
+            "--soft-time-limit", str(self.soft_time_limit),
+            "--time-limit", str(self.time_limit),
+            "--loglevel", os.getenv("CELERY_LOG_LEVEL", "INFO"),
+        ]
+        if self.max_tasks_per_child:
+            args += ["--max-tasks-per-child", str(self.max_tasks_per_child)]
+        return args
+
+
+def _env_int(name: str, default: int) -> int:
+    # Empty counts as unset (`KEY=` in .env files)
+    return int(os.getenv(name) or default)
+
+
+_CPUS = os.cpu_count() or 1
+
+WORKER_PROFILES: dict[str, WorkerProfile] = {
+    # Small prefork pool reserved for jobs a user is actively waiting on.
+    # Prefetch 1 so a long slice never hides queued work from idle siblings.
+    "priority": WorkerProfile(
+        queues=(QUEUE_PRIORITY,),
+        pool="prefork",
+        concurrency=_env_int("CELERY_PRIORITY_CONCURRENCY", max(1, _CPUS // 4)),
+        prefetch_multiplier=1,
+        soft_time_limit=_env_int("CELERY_PRIORITY_SOFT_TIME_LIMIT", 1500),
+        time_limit=_env_int("CELERY_PRIORITY_TIME_LIMIT", 1800),
+    ),
+    # One process per core; recycle children to cap trimesh/numpy heap growth.
+    "cpu": WorkerProfile(
+        queues=(QUEUE_CPU,),
+        pool="prefork",
+        concurrency=_env_int("CELERY_CPU_CONCURRENCY", _CPUS),
+        prefetch_multiplier=1,
+        soft_time_limit=_env_int("CELERY_CPU_SOFT_TIME_LIMIT", 540),
+        time_limit=_env_int("CELERY_CPU_TIME_LIMIT", 600),
+        max_tasks_per_child=_env_int("CELERY_CPU_MAX_TASKS_PER_CHILD", 50),
+    ),
+    # Tasks spend their life waiting on sockets: many threads, deeper prefetch,
+    # short limits so a hung webhook can't pin a slot. The threads pool cannot
+    # enforce time limits; set CELERY_IO_POOL=gevent when gevent is installed.
+    "io": WorkerProfile(
+        queues=(QUEUE_IO,),
+        pool=os.getenv("CELERY_IO_POOL") or "threads",
+        concurrency=_env_int("CELERY_IO_CONCURRENCY", 32),
+        prefetch_multiplier=4,
+        soft_time_limit=_env_int("CELERY_IO_SOFT_TIME_LIMIT", 50),
+        time_limit=_env_int("CELERY_IO_TIME_LIMIT", 60),
+    ),
+}
+
+# The Redis visibility timeout must outlast the longest hard time limit, or
+# late-acked tasks get redelivered while still running.
+celery_app.conf.broker_transport_options = {
+    "visibility_timeout": 2 * max(profile.time_limit for profile in WORKER_PROFILES.values())
+}
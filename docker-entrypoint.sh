@@ -3,9 +3,7 @@ set -euo pipefail
 
 cd /app
 
-# Start the FastAPI app with Gunicorn + Uvicorn workers
-exec gunicorn \
-    -w 4 \
-    -k uvicorn.workers.UvicornWorker \
-    --bind 0.0.0.0:8000 \
-    app.main:app
+# Start the FastAPI app with the production Gunicorn + Uvicorn profile.
+# Worker count follows the container's CPU/memory limits unless
+# WEB_CONCURRENCY is set; `mw serve --dry-run` prints the tuning.
+exec python -m app.cli serve --bind "${BIND:-0.0.0.0:8000}"
@@ -0,0 +1,32 @@
+#!/bin/bash
+# Prove the X-Accel-Redirect handoff against a running nginx + backend
+# (see nginx/makerworks.conf): the proxy must serve the body, not the app.
+#
+#   scripts/devtools/check_offload.sh [BASE_URL] [UPLOAD_PATH]
+set -euo pipefail
+
+BASE_URL="${1:-http://localhost:8080}"
+UPLOAD_PATH="${2:-}"
+
+if [ -z "$UPLOAD_PATH" ]; then
+    mkdir -p uploads/offload-check
+    head -c 1048576 /dev/urandom > uploads/offload-check/probe.stl
+    UPLOAD_PATH="offload-check/probe.stl"
+fi
+
+headers=$(mktemp)
+body=$(mktemp)
+trap 'rm -f "$headers" "$body"' EXIT
+
+curl -sS -D "$headers" -o "$body" "$BASE_URL/uploads/$UPLOAD_PATH"
+
+grep -qi '^x-served-by: nginx-offload' "$headers" || { echo "❌ body not served by nginx"; cat "$headers"; exit 1; }
+if grep -qi '^x-accel-redirect' "$headers"; then
+    echo "❌ X-Accel-Redirect leaked to the client"; exit 1
+fi
+cmp -s "$body" "uploads/$UPLOAD_PATH" || { echo "❌ body differs from uploads/$UPLOAD_PATH"; exit 1; }
+
+status=$(curl -sS -o /dev/null -w '%{http_code}' -H 'Range: bytes=0-99' "$BASE_URL/uploads/$UPLOAD_PATH")
+[ "$status" = "206" ] || { echo "❌ Range request returned $status"; exit 1; }
+
+echo "✅ nginx served $UPLOAD_PATH after the app authorized it (full body and Range)"
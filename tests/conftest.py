@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+
+@pytest.fixture()
+def make_sessions(tmp_path):
+    """
+    ``make_sessions(User, ModelMetadata, ...)``: a session factory for a fresh
+    SQLite file holding just those models' tables.
+    """
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.db.base_class import Base
+
+    def make(*models):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db", poolclass=NullPool)
+
+        async def create_tables():
+            async with engine.begin() as conn:
+                await conn.run_sync(
+                    Base.metadata.create_all, tables=[model.__table__ for model in models]
+                )
+
+        asyncio.run(create_tables())
+        return async_sessionmaker(engine, expire_on_commit=False)
+
+    return make
+
+
+@pytest.fixture()
+def make_app():
+    """
+    ``make_app(routes, prefix, sessions, user=None)``: an app serving the
+    ROUTES module's router on SESSIONS, authenticated as USER (anyone by
+    default).
+    """
+    import uuid
+
+    from fastapi import FastAPI
+
+    def make(routes, prefix, sessions, user=None):
+        async def get_db():
+            async with sessions() as session:
+                yield session
+
+        user = user or SimpleNamespace(id=uuid.uuid4())
+        app = FastAPI()
+        app.include_router(routes.router, prefix=prefix)
+        app.dependency_overrides[routes.get_async_db] = get_db
+        app.dependency_overrides[routes.get_current_user] = lambda: user
+        return app
+
+    return make
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import os
+import sys
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.models import Blob, ModelMetadata, User  # noqa: E402
+from app.scripts.dedupe import dedupe_models  # noqa: E402
+from app.services import blobs  # noqa: E402
+from app.services.model_ingest import ingest_blob  # noqa: E402
+from app.services.storage import LocalStorage, layout  # noqa: E402
+from tests.test_storage import FakeS3, chunks, make_s3  # noqa: E402
+
+DATA = os.urandom(4000)
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.fixture()
+def sessions(make_sessions):
+    return make_sessions(User, ModelMetadata, Blob)
+
+
+def test_store_hashes_while_streaming_and_links_duplicates(tmp_path):
+    storage = LocalStorage(tmp_path)
+
+    async def scenario():
+        first = await blobs.store(storage, chunks(DATA))
+        second = await blobs.store(storage, chunks(DATA, size=999))
+        assert (first.sha256, first.size, first.created) == (DIGEST, len(DATA), True)
+        assert second.sha256 == DIGEST and not second.created
+
+        a = await blobs.attach(storage, first, layout.model_key(uuid.uuid4(), ".stl"))
+        b = await blobs.attach(storage, second, layout.model_key(uuid.uuid4(), ".stl"))
+        return a, b
+
+    a, b = asyncio.run(scenario())
+    blob = tmp_path / blobs.blob_key(DIGEST)
+    assert blob.read_bytes() == DATA
+    assert (tmp_path / a).stat().st_ino == (tmp_path / b).stat().st_ino == blob.stat().st_ino
+    assert not list((tmp_path / "blobs" / "staging").iterdir())
+
+
+def test_object_stores_reference_the_blob():
+    fake = FakeS3()
+    storage = make_s3(fake)
+
+    async def scenario():
+        blob = await blobs.store(storage, DATA)
+        return await blobs.attach(storage, blob, layout.model_key(uuid.uuid4(), ".stl"))
+
+    assert asyncio.run(scenario()) == blobs.blob_key(DIGEST)
+    assert list(fake.objects) == [blobs.blob_key(DIGEST)]
+
+
+def test_refcounts_and_reuse_of_derived_files(tmp_path, sessions):
+    storage = LocalStorage(tmp_path)
+    source_id, copy_id = uuid.uuid4(), uuid.uuid4()
+
+    async def scenario():
+        blob = await blobs.store(storage, DATA)
+        async with sessions() as db:
+            source = ModelMetadata(
+                id=source_id,
+                user_id=uuid.uuid4(),
+                name="Box",
+                filename="box.stl",
+                filepath=await blobs.attach(storage, blob, layout.model_key(source_id, ".stl")),
+                file_url="x",
+                content_hash=DIGEST,
+                faces=12,
+                vertices=8,
+                bbox="[1, 1, 1]",
+            )
+            db.add(source)
+            await blobs.acquire(db, blob)
+            await db.commit()
+        await storage.put(layout.artifact_key(source_id, layout.THUMBNAIL), b"png")
+
+        duplicate = await blobs.store(storage, DATA)
+        async with sessions() as db:
+            values = await ingest_blob(
+                db,
+                storage,
+                duplicate,
+                await blobs.attach(storage, duplicate, layout.model_key(copy_id, ".stl")),
+                model_id=copy_id,
+                user_id=uuid.uuid4(),
+                filename="mine.stl",
+                name=None,
+                description=None,
+                base_url="http://api",
+            )
+            db.add(ModelMetadata(**values))
+            await db.commit()
+            assert (await db.get(Blob, DIGEST)).refcount == 2
+        return values
+
+    values = asyncio.run(scenario())
+    assert values["is_duplicate"] and values["faces"] == 12 and values["name"] == "mine.stl"
+    assert values["thumbnail_url"].startswith(f"http://api/uploads/m/{copy_id}/thumbnail.png?v=")
+    assert (tmp_path / layout.artifact_key(copy_id, layout.THUMBNAIL)).read_bytes() == b"png"
+
+
+def test_dedupe_backfill_links_existing_copies(tmp_path, sessions):
+    storage = LocalStorage(tmp_path)
+    ids = [uuid.uuid4() for _ in range(3)]
+
+    async def scenario():
+        async with sessions() as db:
+            for model_id in ids:
+                key = layout.model_key(model_id, ".stl")
+                await storage.put(key, DATA if model_id != ids[2] else b"other")
+                db.add(
+                    ModelMetadata(
+                        id=model_id,
+                        user_id=uuid.uuid4(),
+                        name="m",
+                        filename="m.stl",
+                        filepath=key,
+                        file_url="x",
+                    )
+                )
+            await db.commit()
+
+        stats = await dedupe_models(batch_size=2, session_factory=sessions, storage=storage)
+        async with sessions() as db:
+            counts = dict((await db.execute(select(Blob.sha256, Blob.refcount))).all())
+        return stats, counts
+
+    stats, counts = asyncio.run(scenario())
+    assert (stats.scanned, stats.stored, stats.duplicates) == (3, 2, 1)
+    assert stats.reclaimed_bytes == len(DATA)
+    assert counts == {DIGEST: 2, hashlib.sha256(b"other").hexdigest(): 1}
+    inodes = {(tmp_path / layout.model_key(m, ".stl")).stat().st_ino for m in ids[:2]}
+    assert inodes == {(tmp_path / blobs.blob_key(DIGEST)).stat().st_ino}
@@ -0,0 +1,60 @@
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from prometheus_client import REGISTRY
+
+from app.services import celery_metrics
+
+
+def fake_task(name="app.tasks.render.generate_gcode", queue="priority", **request):
+    req = SimpleNamespace(delivery_info={"routing_key": queue}, eta=None, **request)
+    return SimpleNamespace(name=name, request=req)
+
+
+def sample(metric, **labels):
+    return REGISTRY.get_sample_value(metric, labels) or 0
+
+
+def test_publish_stamps_sent_time():
+    headers = {}
+    celery_metrics._stamp_sent_at(headers=headers)
+    assert celery_metrics.SENT_AT_HEADER in headers
+
+
+def test_run_records_wait_and_runtime():
+    labels = {"task": "app.tasks.render.generate_gcode", "queue": "priority"}
+    waits = sample("celery_task_queue_wait_seconds_count", **labels)
+    runs = sample("celery_task_runtime_seconds_count", state="SUCCESS", **labels)
+
+    headers = {}
+    celery_metrics._stamp_sent_at(headers=headers)
+    task = fake_task(**headers)
+    celery_metrics._on_prerun(task_id="t1", task=task)
+    celery_metrics._on_postrun(task_id="t1", task=task, state="SUCCESS")
+
+    assert sample("celery_task_queue_wait_seconds_count", **labels) == waits + 1
+    assert (
+        sample("celery_task_runtime_seconds_count", state="SUCCESS", **labels)
+        == runs + 1
+    )
+
+
+def test_failures_are_labelled_by_exception():
+    task = fake_task(name="app.tasks.models.process", queue="cpu")
+    celery_metrics._on_failure(sender=task, exception=ValueError("bad mesh"))
+    assert sample(
+        "celery_task_failures_total",
+        task="app.tasks.models.process",
+        queue="cpu",
+        exception="ValueError",
+    ) >= 1
+
+
+def test_queue_depth_sums_priority_lists():
+    sampler = celery_metrics.QueueDepthSampler("redis://unused", ["cpu"])
+    assert sampler._keys("cpu") == ["cpu", "cpu\x06\x163", "cpu\x06\x166", "cpu\x06\x169"]
@@ -0,0 +1,39 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.worker import WORKER_PROFILES, celery_app
+
+
+def route(name: str) -> str:
+    return celery_app.amqp.router.route({}, name)["queue"].name
+
+
+def test_paid_order_gcode_uses_priority_lane():
+    assert route("app.tasks.render.generate_gcode") == "priority"
+
+
+def test_geometry_and_io_tasks_are_split():
+    assert route("app.tasks.thumbnails.backfill") == "cpu"
+    assert route("app.tasks.email.send_welcome") == "io"
+    assert route("app.tasks.discord.post_upload") == "io"
+
+
+def test_unrouted_tasks_never_land_on_priority():
+    assert route("somewhere.else") == "cpu"
+
+
+def test_worker_profiles_consume_one_lane_each():
+    for name, profile in WORKER_PROFILES.items():
+        assert profile.queues == (name,)
+        argv = profile.argv(name)
+        assert argv[0] == "worker"
+        assert argv[argv.index("--queues") + 1] == name
+
+
+def test_visibility_timeout_outlasts_every_time_limit():
+    timeout = celery_app.conf.broker_transport_options["visibility_timeout"]
+    assert all(timeout > profile.time_limit for profile in WORKER_PROFILES.values())
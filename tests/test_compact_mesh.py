@@ -0,0 +1,79 @@
+import asyncio
+import os
+import sys
+import uuid
+
+import numpy as np
+import pytest
+import trimesh
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.models import Blob, ModelMetadata  # noqa: E402
+from app.services import blobs  # noqa: E402
+from app.services.model_ingest import ingest_blob  # noqa: E402
+from app.services.storage import MemoryStorage, layout  # noqa: E402
+from app.utils import compact_mesh  # noqa: E402
+
+SPHERE = trimesh.creation.icosphere(subdivisions=5, radius=40)
+
+
+def test_round_trip_within_half_a_step():
+    data = compact_mesh.encode(SPHERE.vertices, SPHERE.faces)
+    vertices, faces = compact_mesh.decode(data)
+
+    assert len(faces) == len(SPHERE.faces) and len(vertices) == len(SPHERE.vertices)
+    step = (SPHERE.vertices.max(axis=0) - SPHERE.vertices.min(axis=0)) / compact_mesh.QUANT_MAX
+    # Triangle by triangle, corners land on the originals' grid points
+    decoded = np.sort(vertices[faces].reshape(len(faces), -1), axis=0)
+    original = np.sort(SPHERE.vertices[SPHERE.faces].reshape(len(faces), -1), axis=0)
+    assert np.abs(decoded - original).max() <= step.max() / 2 + 1e-4
+    assert len(SPHERE.export(file_type="stl")) / len(data) > 5
+
+
+def test_triangle_soup_is_welded():
+    # STL stores every corner on its own: 3 vertices per triangle
+    corners = SPHERE.vertices[SPHERE.faces].reshape(-1, 3)
+    soup = np.arange(len(corners)).reshape(-1, 3)
+    vertices, faces = compact_mesh.decode(compact_mesh.encode(corners, soup))
+    assert len(vertices) == len(SPHERE.vertices) and len(faces) == len(SPHERE.faces)
+
+
+def test_collapsed_triangles_and_bad_input():
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1e-9, 0, 0]])
+    faces = np.array([[0, 1, 2], [0, 3, 1]])  # the second one welds to a line
+    assert len(compact_mesh.decode(compact_mesh.encode(vertices, faces))[1]) == 1
+
+    data = compact_mesh.encode(SPHERE.vertices, SPHERE.faces)
+    for broken in (b"STL!" + data[4:], data[:30], data[:-10]):
+        with pytest.raises(compact_mesh.MeshFormatError):
+            compact_mesh.decode(broken)
+
+
+def test_ingest_stores_the_compact_mesh(make_sessions):
+    storage = MemoryStorage()
+    model_id = uuid.uuid4()
+    sessions = make_sessions(ModelMetadata, Blob)
+
+    async def scenario():
+        blob = await blobs.store(storage, SPHERE.export(file_type="stl"))
+        async with sessions() as db:
+            await ingest_blob(
+                db,
+                storage,
+                blob,
+                await blobs.attach(storage, blob, layout.model_key(model_id, ".stl")),
+                model_id=model_id,
+                user_id=uuid.uuid4(),
+                filename="ball.stl",
+                name=None,
+                description=None,
+                base_url="http://api",
+            )
+        return await storage.get(blobs.derived_key(blob.sha256, compact_mesh.FORMAT))
+
+    vertices, faces = compact_mesh.decode(asyncio.run(scenario()))
+    assert len(faces) == len(SPHERE.faces)
@@ -0,0 +1,114 @@
+import gzip
+import os
+import sys
+
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.middleware import CompressionMiddleware  # noqa: E402
+from app.utils.compression import brotli, negotiate, zstandard  # noqa: E402
+from app.utils.static_files import (  # noqa: E402
+    UploadsFileServer,
+    write_precompressed_variants,
+)
+
+PAYLOAD = b'{"items": [' + b",".join(b'{"id": %d, "name": "filament"}' % i for i in range(200)) + b"]}"
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/json")
+    async def json_body():
+        return Response(PAYLOAD, media_type="application/json")
+
+    @app.get("/png")
+    async def png_body():
+        return Response(b"\x89PNG" + b"\x00" * 5000, media_type="image/png")
+
+    @app.get("/small")
+    async def small_body():
+        return Response(b'{"ok": true}', media_type="application/json")
+
+    @app.get("/stream")
+    async def stream_body():
+        async def chunks():
+            for _ in range(3):
+                yield PAYLOAD
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1000)
+    return app
+
+
+def test_negotiate_prefers_server_order_and_respects_q():
+    assert negotiate("gzip, br", ("zstd", "br", "gzip")) == "br"
+    assert negotiate("gzip, br;q=0.5", ("br", "gzip")) == "gzip"
+    assert negotiate("identity", ("br", "gzip")) is None
+    assert negotiate("*", ("br", "gzip")) == "br"
+    assert negotiate(None) is None
+
+
+def test_json_is_compressed_with_best_accepted_coding():
+    client = TestClient(make_app())
+    response = client.get("/json", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert response.content == PAYLOAD  # httpx decodes
+
+    if brotli is not None:
+        response = client.get("/json", headers={"accept-encoding": "gzip, br"})
+        assert response.headers["content-encoding"] == "br"
+    if zstandard is not None:
+        response = client.get("/json", headers={"accept-encoding": "zstd"})
+        assert response.headers["content-encoding"] == "zstd"
+        assert int(response.headers["content-length"]) < len(PAYLOAD)
+
+
+def test_incompressible_and_small_responses_pass_through():
+    client = TestClient(make_app())
+    png = client.get("/png", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in png.headers
+    small = client.get("/small", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_streaming_body_is_encoded_incrementally():
+    client = TestClient(make_app())
+    response = client.get("/stream", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content == PAYLOAD * 3
+
+
+def test_precompressed_stl_is_served_with_content_encoding(tmp_path):
+    stl = tmp_path / "part.stl"
+    stl.write_bytes(b"solid part\n" + b"facet normal 0 0 1\n outer loop\n" * 2000)
+    assert write_precompressed_variants(stl)
+
+    app = FastAPI()
+    app.mount("/uploads", UploadsFileServer(tmp_path))
+    client = TestClient(app)
+
+    response = client.get("/uploads/part.stl", headers={"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"] == "model/stl"
+    assert int(response.headers["content-length"]) == (tmp_path / "part.stl.gz").stat().st_size
+    assert response.content == stl.read_bytes()
+
+    identity = client.get("/uploads/part.stl", headers={"accept-encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.content == stl.read_bytes()
+
+    ranged = client.get(
+        "/uploads/part.stl", headers={"accept-encoding": "gzip", "range": "bytes=0-9"}
+    )
+    assert ranged.status_code == 206
+    assert ranged.content == b"solid part"
+    assert gzip.decompress((tmp_path / "part.stl.gz").read_bytes()) == stl.read_bytes()
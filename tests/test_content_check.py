@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import importlib.util
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.models import Blob, ModelMetadata  # noqa: E402
+from app.services.storage import MemoryStorage  # noqa: E402
+
+spec = importlib.util.spec_from_file_location(
+    "app.routes.upload", Path(__file__).resolve().parents[1] / "app" / "routes" / "upload.py"
+)
+upload = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(upload)
+
+
+@pytest.fixture()
+def env(make_sessions, make_app, monkeypatch):
+    import trimesh
+
+    sessions = make_sessions(ModelMetadata, Blob)
+
+    memory = MemoryStorage()
+    monkeypatch.setattr(upload, "get_storage", lambda: memory)
+
+    app = make_app(upload, "/api/v1/upload", sessions)
+
+    stl = trimesh.creation.box().export(file_type="stl")
+    with TestClient(app) as client:
+        yield SimpleNamespace(client=client, memory=memory, sessions=sessions, stl=stl)
+
+
+def check(env, **overrides):
+    body = {
+        "sha256": hashlib.sha256(env.stl).hexdigest(),
+        "size": len(env.stl),
+        "filename": "again.stl",
+        **overrides,
+    }
+    return env.client.post("/api/v1/upload/check", json=body)
+
+
+def test_known_content_creates_model_without_upload(env):
+    assert check(env).json() == {"exists": False, "model": None}
+
+    first = env.client.post("/api/v1/upload", files={"file": ("box.stl", env.stl, "model/stl")})
+    assert first.status_code == 200, first.text
+    writes = len(env.memory.objects)
+
+    response = check(env, name="Same box")
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["exists"] is True
+    model = result["model"]
+    assert model["id"] != first.json()["id"] and model["is_duplicate"] is True
+    assert model["name"] == "Same box"
+    assert model["file_url"].endswith(f"/uploads/m/{model['id']}/model.stl")
+
+    async def load():
+        async with env.sessions() as db:
+            models = (await db.execute(select(ModelMetadata))).scalars().all()
+            blob = await db.get(Blob, hashlib.sha256(env.stl).hexdigest())
+            return models, blob
+
+    models, blob = asyncio.run(load())
+    assert blob.refcount == 2
+    assert {m.faces for m in models} == {12}
+    # The only new object is the new model's link to the shared bytes.
+    assert len(env.memory.objects) == writes + 1
+    assert env.memory.objects[models[1].filepath][0] is env.memory.objects[models[0].filepath][0]
+
+
+def test_mismatches_fall_back_to_upload(env):
+    env.client.post("/api/v1/upload", files={"file": ("box.stl", env.stl, "model/stl")})
+    assert check(env, size=len(env.stl) + 1).json()["exists"] is False
+    assert check(env, sha256="0" * 64).json()["exists"] is False
+    assert check(env, sha256="XYZ").status_code == 422
+    assert check(env, filename="box.exe").status_code == 400
@@ -0,0 +1,167 @@
+import asyncio
+import importlib.util
+import io
+import os
+import sys
+import uuid
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import trimesh
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.models import ModelMetadata  # noqa: E402
+from app.services import blobs, conversions  # noqa: E402
+from app.services.storage import MemoryStorage, layout  # noqa: E402
+from app.utils import static_files  # noqa: E402
+from app.utils.threemf import read_3mf, write_3mf  # noqa: E402
+
+BOX = trimesh.creation.box(extents=(10, 20, 30))
+STL = BOX.export(file_type="stl")
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, name, value, nx=False, ex=None):
+        if nx and name in self.values:
+            return None
+        self.values[name] = value
+        return True
+
+    async def get(self, name):
+        return self.values.get(name)
+
+    async def delete(self, name):
+        self.values.pop(name, None)
+
+
+def test_3mf_round_trip_applies_build_transforms():
+    vertices, faces = read_3mf(io.BytesIO(write_3mf(BOX.vertices, BOX.faces)))
+    assert np.allclose(vertices, BOX.vertices) and (faces == BOX.faces).all()
+
+    # The same object placed twice, the second copy moved 100 mm along x
+    package = io.BytesIO(write_3mf(BOX.vertices, BOX.faces))
+    with zipfile.ZipFile(package) as original:
+        model = original.read("3D/3dmodel.model").decode()
+    model = model.replace(
+        '<item objectid="1"/>',
+        '<item objectid="1"/><item objectid="1" transform="1 0 0 0 1 0 0 0 1 100 0 0"/>',
+    )
+    moved = io.BytesIO()
+    with zipfile.ZipFile(moved, "w") as copy:
+        copy.writestr("3D/3dmodel.model", model)
+    vertices, faces = read_3mf(moved)
+    assert len(vertices) == 2 * len(BOX.vertices) and faces.max() == len(vertices) - 1
+    assert np.isclose(vertices[:, 0].max(), 105)
+
+
+def test_conversions_are_queued_once_and_served_from_cache(
+    make_sessions, make_app, monkeypatch
+):
+    spec = importlib.util.spec_from_file_location(
+        "app.routes.models", Path(__file__).resolve().parents[1] / "app" / "routes" / "models.py"
+    )
+    models = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(models)
+
+    memory = MemoryStorage()
+    fake = FakeRedis()
+    queued = []
+
+    async def enqueue(model_id, target):
+        queued.append((str(model_id), target))
+
+    async def record_download(model_id, mode="direct"):
+        pass
+
+    monkeypatch.setattr(models, "get_storage", lambda: memory)
+    monkeypatch.setattr(models, "record_download", record_download)
+    monkeypatch.setattr(conversions, "redis", fake)
+    monkeypatch.setattr(conversions, "enqueue_conversion", enqueue)
+    read = []
+
+    async def record_access(key, cold=False):
+        read.append(key)
+
+    monkeypatch.setattr(conversions.tiering, "record_access", record_access)
+    monkeypatch.setattr(
+        static_files, "get_uploads_server", lambda: static_files.StorageObjectServer(memory)
+    )
+
+    sessions = make_sessions(ModelMetadata)
+    first, second, broken = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    async def setup():
+        async with sessions() as db:
+            for model_id, data in ((first, STL), (second, STL), (broken, b"not a mesh")):
+                blob = await blobs.store(memory, data)
+                key = await blobs.attach(memory, blob, layout.model_key(model_id, ".stl"))
+                db.add(
+                    ModelMetadata(
+                        id=model_id,
+                        user_id=uuid.uuid4(),
+                        name="m",
+                        filename="bench.stl",
+                        filepath=key,
+                        file_url="x",
+                        content_hash=blob.sha256,
+                    )
+                )
+            await db.commit()
+
+    asyncio.run(setup())
+
+    client = TestClient(make_app(models, "/api/v1/models", sessions))
+
+    def get(model_id, target):
+        return client.get(f"/api/v1/models/{model_id}/formats/{target}")
+
+    # Same content: one conversion for both models
+    pending = get(first, "glb")
+    assert pending.status_code == 202 and pending.headers["retry-after"]
+    assert get(second, "glb").status_code == 202
+    assert queued == [(str(first), "glb")]
+
+    async def run(model_id, target):
+        key = await conversions.convert_model(
+            str(model_id), target, session_factory=sessions, storage=memory
+        )
+        async with sessions() as db:
+            return key, (await db.get(ModelMetadata, model_id)).glb_path
+
+    key, glb_path = asyncio.run(run(first, "glb"))
+    assert key.startswith(blobs.DERIVED_PREFIX) and glb_path == layout.artifact_key(first, layout.GLB)
+    assert fake.values == {}
+    assert read == [layout.model_key(first, ".stl")]
+
+    served = get(second, "glb")
+    assert served.status_code == 200
+    assert served.headers["content-type"] == "model/gltf-binary"
+    assert 'filename="bench.glb"' in served.headers["content-disposition"]
+    glb = trimesh.load(io.BytesIO(served.content), file_type="glb", force="mesh")
+    assert np.isclose(glb.volume, BOX.volume)
+    assert len(queued) == 1
+    assert asyncio.run(run(second, "glb"))[1] == layout.artifact_key(second, layout.GLB)
+
+    assert get(first, "3mf").status_code == 202
+    asyncio.run(run(first, "3mf"))
+    printed = get(second, "3mf")
+    assert printed.status_code == 200
+    assert len(read_3mf(io.BytesIO(printed.content))[1]) == len(BOX.faces)
+
+    assert get(first, "stl").content == STL
+    assert get(first, "obj").status_code == 400
+    assert get(uuid.uuid4(), "glb").status_code == 404
+
+    get(broken, "glb")
+    assert asyncio.run(run(broken, "glb")) == (None, None)
+    failed = get(broken, "glb")
+    assert failed.status_code == 422 and len(queued) == 3
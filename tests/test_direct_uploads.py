@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import quote_plus
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.models import Blob, ModelMetadata, UploadJob, User  # noqa: E402
+from app.services import direct_uploads  # noqa: E402
+from app.services.blobs import blob_key, derived_key  # noqa: E402
+from app.services.storage import MemoryStorage  # noqa: E402
+from app.services.storage.layout import model_key  # noqa: E402
+from tests.test_storage import FakeS3, make_s3  # noqa: E402
+
+spec = importlib.util.spec_from_file_location(
+    "app.routes.upload", Path(__file__).resolve().parents[1] / "app" / "routes" / "upload.py"
+)
+upload = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(upload)
+
+
+@pytest.fixture()
+def env(make_sessions, make_app, monkeypatch):
+    import trimesh
+
+    sessions = make_sessions(User, ModelMetadata, UploadJob, Blob)
+
+    fake = FakeS3()
+    s3 = make_s3(fake)
+    monkeypatch.setattr(upload, "get_storage", lambda: s3)
+    monkeypatch.setattr(upload.settings, "storage_webhook_token", "hook-secret")
+
+    enqueued = []
+
+    async def enqueue(upload_id):
+        enqueued.append(str(upload_id))
+
+    monkeypatch.setattr(direct_uploads, "enqueue_processing", enqueue)
+
+    user_id = uuid.uuid4()
+    app = make_app(upload, "/api/v1/upload", sessions, SimpleNamespace(id=user_id))
+
+    with TestClient(app) as client:
+        yield SimpleNamespace(
+            client=client,
+            fake=fake,
+            s3=s3,
+            sessions=sessions,
+            enqueued=enqueued,
+            user_id=user_id,
+            stl=trimesh.creation.box().export(file_type="stl"),
+        )
+
+
+def client_put(fake: FakeS3, url: str, headers: dict, body: bytes) -> httpx.Response:
+    async def put():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(fake)) as client:
+            return await client.put(url, headers=headers, content=body)
+
+    return asyncio.run(put())
+
+
+def presign(env, **overrides):
+    body = {"filename": "box.stl", "size": len(env.stl), "name": "Box", **overrides}
+    response = env.client.post("/api/v1/upload/presign", json=body)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_presigned_upload_then_client_callback(env):
+    grant = presign(env)
+    assert "X-Amz-SignedHeaders=content-length%3Bcontent-type%3Bhost" in grant["url"]
+    upload_id = grant["upload_id"]
+
+    early = env.client.post(f"/api/v1/upload/{upload_id}/complete")
+    assert early.status_code == 409
+
+    # Content-Length is signed: another size is refused by the store itself.
+    assert client_put(env.fake, grant["url"], grant["headers"], env.stl + b"extra").status_code == 403
+    assert client_put(env.fake, grant["url"], grant["headers"], env.stl).status_code == 200
+
+    done = env.client.post(f"/api/v1/upload/{upload_id}/complete")
+    assert done.status_code == 202
+    assert done.json()["status"] == "uploaded"
+    again = env.client.post(f"/api/v1/upload/{upload_id}/complete")
+    assert again.json()["status"] == "uploaded"
+    assert env.enqueued == [upload_id]  # one job however many callbacks
+
+    assert asyncio.run(direct_uploads.process_direct_upload(upload_id, env.sessions, env.s3)) == "done"
+
+    status = env.client.get(f"/api/v1/upload/{upload_id}").json()
+    assert status["status"] == "done" and status["model_id"] == upload_id
+
+    async def load_model():
+        async with env.sessions() as db:
+            return await db.get(ModelMetadata, uuid.UUID(upload_id))
+
+    model = asyncio.run(load_model())
+    assert model.name == "Box" and model.faces == 12
+    # Object stores can't link: the row points at the blob, the upload key is gone
+    assert model.filepath == blob_key(hashlib.sha256(env.stl).hexdigest())
+    assert model.content_hash == hashlib.sha256(env.stl).hexdigest()
+    # Plus the viewer's compact mesh, kept by content like the blob
+    assert sorted(env.fake.objects) == [
+        derived_key(model.content_hash, "mwm"),
+        model.filepath,
+    ]
+
+
+def test_bucket_notification_completes_upload(env):
+    grant = presign(env)
+    upload_id = grant["upload_id"]
+    client_put(env.fake, grant["url"], grant["headers"], env.stl)
+
+    key = model_key(upload_id, ".stl")
+    event = {
+        "EventName": "s3:ObjectCreated:Put",
+        "Records": [
+            {"eventName": "s3:ObjectCreated:Put", "s3": {"object": {"key": quote_plus(key)}}},
+            {"eventName": "s3:ObjectCreated:Put", "s3": {"object": {"key": "unrelated.bin"}}},
+        ],
+    }
+    denied = env.client.post(
+        "/api/v1/upload/notifications", json=event, headers={"authorization": "Bearer nope"}
+    )
+    assert denied.status_code == 401
+
+    accepted = env.client.post(
+        "/api/v1/upload/notifications", json=event, headers={"authorization": "Bearer hook-secret"}
+    )
+    assert accepted.json() == {"accepted": 1}
+    assert env.enqueued == [upload_id]
+    # The client's own callback arriving later is a no-op.
+    env.client.post(f"/api/v1/upload/{upload_id}/complete")
+    assert env.enqueued == [upload_id]
+
+
+def test_blank_or_comment_webhook_token_is_unset():
+    # What a dotenv loader makes of `STORAGE_WEBHOOK_TOKEN=  # comment`
+    for value in ("", "  ", "# bearer token for bucket notifications"):
+        configured = type(upload.settings)(storage_webhook_token=value, database_url="sqlite://")
+        assert configured.storage_webhook_token is None
+
+
+def test_size_limits_and_unsupported_backend(env, monkeypatch):
+    too_big = env.client.post(
+        "/api/v1/upload/presign",
+        json={"filename": "huge.stl", "size": upload.MAX_FILE_SIZE_BYTES + 1},
+    )
+    assert too_big.status_code == 400
+    bad_ext = env.client.post("/api/v1/upload/presign", json={"filename": "x.exe", "size": 10})
+    assert bad_ext.status_code == 400
+
+    monkeypatch.setattr(upload, "get_storage", lambda: MemoryStorage())
+    unsupported = env.client.post("/api/v1/upload/presign", json={"filename": "a.stl", "size": 10})
+    assert unsupported.status_code == 501
+
+    other_user = env.client.get(f"/api/v1/upload/{uuid.uuid4()}")
+    assert other_user.status_code == 404
+
+
+def test_failed_enqueue_leaves_the_job_pending(env, monkeypatch):
+    grant = presign(env)
+    upload_id = grant["upload_id"]
+    client_put(env.fake, grant["url"], grant["headers"], env.stl)
+
+    attempts = []
+
+    async def flaky_broker(upload_id):
+        attempts.append(upload_id)
+        if len(attempts) == 1:
+            raise ConnectionError("broker unreachable")
+        env.enqueued.append(str(upload_id))
+
+    monkeypatch.setattr(direct_uploads, "enqueue_processing", flaky_broker)
+    assert env.client.post(f"/api/v1/upload/{upload_id}/complete").status_code == 503
+    assert env.client.get(f"/api/v1/upload/{upload_id}").json()["status"] == "pending"
+
+    retried = env.client.post(f"/api/v1/upload/{upload_id}/complete")
+    assert retried.json()["status"] == "uploaded" and env.enqueued == [upload_id]
+
+
+class KeepAlive(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("content-length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_upload_task_runs_twice_in_one_process(monkeypatch):
+    from app.tasks.models import process_upload
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAlive)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Shared across tasks like the cached S3 backend's client: its pooled
+    # connection belongs to the loop of the first task
+    client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{server.server_port}")
+
+    async def process(upload_id, session_factory=None, storage=None):
+        return (await client.get(f"/{upload_id}")).text
+
+    monkeypatch.setattr(direct_uploads, "process_direct_upload", process)
+    try:
+        for upload_id in ("first", "second"):
+            assert process_upload.apply(args=[upload_id]).get() == "ok"
+    finally:
+        server.shutdown()
@@ -0,0 +1,112 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import numpy as np
+import trimesh
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.models import ModelMetadata  # noqa: E402
+from app.services import blobs, lods  # noqa: E402
+from app.services.storage import MemoryStorage, layout  # noqa: E402
+from app.utils import compact_mesh, decimate, static_files  # noqa: E402
+
+SPHERE = trimesh.creation.icosphere(subdivisions=5, radius=40)
+
+
+def soup(mesh):
+    return lambda: iter([mesh.vertices[mesh.faces]])
+
+
+def test_simplify_hits_targets_and_keeps_the_shape():
+    targets = [5000, 500]
+    meshes = decimate.simplify(soup(SPHERE), targets)
+    for target, (vertices, faces) in zip(targets, meshes):
+        assert target / 2 < len(faces) < target * 2
+        assert faces.max() < len(vertices)
+        radius = np.linalg.norm(vertices, axis=1)
+        assert np.abs(radius - 40).max() < 40 * 0.05
+
+    # Quadric placement puts a box's corners back where they were
+    box = trimesh.creation.box(extents=(10, 20, 30))
+    vertices, _ = decimate.simplify(soup(box.subdivide().subdivide()), [500])[0]
+    for corner in box.vertices:
+        assert np.linalg.norm(vertices - corner, axis=1).min() < 1e-6
+
+
+def test_binary_stl_is_read_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(decimate, "CHUNK_TRIANGLES", 1000)
+    path = tmp_path / "ball.stl"
+    path.write_bytes(SPHERE.export(file_type="stl"))
+
+    chunks = list(lods._triangle_chunks(path, "stl")())
+    assert max(len(chunk) for chunk in chunks) == 1000
+    assert np.allclose(np.concatenate(chunks), SPHERE.vertices[SPHERE.faces], atol=1e-4)
+    assert lods.levels_for(len(SPHERE.faces)) == []
+
+
+def test_preview_serves_coarsest_level_first(make_sessions, make_app, monkeypatch):
+    spec = importlib.util.spec_from_file_location(
+        "app.routes.models", Path(__file__).resolve().parents[1] / "app" / "routes" / "models.py"
+    )
+    models = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(models)
+
+    memory = MemoryStorage()
+    monkeypatch.setattr(lods, "LEVEL_TRIANGLES", {1: 5000, 2: 500})
+    monkeypatch.setattr(models, "get_storage", lambda: memory)
+    monkeypatch.setattr(
+        static_files, "get_uploads_server", lambda: static_files.StorageObjectServer(memory)
+    )
+
+    sessions = make_sessions(ModelMetadata)
+    model_id = uuid.uuid4()
+
+    async def setup():
+        blob = await blobs.store(memory, SPHERE.export(file_type="stl"))
+        key = await blobs.attach(memory, blob, layout.model_key(model_id, ".stl"))
+        await memory.put(
+            blobs.derived_key(blob.sha256, compact_mesh.FORMAT),
+            compact_mesh.encode(SPHERE.vertices, SPHERE.faces),
+        )
+        async with sessions() as db:
+            db.add(
+                ModelMetadata(
+                    id=model_id,
+                    user_id=uuid.uuid4(),
+                    name="m",
+                    filename="ball.stl",
+                    filepath=key,
+                    file_url="x",
+                    content_hash=blob.sha256,
+                )
+            )
+            await db.commit()
+        made = await lods.generate(blob.sha256, "stl", storage=memory)
+        return made, await lods.generate(blob.sha256, "stl", storage=memory)
+
+    assert asyncio.run(setup()) == ([1, 2], [])
+
+    client = TestClient(make_app(models, "/api/v1/models", sessions))
+
+    url, served = f"http://testserver/api/v1/models/{model_id}/preview", []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        served.append(
+            (int(response.headers["x-mesh-level"]), len(compact_mesh.decode(response.content)[1]))
+        )
+        link = response.links.get("next")
+        url = link and link["url"]
+
+    assert [level for level, _ in served] == [2, 1, 0]
+    assert served[0][1] < served[1][1] < served[2][1] == len(SPHERE.faces)
+    assert client.get(f"/api/v1/models/{model_id}/preview?level=3").status_code == 404
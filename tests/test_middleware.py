@@ -0,0 +1,58 @@
+import os
+import sys
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from starlette.middleware.sessions import SessionMiddleware
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.middleware import PathPrefixMiddleware, StripTrailingSlashMiddleware  # noqa: E402
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/api/v1/upload")
+    async def upload():
+        return {"ok": True}
+
+    @app.get("/api/v1/auth/state")
+    async def auth_state(request: Request):
+        request.session["seen"] = True
+        return {"session": "session" in request.scope}
+
+    @app.get("/api/v1/other")
+    async def other(request: Request):
+        return {"session": "session" in request.scope}
+
+    app.add_middleware(
+        PathPrefixMiddleware,
+        middleware=SessionMiddleware,
+        prefixes=("/api/v1/auth",),
+        secret_key="test",
+        session_cookie="mw_state",
+    )
+    app.add_middleware(StripTrailingSlashMiddleware)
+    return app
+
+
+def test_trailing_slash_is_routed_without_redirect():
+    client = TestClient(make_app())
+    response = client.get("/api/v1/upload/", follow_redirects=False)
+    assert response.status_code == 200
+    assert response.json() == {"ok": True}
+
+
+def test_session_only_applies_under_prefix():
+    client = TestClient(make_app())
+
+    scoped = client.get("/api/v1/auth/state")
+    assert scoped.json() == {"session": True}
+    assert "mw_state" in scoped.cookies
+
+    other = client.get("/api/v1/other")
+    assert other.json() == {"session": False}
+    assert "set-cookie" not in other.headers
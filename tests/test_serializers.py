@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+import uuid
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models import Filament, ModelMetadata  # noqa: E402
+from app.schemas.filaments import FilamentOut  # noqa: E402
+from app.schemas.models import ModelOut  # noqa: E402
+from app.utils.serializers import json_list_response, trusted_json, validated_json  # noqa: E402
+
+
+def make_filament():
+    return Filament(
+        id=uuid.uuid4(),
+        category="PLA",
+        type="Matte",
+        color_name="Ice Blue",
+        color_hex="#A3D8F4",
+        price_per_kg=25.99,
+        is_active=True,
+        created_at=datetime(2025, 1, 1),
+    )
+
+
+def test_trusted_json_matches_schema_dump():
+    filament = make_filament()
+    expected = FilamentOut.model_validate(filament).model_dump(mode="json", by_alias=True)
+    assert json.loads(trusted_json(FilamentOut, [filament])) == [expected]
+
+
+def test_validated_json_reads_orm_attribute_aliases():
+    model = ModelMetadata(
+        id=uuid.uuid4(),
+        name="Benchy",
+        file_url="/uploads/benchy.stl",
+        uploaded_at=datetime(2025, 1, 1),
+    )
+    [item] = json.loads(validated_json(ModelOut, [model]))
+    assert item["id"] == str(model.id)
+    assert item["created_at"] == "2025-01-01T00:00:00"
+    assert item["is_active"] is True
+
+
+def test_json_list_response_is_bytes_json():
+    response = json_list_response(FilamentOut, [], trusted=True)
+    assert response.media_type == "application/json"
+    assert response.body == b"[]"
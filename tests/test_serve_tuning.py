@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.scripts.serve import recommended_workers, resolve_tuning  # noqa: E402
+
+GB = 1024**3
+
+
+def test_one_worker_per_cpu_when_memory_allows():
+    assert recommended_workers(cpus=8, memory_bytes=32 * GB, worker_memory_mb=256) == 8
+
+
+def test_memory_caps_worker_count():
+    # 2 GB * 0.75 headroom / 512 MB per worker
+    assert recommended_workers(cpus=16, memory_bytes=2 * GB, worker_memory_mb=512) == 3
+
+
+def test_always_at_least_one_worker():
+    assert recommended_workers(cpus=4, memory_bytes=64 * 1024**2) == 1
+
+
+def test_explicit_workers_and_production_options():
+    tuning = resolve_tuning(bind="127.0.0.1:9000", workers=5)
+    options = tuning.gunicorn_options()
+    assert options["workers"] == 5
+    assert options["preload_app"] is True
+    assert options["worker_class"] == "app.scripts.serve.TunedUvicornWorker"
+    assert tuning.env == "production"
+
+
+def test_serve_respects_env(monkeypatch):
+    from click.testing import CliRunner
+
+    from app.cli import cli
+
+    monkeypatch.setenv("ENV", "staging")
+    result = CliRunner().invoke(cli, ["serve", "--dry-run"])
+    assert result.exit_code == 0 and "staging" in result.output
+    # The flag still wins
+    result = CliRunner().invoke(cli, ["serve", "--dry-run", "--env", "development"])
+    assert "development" in result.output
@@ -0,0 +1,199 @@
+import asyncio
+import gzip
+import importlib.util
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.models import ModelMetadata, User  # noqa: E402
+from app.scripts.reshard import reshard_models  # noqa: E402
+from app.services.storage import LocalStorage, MemoryStorage, ObjectNotFound, layout  # noqa: E402
+from app.utils.static_files import StorageObjectServer, UploadsFileServer  # noqa: E402
+from tests.test_storage import FakeS3, make_s3  # noqa: E402
+
+MODEL_ID = uuid.UUID("7d7a4b8e-0c1f-4a55-9b7e-2f6c1d9a0e11")
+
+
+def test_keys_group_artifacts_per_model_under_two_shard_levels():
+    key = layout.model_key(MODEL_ID, ".STL")
+    shard = layout.shard(MODEL_ID)
+    assert key == f"models/{shard}/{MODEL_ID}/model.stl"
+    assert len(shard) == 5 and shard[2] == "/"
+    assert layout.artifact_key(MODEL_ID, layout.THUMBNAIL).rsplit("/", 1)[0] == key.rsplit("/", 1)[0]
+    # Random ids spread over many directories
+    assert len({layout.shard(uuid.uuid4()).split("/")[0] for _ in range(500)}) > 200
+
+    assert layout.parse_key(key) == (str(MODEL_ID), "model.stl")
+    assert layout.public_path(key) == f"m/{MODEL_ID}/model.stl"
+    assert layout.public_path("users/u1/avatars/avatar.png") == "users/u1/avatars/avatar.png"
+
+
+def test_public_and_legacy_paths_resolve_to_sharded_keys():
+    assert layout.candidate_keys(f"m/{MODEL_ID}/thumbnail.png") == [
+        layout.artifact_key(MODEL_ID, "thumbnail.png")
+    ]
+    assert layout.candidate_keys(f"m/{MODEL_ID}") == []
+
+    legacy = f"users/u1/models/{MODEL_ID}"
+    expected = {
+        f"{legacy}.stl": "model.stl",
+        f"{legacy}.stl.gz": "model.stl.gz",
+        f"{legacy}_thumbnail.png": "thumbnail.png",
+        f"{legacy}.png": "thumbnail.png",
+        f"{legacy}.webm": "turntable.webm",
+    }
+    for path, artifact in expected.items():
+        assert layout.candidate_keys(path) == [path, layout.artifact_key(MODEL_ID, artifact)]
+    assert layout.candidate_keys("users/u1/models/benchy.stl") == ["users/u1/models/benchy.stl"]
+
+
+@pytest.mark.parametrize("backend", ["local", "memory", "s3"])
+def test_copy(backend, tmp_path):
+    storage = {
+        "local": lambda: LocalStorage(tmp_path),
+        "memory": MemoryStorage,
+        "s3": lambda: make_s3(FakeS3()),
+    }[backend]()
+
+    async def scenario():
+        await storage.put("a/b.stl", b"solid", content_type="model/stl")
+        info = await storage.copy("a/b.stl", "c/d/e.stl")
+        assert info.key == "c/d/e.stl" and info.size == 5
+        assert await storage.get("c/d/e.stl") == b"solid"
+        await storage.delete("a/b.stl")
+        assert await storage.get("c/d/e.stl") == b"solid"
+        with pytest.raises(ObjectNotFound):
+            await storage.copy("a/b.stl", "x.stl")
+
+    asyncio.run(scenario())
+
+
+def test_local_copy_is_a_hard_link(tmp_path):
+    storage = LocalStorage(tmp_path)
+    asyncio.run(storage.put("a.stl", b"solid"))
+    asyncio.run(storage.copy("a.stl", "models/aa/bb/x/model.stl"))
+    assert (tmp_path / "a.stl").stat().st_ino == (tmp_path / "models/aa/bb/x/model.stl").stat().st_ino
+
+
+@pytest.fixture()
+def db(make_sessions):
+    return make_sessions(User, ModelMetadata)
+
+
+def add_models(sessions, user_id, rows):
+    async def insert():
+        async with sessions() as session:
+            session.add(User(id=user_id, email="a@example.com", username="alice"))
+            for model_id, filepath in rows:
+                session.add(
+                    ModelMetadata(
+                        id=model_id,
+                        user_id=user_id,
+                        name="Part",
+                        filename="part.stl",
+                        filepath=filepath,
+                        file_url=f"http://api/uploads/{filepath}",
+                    )
+                )
+            await session.commit()
+
+    asyncio.run(insert())
+
+
+def load_model(sessions, model_id):
+    async def get():
+        async with sessions() as session:
+            return await session.get(ModelMetadata, model_id)
+
+    return asyncio.run(get())
+
+
+def test_reshard_moves_files_in_batches_and_keeps_old_urls(tmp_path, db):
+    uploads = tmp_path / "uploads"
+    storage = LocalStorage(uploads)
+    user_id = uuid.uuid4()
+    ids = [uuid.uuid4() for _ in range(3)]
+    missing = uuid.uuid4()
+    for model_id in ids:
+        legacy = uploads / "users" / str(user_id) / "models"
+        legacy.mkdir(parents=True, exist_ok=True)
+        (legacy / f"{model_id}.stl").write_bytes(b"solid " + model_id.bytes)
+        (legacy / f"{model_id}.stl.gz").write_bytes(gzip.compress(b"solid " + model_id.bytes))
+        (legacy / f"{model_id}_thumbnail.png").write_bytes(b"png")
+    (legacy / f"{ids[0]}.webm").write_bytes(b"webm")
+    add_models(
+        db,
+        user_id,
+        [(m, f"users/{user_id}/models/{m}.stl") for m in ids]
+        + [(missing, f"users/{user_id}/models/{missing}.stl")],
+    )
+
+    stats = asyncio.run(
+        reshard_models(batch_size=2, session_factory=db, storage=storage, base_url="http://api")
+    )
+    assert (stats.scanned, stats.migrated, stats.missing, stats.files) == (4, 3, 1, 10)
+    assert not [p for p in legacy.iterdir()]
+
+    model = load_model(db, ids[0])
+    assert model.filepath == layout.model_key(ids[0], ".stl")
+    assert model.file_url.startswith(f"http://api/uploads/m/{ids[0]}/model.stl?v=")
+    assert model.thumbnail_url.startswith(f"http://api/uploads/m/{ids[0]}/thumbnail.png?v=")
+    assert model.webm_url.startswith(f"http://api/uploads/m/{ids[0]}/turntable.webm?v=")
+    assert (uploads / layout.model_key(ids[0], ".stl.gz")).is_file()
+    assert load_model(db, missing).filepath.startswith("users/")
+
+    app = FastAPI()
+    app.mount("/uploads", UploadsFileServer(uploads))
+    client = TestClient(app)
+    new = client.get(f"/uploads/m/{ids[1]}/model.stl")
+    assert new.status_code == 200 and new.content == b"solid " + ids[1].bytes
+    old = client.get(f"/uploads/users/{user_id}/models/{ids[1]}.stl")
+    assert old.status_code == 200 and old.headers["etag"] == new.headers["etag"]
+    assert client.get(f"/uploads/users/{user_id}/models/{ids[1]}_thumbnail.png").content == b"png"
+    assert client.get(f"/uploads/m/{ids[1]}/../../etc/passwd").status_code == 404
+
+    again = asyncio.run(reshard_models(session_factory=db, storage=storage, base_url="http://api"))
+    assert (again.scanned, again.migrated, again.missing) == (1, 0, 1)
+
+
+def test_object_server_and_browse_hide_shards(db, make_app, monkeypatch):
+    memory = MemoryStorage()
+    user_id = uuid.uuid4()
+    key = layout.model_key(MODEL_ID, ".stl")
+    asyncio.run(memory.put(key, b"solid"))
+    asyncio.run(memory.put(layout.artifact_key(MODEL_ID, layout.THUMBNAIL), b"png"))
+    asyncio.run(memory.put(layout.model_key(uuid.uuid4(), ".stl"), b"orphan"))
+    add_models(db, user_id, [(MODEL_ID, key)])
+
+    app = FastAPI()
+    app.mount("/uploads", StorageObjectServer(memory))
+    assert TestClient(app).get(f"/uploads/m/{MODEL_ID}/model.stl").content == b"solid"
+
+    spec = importlib.util.spec_from_file_location(
+        "app.routes.models", Path(__file__).resolve().parents[1] / "app" / "routes" / "models.py"
+    )
+    models = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(models)
+    monkeypatch.setattr(models, "get_storage", lambda: memory)
+
+    app = make_app(models, "/api/v1/models", db)
+    listed = TestClient(app).get("/api/v1/models/browse").json()
+    assert listed["total"] == 1
+    assert listed["models"][0] == {
+        "username": "alice",
+        "filename": "part.stl",
+        "path": key,
+        "url": f"/uploads/m/{MODEL_ID}/model.stl",
+        "thumbnail_url": f"/uploads/m/{MODEL_ID}/thumbnail.png",
+        "webm_url": None,
+    }
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.startup.graph import StartupStep, run_once, run_startup  # noqa: E402
+
+
+class MemoryRedis:
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+
+    async def get(self, key):
+        if self.expires.get(key, float("inf")) <= time.monotonic():
+            self.data.pop(key, None)
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and await self.get(key) is not None:
+            return None
+        self.data[key] = value
+        await self.expire(key, ex)
+        return True
+
+    async def expire(self, key, seconds):
+        self.expires[key] = time.monotonic() + seconds if seconds else float("inf")
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_independent_steps_overlap_and_dependencies_wait():
+    events = []
+
+    def step(name, delay):
+        async def run():
+            events.append(f"{name}:start")
+            await asyncio.sleep(delay)
+            events.append(f"{name}:end")
+
+        return run
+
+    steps = [
+        StartupStep("a", step("a", 0.05)),
+        StartupStep("b", step("b", 0.05)),
+        StartupStep("c", step("c", 0), requires=("a", "b")),
+    ]
+    timings = asyncio.run(run_startup(steps))
+
+    assert events[:2] == ["a:start", "b:start"]
+    assert events.index("c:start") > max(events.index("a:end"), events.index("b:end"))
+    assert set(timings) == {"a", "b", "c"}
+
+
+def test_failing_step_aborts_startup():
+    async def boom():
+        raise RuntimeError("redis down")
+
+    ran = []
+
+    async def after():
+        ran.append(1)
+
+    steps = [StartupStep("redis", boom), StartupStep("schema", after, requires=("redis",))]
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_startup(steps))
+    assert not ran
+
+
+def test_cycles_are_rejected():
+    async def noop():
+        pass
+
+    steps = [StartupStep("a", noop, requires=("b",)), StartupStep("b", noop, requires=("a",))]
+    with pytest.raises(ValueError):
+        asyncio.run(run_startup(steps))
+
+
+def test_run_once_across_workers():
+    calls = []
+
+    async def create_schema():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+
+    async def run():
+        redis = MemoryRedis()
+        workers = [run_once(redis, "schema", "v1", create_schema, poll=0.01) for _ in range(8)]
+        first = await asyncio.gather(*workers)
+        again = await run_once(redis, "schema", "v1", create_schema)
+        changed = await run_once(redis, "schema", "v2", create_schema)
+        return first, again, changed
+
+    first, again, changed = asyncio.run(run())
+    assert first.count(True) == 1
+    assert again is False
+    assert changed is True
+    assert len(calls) == 2
+
+
+def test_run_once_holds_the_lock_past_its_ttl():
+    running, overlaps = [], []
+
+    async def create_schema():
+        overlaps.append(bool(running))
+        running.append(1)
+        await asyncio.sleep(0.3)
+        running.pop()
+
+    async def run():
+        redis = MemoryRedis()
+        workers = [
+            run_once(redis, "schema", "v1", create_schema, lock_ttl=0.1, poll=0.01)
+            for _ in range(2)
+        ]
+        return await asyncio.gather(*workers)
+
+    assert sorted(asyncio.run(run())) == [False, True]
+    assert overlaps == [False]
@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# set minimal env vars (inherited by the benchmark subprocesses)
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.scripts.bench import import_profile, measure_startup  # noqa: E402
+
+# Only pulled in by the code paths that need them.
+DEFERRED = {"stripe", "trimesh", "PIL", "celery", "numpy", "psycopg2"}
+
+
+def test_app_import_skips_heavy_dependencies():
+    loaded = {package for package, _, _ in import_profile("app.main")}
+    assert "fastapi" in loaded
+    assert not (loaded & DEFERRED)
+
+
+def test_measure_startup_reports_time_and_rss():
+    sample = measure_startup("app.config.settings")
+    assert sample.import_seconds > 0
+    assert sample.wall_seconds >= sample.import_seconds
+    assert sample.max_rss_mb > 1
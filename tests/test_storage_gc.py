@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import os
+import sys
+import uuid
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import select
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.models import Blob, ModelMetadata, UploadJob, User  # noqa: E402
+from app.services import blobs, storage_gc  # noqa: E402
+from app.services.storage import LocalStorage, layout  # noqa: E402
+from tests.test_startup_graph import MemoryRedis  # noqa: E402
+
+GRACE = storage_gc.settings.gc_grace_seconds
+RETENTION = storage_gc.settings.gc_retention_hours * 3600
+
+
+@pytest.fixture()
+def sessions(make_sessions):
+    return make_sessions(User, ModelMetadata, UploadJob, Blob)
+
+
+@pytest.fixture(autouse=True)
+def locks(monkeypatch):
+    redis = MemoryRedis()
+    monkeypatch.setattr(storage_gc, "redis", redis)
+    return redis
+
+
+def model(model_id, user_id, key, content_hash=None):
+    return ModelMetadata(
+        id=model_id,
+        user_id=user_id,
+        name="m",
+        filename="m.stl",
+        filepath=key,
+        file_url="x",
+        content_hash=content_hash,
+    )
+
+
+def test_orphans_are_quarantined_then_deleted(tmp_path, sessions):
+    storage = LocalStorage(tmp_path / "uploads")
+    user_id, gone_user = uuid.uuid4(), uuid.uuid4()
+    live_id, orphan_id, late_id, uploading_id = (uuid.uuid4() for _ in range(4))
+    kept, dropped = b"kept" * 100, b"dropped" * 100
+    kept_sha, dropped_sha = hashlib.sha256(kept).hexdigest(), hashlib.sha256(dropped).hexdigest()
+
+    async def gc(now, shards=len(storage_gc.SHARDS)):
+        return await storage_gc.collect_garbage(
+            shards=shards, session_factory=sessions, storage=storage, now=now
+        )
+
+    async def scenario():
+        for data in (kept, dropped):
+            await blobs.store(storage, data)
+        for key in (
+            f"users/{user_id}/avatars/avatar.png",
+            f"users/{user_id}/avatars/input.jpg",
+            f"users/{gone_user}/avatars/avatar.png",
+            f"users/{gone_user}/models/{uuid.uuid4()}.stl",
+            layout.model_key(orphan_id, ".stl"),
+            layout.artifact_key(orphan_id, layout.THUMBNAIL),
+            layout.model_key(late_id, ".stl"),
+            layout.model_key(uploading_id, ".stl"),
+            f"{blobs.STAGING_PREFIX}abandoned",
+        ):
+            await storage.put(key, b"x" * 10)
+        live_key = await blobs.attach(
+            storage, blobs.StoredBlob(kept_sha, len(kept), False), layout.model_key(live_id, ".stl")
+        )
+
+        async with sessions() as db:
+            db.add(User(id=user_id, email="a@example.com", username="a", hashed_password="x"))
+            await db.flush()
+            db.add(model(live_id, user_id, live_key, kept_sha))
+            db.add(Blob(sha256=kept_sha, size=len(kept), refcount=1))
+            db.add(UploadJob(id=uploading_id, user_id=user_id, filename="u.stl", status="pending"))
+            # The model that referenced this blob went with its user.
+            db.add(Blob(sha256=dropped_sha, size=len(dropped), refcount=1))
+            await db.commit()
+
+        first = await gc(now=1000)
+        second = await gc(now=1000 + GRACE)
+        async with sessions() as db:
+            # Committed after quarantine: must come back.
+            db.add(model(late_id, user_id, layout.model_key(late_id, ".stl")))
+            await db.commit()
+            stale = (await db.get(Blob, dropped_sha)).refcount
+        before = REGISTRY.get_sample_value("makerworks_storage_gc_reclaimed_bytes_total") or 0
+        third = await gc(now=1000 + GRACE + RETENTION)
+        after = REGISTRY.get_sample_value("makerworks_storage_gc_reclaimed_bytes_total")
+        async with sessions() as db:
+            blob_rows = (await db.execute(select(Blob.sha256))).scalars().all()
+        return first, second, third, stale, after - before, blob_rows
+
+    first, second, third, stale, reclaimed, blob_rows = asyncio.run(scenario())
+
+    # users/<gone>/, input.jpg, two model dirs, the unreferenced blob, staging
+    assert (first.suspects, first.quarantined) == (6, 0)
+    assert (second.suspects, second.quarantined) == (0, 8)
+    assert stale == 0
+    assert (third.restored, third.deleted) == (1, 7)
+    assert third.reclaimed_bytes == reclaimed == 10 * 6 + len(dropped)
+    assert blob_rows == [kept_sha]
+
+    root = tmp_path / "uploads"
+    remaining = sorted(
+        str(p.relative_to(root)) for p in root.rglob("*") if p.is_file() and ".gc" not in p.parts
+    )
+    assert remaining == sorted(
+        [
+            f"users/{user_id}/avatars/avatar.png",
+            layout.model_key(live_id, ".stl"),
+            layout.model_key(late_id, ".stl"),
+            layout.model_key(uploading_id, ".stl"),
+            blobs.blob_key(kept_sha),
+        ]
+    )
+
+
+def test_runs_resume_from_the_saved_cursor(tmp_path, sessions, locks):
+    storage = LocalStorage(tmp_path)
+
+    async def scenario():
+        await storage_gc.collect_garbage(shards=300, session_factory=sessions, storage=storage, now=0)
+        first = await storage_gc.load_state(storage)
+        await storage_gc.collect_garbage(shards=500, session_factory=sessions, storage=storage, now=0)
+        dry = await storage_gc.collect_garbage(
+            shards=5, dry_run=True, session_factory=sessions, storage=storage, now=0
+        )
+        # `mw storage gc` while beat's run holds the lock
+        await locks.set("makerworks:lock:storage-gc", "beat", ex=300)
+        busy = await storage_gc.collect_garbage(shards=5, session_factory=sessions, storage=storage)
+        cursor = (await storage_gc.load_state(storage)).cursor
+        return first.cursor, cursor, dry.shards, busy.skipped
+
+    assert asyncio.run(scenario()) == (300, 800 % len(storage_gc.SHARDS), 5, True)
+    assert len(storage_gc.SHARDS) == 769
@@ -42,3 +42,28 @@ def test_system_snapshot_route(client):
     data = response.json()
     assert "platform" in data
     assert "cpu_cores" in data
+
+
+def test_system_snapshot_history_is_columnar(client):
+    import asyncio
+
+    from app.services.system_history import snapshot_history
+
+    async def record():
+        for second in range(3):
+            snap = {"load_avg": {"1min": 0.5 * second}, "memory_percent": 40.0}
+            await snapshot_history.record(snap, 1_000_000 + second)
+
+    asyncio.run(record())
+
+    response = client.get("/api/v1/system/snapshot/history", params={"tier": "1s"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["step_seconds"] == 1
+    assert len(data["t"]) == len(data["load_1m"]) == len(data["memory_percent"])
+    assert data["load_1m"][-2:] == [0.0, 0.5]
+
+
+def test_system_snapshot_history_rejects_unknown_tier(client):
+    response = client.get("/api/v1/system/snapshot/history", params={"tier": "5s"})
+    assert response.status_code == 400
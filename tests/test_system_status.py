@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.services.system_status import (
+    SnapshotSampler,
+    StatusHub,
+    SystemStatusBroadcaster,
+)
+
+
+def test_slow_client_only_keeps_latest_frame():
+    async def run():
+        hub = StatusHub()
+        with hub.subscribe() as frames:
+            hub.publish("one")
+            hub.publish("two")
+            hub.publish("three")
+            assert frames.qsize() == 1
+            assert await frames.get() == "three"
+        assert len(hub) == 0
+
+    asyncio.run(run())
+
+
+def test_new_client_is_primed_with_latest_frame():
+    hub = StatusHub()
+    hub.publish("hello")
+    with hub.subscribe() as frames:
+        assert frames.get_nowait() == "hello"
+
+
+class DownRedis:
+    async def set(self, *args, **kwargs):
+        raise RedisConnectionError("down")
+
+
+def test_falls_back_to_local_sampling_without_redis():
+    calls = []
+
+    async def sampler():
+        calls.append(1)
+        return {"cpu_cores": 4}
+
+    async def run():
+        hub = StatusHub()
+        broadcaster = SystemStatusBroadcaster(DownRedis(), hub, sampler=sampler)
+        await broadcaster._tick()
+        await broadcaster._tick()
+        return hub
+
+    hub = asyncio.run(run())
+    assert json.loads(hub.latest) == {"cpu_cores": 4}
+    assert len(calls) == 2
+
+
+def test_static_facts_are_probed_once(monkeypatch):
+    from app.utils import system_info
+
+    probes = []
+    monkeypatch.setattr(system_info, "detect_gpu", lambda: probes.append(1) or "None")
+    system_info.get_static_host_facts.cache_clear()
+
+    async def run():
+        sampler = SnapshotSampler()
+        first = await sampler.current()
+        await sampler.refresh()
+        await sampler.refresh()
+        return first
+
+    try:
+        snapshot = asyncio.run(run())
+    finally:
+        system_info.get_static_host_facts.cache_clear()
+
+    assert probes == [1]
+    assert snapshot["gpu"] == "None"
+    assert "load_avg" in snapshot
+
+
+def test_history_downsamples_and_stays_bounded():
+    from app.services.system_history import MemoryHistoryStore, SnapshotHistory
+
+    tiers = {"1s": (1, 5), "10s": (10, 2)}
+    history = SnapshotHistory(MemoryHistoryStore(tiers), tiers)
+
+    async def run():
+        for second in range(45):
+            snap = {"load_avg": {"1min": float(second)}, "memory_percent": 50.0}
+            await history.record(snap, second)
+        return await history.read("1s"), await history.read("10s")
+
+    fine, coarse = asyncio.run(run())
+    assert fine["t"] == [39, 40, 41, 42, 43]
+    assert coarse["t"] == [20, 30]
+    assert coarse["load_1m"] == [24.5, 34.5]
+    assert coarse["memory_percent"] == [50.0, 50.0]
+
+
+def test_history_is_kept_locally_while_redis_is_down(monkeypatch):
+    from app.services import system_status
+    from app.services.system_history import MemoryHistoryStore, SnapshotHistory
+
+    tiers = {"1s": (1, 5)}
+    shared = MemoryHistoryStore(tiers)
+    history = SnapshotHistory(shared, tiers)
+    clock = iter(range(100))
+    monkeypatch.setattr(system_status.time, "time", lambda: next(clock))
+
+    async def sampler():
+        return {"load_avg": {"1min": 1.0}, "memory_percent": 50.0}
+
+    async def run():
+        broadcaster = SystemStatusBroadcaster(
+            DownRedis(), StatusHub(), sampler=sampler, history=history
+        )
+        await broadcaster._tick()
+        for _ in range(3):
+            await broadcaster._record_history()
+        local = await history.read("1s")
+        broadcaster._redis_ok = True  # the listener resubscribed
+        await broadcaster._record_history()
+        return local
+
+    local = asyncio.run(run())
+    assert len(local["t"]) == 2 and local["load_1m"] == [1.0, 1.0]
+    assert history.store is shared and not asyncio.run(shared.read("1s"))
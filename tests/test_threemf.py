@@ -0,0 +1,200 @@
+import asyncio
+import importlib.util
+import io
+import os
+import sys
+import tracemalloc
+import uuid
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+import trimesh
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.models import Blob, ModelMetadata, UploadJob  # noqa: E402
+from app.services import blobs, direct_uploads  # noqa: E402
+from app.services.model_ingest import ingest_blob  # noqa: E402
+from app.services.storage import MemoryStorage, layout  # noqa: E402
+from app.utils import threemf  # noqa: E402
+
+spec = importlib.util.spec_from_file_location(
+    "app.routes.upload", Path(__file__).resolve().parents[1] / "app" / "routes" / "upload.py"
+)
+upload = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(upload)
+
+BOX = trimesh.creation.box(extents=(1, 2, 3))
+
+
+def mesh_xml(mesh):
+    vertices = "".join(f'<vertex x="{x}" y="{y}" z="{z}"/>' for x, y, z in mesh.vertices.tolist())
+    triangles = "".join(f'<triangle v1="{a}" v2="{b}" v3="{c}"/>' for a, b, c in mesh.faces.tolist())
+    return f"<mesh><vertices>{vertices}</vertices><triangles>{triangles}</triangles></mesh>"
+
+
+def package(model, part="3D/plate.model"):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(
+            "_rels/.rels",
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Target="/{part}" Id="r" Type="{threemf.MODEL_RELATIONSHIP}"/>'
+            "</Relationships>",
+        )
+        z.writestr(part, model)
+    return out.getvalue()
+
+
+# In centimetres: a box, and an assembly of the box twice, one copy 5 cm up
+PLATE = package(
+    f'<model unit="centimeter" xmlns="{threemf.CORE_NS}" xmlns:x="urn:vendor">'
+    '<resources><object id="1" name="Box">'
+    f"{mesh_xml(BOX)}</object>"
+    '<object id="2" name="Tower"><components><component objectid="1"/>'
+    '<component objectid="1" transform="1 0 0 0 1 0 0 0 1 0 0 5"/></components></object>'
+    "</resources><build>"
+    '<item objectid="1" transform="1 0 0 0 1 0 0 0 1 10 0 0"/><x:note/>'
+    '<item objectid="2"/>'
+    "</build></model>"
+)
+
+
+def test_multi_object_plate_metadata(monkeypatch):
+    monkeypatch.setattr(threemf, "CHUNK_ROWS", 5)  # several chunks per object
+    plate = threemf.read_plate(io.BytesIO(PLATE))
+
+    assert len(plate.faces) == 3 * len(BOX.faces) and plate.faces.max() == len(plate.vertices) - 1
+    box, tower = plate.objects
+    assert (box["object_id"], box["name"], tower["name"]) == ("1", "Box", "Tower")
+    assert box["transform"][9:] == [10, 0, 0]
+    assert box["triangles"] == 12 and tower["triangles"] == 24
+    # millimetres
+    assert np.isclose(box["volume"], 6000) and np.isclose(tower["volume"], 12000)
+    assert np.allclose(box["bbox"], [10, 20, 30]) and np.allclose(tower["bbox"], [10, 20, 80])
+    assert np.allclose(box["bounds"][0], [95, -10, -15])
+
+    open_box = package(
+        f'<model xmlns="{threemf.CORE_NS}"><resources><object id="1">'
+        f"{mesh_xml(trimesh.Trimesh(BOX.vertices, BOX.faces[:-1]))}</object></resources>"
+        '<build><item objectid="1"/></build></model>'
+    )
+    assert threemf.read_plate(io.BytesIO(open_box)).objects[0]["volume"] is None
+
+
+def test_parsing_does_not_build_a_dom():
+    sphere = trimesh.creation.icosphere(subdivisions=6)
+    data = threemf.write_3mf(sphere.vertices, sphere.faces)
+    tracemalloc.start()
+    try:
+        plate = threemf.read_plate(io.BytesIO(data))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert len(plate.faces) == len(sphere.faces)
+    # Arrays plus 1 MB read blocks; an ElementTree of the XML is 25x the arrays
+    assert peak < 10 * (plate.vertices.nbytes + plate.faces.nbytes)
+
+
+def test_limits_stop_the_parse(monkeypatch):
+    sphere = trimesh.creation.icosphere(subdivisions=4)
+    data = threemf.write_3mf(sphere.vertices, sphere.faces)
+    monkeypatch.setattr(threemf, "CHUNK_ROWS", 100)
+    with pytest.raises(threemf.ThreeMFError, match="more than 1000 triangles"):
+        threemf.read_plate(io.BytesIO(data), max_triangles=1000)
+
+    # 20 MB of XML in a ZIP of ~20 kB
+    xml = f'<model xmlns="{threemf.CORE_NS}">' + " " * (20 << 20) + "</model>"
+    bomb = package(xml)
+    assert len(bomb) < 100_000
+    with pytest.raises(threemf.ThreeMFError, match="larger than"):
+        threemf.read_plate(io.BytesIO(bomb), max_part_bytes=4 << 20)
+    # Inflated bytes are counted too, whatever the ZIP directory claims
+    parser = threemf._ModelParser(1000, 1000, 4 << 20)
+    with pytest.raises(threemf.ThreeMFError, match="larger than"):
+        parser.feed(io.BytesIO(xml.encode()))
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        '<!DOCTYPE model [<!ENTITY a "aaaa">]><model/>',
+        f'<model xmlns="{threemf.CORE_NS}"><resources><object id="1"><mesh><vertices>'
+        '<vertex x="0" y="0"/></vertices></mesh></object></resources></model>',
+        f'<model xmlns="{threemf.CORE_NS}"><build><item objectid="7"/></build></model>',
+        f'<model unit="furlong" xmlns="{threemf.CORE_NS}"/>',
+        "<model>",
+    ],
+)
+def test_broken_packages_are_rejected(model):
+    with pytest.raises(threemf.ThreeMFError):
+        threemf.read_plate(io.BytesIO(package(model)))
+
+
+def test_3mf_uploads_are_ingested_with_their_objects(make_sessions):
+    assert upload.validate_extension("plate.3MF") == ".3mf"
+    storage = MemoryStorage()
+    model_id = uuid.uuid4()
+    sessions = make_sessions(ModelMetadata, Blob)
+
+    async def scenario():
+        blob = await blobs.store(storage, PLATE, content_type="model/3mf")
+        async with sessions() as db:
+            values = await ingest_blob(
+                db,
+                storage,
+                blob,
+                await blobs.attach(storage, blob, layout.model_key(model_id, ".3mf")),
+                model_id=model_id,
+                user_id=uuid.uuid4(),
+                filename="plate.3mf",
+                name=None,
+                description=None,
+                base_url="http://api",
+            )
+            db.add(ModelMetadata(**values))
+            await db.commit()
+        async with sessions() as db:
+            return await db.get(ModelMetadata, model_id)
+
+    model = asyncio.run(scenario())
+    assert model.faces == 36 and np.isclose(model.volume, 18000)
+    assert [obj["name"] for obj in model.objects] == ["Box", "Tower"]
+
+
+def test_3mf_upload_is_processed_by_a_worker(make_sessions, make_app, monkeypatch):
+    storage = MemoryStorage()
+    sessions = make_sessions(ModelMetadata, UploadJob, Blob)
+    queued = []
+
+    async def enqueue(upload_id):
+        queued.append(str(upload_id))
+
+    monkeypatch.setattr(upload, "get_storage", lambda: storage)
+    monkeypatch.setattr(direct_uploads, "enqueue_processing", enqueue)
+    client = TestClient(make_app(upload, "/api/v1/upload", sessions))
+
+    response = client.post(
+        "/api/v1/upload", files={"file": ("plate.3mf", PLATE, "model/3mf")}, data={"name": "Plate"}
+    )
+    assert response.status_code == 202 and response.json()["status"] == "uploaded"
+    upload_id = response.json()["upload_id"]
+    assert queued == [upload_id]
+
+    done = direct_uploads.process_direct_upload(upload_id, sessions, storage)
+    assert asyncio.run(done) == "done"
+    status = client.get(f"/api/v1/upload/{upload_id}").json()
+    assert status["status"] == "done" and status["model_id"] == upload_id
+
+    async def load_model():
+        async with sessions() as db:
+            return await db.get(ModelMetadata, uuid.UUID(upload_id))
+
+    model = asyncio.run(load_model())
+    assert model.name == "Plate" and len(model.objects) == 2
@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import inspect
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.models import Blob, ModelMetadata  # noqa: E402
+from app.services import blobs, tiering  # noqa: E402
+from app.services.storage import LocalStorage, MemoryStorage, layout  # noqa: E402
+from app.utils.static_files import StorageObjectServer, UploadsFileServer  # noqa: E402
+
+# Binary STL: 80-byte header, count, 50-byte records of mostly repeated floats
+DATA = b"\0" * 80 + (2000).to_bytes(4, "little") + bytes(range(50)) * 2000
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+class FakeRedis:
+    """The sorted-set commands the tier job uses."""
+
+    def __init__(self):
+        self.zsets = {}
+        self.values = {}
+
+    def zadd(self, name, mapping):
+        self.zsets.setdefault(name, {}).update(mapping)
+
+    def zincrby(self, name, amount, member):
+        zset = self.zsets.setdefault(name, {})
+        zset[member] = zset.get(member, 0) + amount
+
+    def zrange(self, name, start, end, withscores=False):
+        return list(self.zsets.get(name, {}).items())
+
+    async def delete(self, name):
+        self.zsets.pop(name, None)
+        self.values.pop(name, None)
+
+    async def set(self, name, value, nx=False, ex=None):
+        if nx and name in self.values:
+            return None
+        self.values[name] = value
+        return True
+
+    async def get(self, name):
+        return self.values.get(name)
+
+    async def expire(self, name, seconds):
+        pass
+
+    async def zmscore(self, name, members):
+        return [self.zsets.get(name, {}).get(m) for m in members]
+
+    async def zremrangebyscore(self, name, low, high):
+        zset = self.zsets.get(name, {})
+        for member in [m for m, score in zset.items() if score <= high]:
+            del zset[member]
+
+    def pipeline(self, transaction=True):
+        redis, calls = self, []
+
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: calls.append((name, args, kwargs))
+
+            async def execute(self):
+                results = []
+                for name, args, kwargs in calls:
+                    result = getattr(redis, name)(*args, **kwargs)
+                    results.append(await result if inspect.isawaitable(result) else result)
+                return results
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Pipeline()
+
+
+@pytest.fixture()
+def env(make_sessions, monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(tiering, "redis", fake)
+    monkeypatch.setattr(tiering, "_recorded", {})
+    return make_sessions(ModelMetadata, Blob), fake
+
+
+def test_cold_blobs_are_compressed_served_and_promoted(tmp_path, env):
+    sessions, fake = env
+    storage = LocalStorage(tmp_path / "uploads")
+    ids = [uuid.uuid4(), uuid.uuid4()]
+    keys = [layout.model_key(model_id, ".stl") for model_id in ids]
+    now = datetime.utcnow()
+
+    async def setup():
+        blob = await blobs.store(storage, DATA)
+        async with sessions() as db:
+            for model_id, key in zip(ids, keys):
+                await blobs.attach(storage, blob, key)
+                await storage.put(key + ".gz", b"variant")
+                db.add(
+                    ModelMetadata(
+                        id=model_id,
+                        user_id=uuid.uuid4(),
+                        name="m",
+                        filename="part.stl",
+                        filepath=key,
+                        file_url="x",
+                        content_hash=DIGEST,
+                        faces=2000,
+                    )
+                )
+            db.add(Blob(sha256=DIGEST, size=len(DATA), refcount=2, created_at=now - timedelta(days=60)))
+            await db.commit()
+        # Read recently: stays hot
+        await tiering.record_access(keys[0])
+        hot = await tiering.rebalance(session_factory=sessions, storage=storage, now=now)
+        cold = await tiering.rebalance(
+            session_factory=sessions, storage=storage, now=now + timedelta(days=31)
+        )
+        return hot, cold
+
+    hot, cold = asyncio.run(setup())
+    root = tmp_path / "uploads"
+    assert (hot.scanned, hot.demoted) == (1, 0)
+    assert (cold.demoted, cold.saved_bytes > len(DATA) // 2) == (1, True)
+    assert not (root / blobs.blob_key(DIGEST)).exists()
+    compressed = root / tiering.cold_key(blobs.blob_key(DIGEST))
+    for key in keys:
+        assert not (root / key).exists() and not (root / (key + ".gz")).exists()
+        assert (root / tiering.cold_key(key)).stat().st_ino == compressed.stat().st_ino
+
+    app = FastAPI()
+    app.mount("/uploads", UploadsFileServer(root, on_access=tiering.record_access))
+    client = TestClient(app)
+    url = f"/uploads/m/{ids[1]}/model.stl"
+    plain = client.get(url, headers={"accept-encoding": "identity"})
+    assert plain.status_code == 200 and plain.content == DATA
+    assert plain.headers["content-length"] == str(len(DATA))
+    partial = client.get(url, headers={"range": "bytes=100-299"})
+    assert partial.status_code == 206 and partial.content == DATA[100:300]
+    raw = client.get(url, headers={"accept-encoding": "zstd"})
+    assert raw.headers["content-encoding"] == "zstd"
+    assert int(raw.headers["content-length"]) == compressed.stat().st_size
+
+    async def promote():
+        async with tiering.open_local(storage, keys[0]) as path:
+            assert path.read_bytes() == DATA
+        stats = await tiering.rebalance(
+            session_factory=sessions, storage=storage, now=now + timedelta(days=32)
+        )
+        async with sessions() as db:
+            return stats, (await db.get(Blob, DIGEST)).cold_since
+
+    stats, cold_since = asyncio.run(promote())
+    assert stats.promoted == 1 and cold_since is None
+    assert not compressed.exists()
+    blob = root / blobs.blob_key(DIGEST)
+    for key in keys:
+        assert (root / key).stat().st_ino == blob.stat().st_ino
+        assert not (root / tiering.cold_key(key)).exists()
+    assert fake.zsets.get(tiering.COLD_HITS) is None
+
+
+def test_object_store_reads_decompress(env):
+    storage = MemoryStorage()
+    key = blobs.blob_key(DIGEST)
+
+    async def scenario():
+        await storage.put(key, DATA)
+        await tiering._compress(storage, key, len(DATA))
+        await storage.delete(key)
+        info, cold = await tiering.stat(storage, key)
+        middle = b"".join([c async for c in tiering.stream(storage, key, 1000, 5000, 777)])
+        return info.size, cold, middle
+
+    assert asyncio.run(scenario()) == (len(DATA), True, DATA[1000:6000])
+
+    app = FastAPI()
+    app.mount("/uploads", StorageObjectServer(storage, redirect=True))
+    response = TestClient(app).get(f"/uploads/{key}", follow_redirects=False)
+    assert response.status_code == 200 and response.content == DATA
+
+
+def test_overlapping_runs_are_skipped(env):
+    sessions, fake = env
+    fake.values["makerworks:lock:storage-tier"] = "beat"
+    stats = asyncio.run(tiering.rebalance(session_factory=sessions, storage=MemoryStorage()))
+    assert stats.skipped and (stats.promoted, stats.demoted) == (0, 0)
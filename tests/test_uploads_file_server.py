@@ -0,0 +1,87 @@
+import hashlib
+import os
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.utils.static_files import UploadsFileServer, content_url, parse_range  # noqa: E402
+
+DATA = bytes(range(256)) * 40  # 10 KiB
+
+
+def make_client(tmp_path):
+    (tmp_path / "models").mkdir()
+    (tmp_path / "models" / "part.stl").write_bytes(DATA)
+    app = FastAPI()
+    app.mount("/uploads", UploadsFileServer(tmp_path))
+    return TestClient(app)
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=0-5000", 1000) == (0, 999)
+    assert parse_range("bytes=1000-", 1000) is False
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+
+
+def test_strong_etag_and_conditional_get(tmp_path):
+    client = make_client(tmp_path)
+    response = client.get("/uploads/models/part.stl")
+    assert response.status_code == 200
+    assert response.content == DATA
+    etag = response.headers["etag"]
+    assert etag == '"%s"' % hashlib.sha256(DATA).hexdigest()[:32]
+    assert response.headers["cache-control"] == "public, no-cache"
+    assert response.headers["accept-ranges"] == "bytes"
+
+    revalidated = client.get("/uploads/models/part.stl", headers={"if-none-match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+
+def test_content_addressed_url_is_immutable(tmp_path):
+    client = make_client(tmp_path)
+    url = content_url("", tmp_path / "models" / "part.stl", "models/part.stl")
+    assert client.get(url).headers["cache-control"].endswith("immutable")
+    stale = client.get("/uploads/models/part.stl?v=deadbeef")
+    assert stale.headers["cache-control"] == "public, no-cache"
+
+
+def test_range_requests(tmp_path):
+    client = make_client(tmp_path)
+    partial = client.get("/uploads/models/part.stl", headers={"range": "bytes=100-199"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 100-199/{len(DATA)}"
+    assert partial.content == DATA[100:200]
+
+    tail = client.get("/uploads/models/part.stl", headers={"range": "bytes=-16"})
+    assert tail.content == DATA[-16:]
+
+    unsatisfiable = client.get("/uploads/models/part.stl", headers={"range": "bytes=99999-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == f"bytes */{len(DATA)}"
+
+    stale = client.get(
+        "/uploads/models/part.stl", headers={"range": "bytes=0-9", "if-range": '"nope"'}
+    )
+    assert stale.status_code == 200
+    assert stale.content == DATA
+
+
+def test_head_and_missing_and_traversal(tmp_path):
+    client = make_client(tmp_path)
+    head = client.head("/uploads/models/part.stl")
+    assert head.status_code == 200
+    assert head.headers["content-length"] == str(len(DATA))
+    assert client.get("/uploads/models/missing.stl").status_code == 404
+    assert client.get("/uploads/models/../../etc/passwd").status_code == 404
+    assert client.get("/uploads/.env").status_code == 404
+    assert client.post("/uploads/models/part.stl").status_code == 405
@@ -0,0 +1,164 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import unquote
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.utils import static_files  # noqa: E402
+from app.utils.static_files import UploadsFileServer  # noqa: E402
+
+DATA = os.urandom(64 * 1024)
+PREFIX = "/_protected_uploads"
+
+
+class ProxyEmulator:
+    """
+    Stand-in for the nginx config in nginx/makerworks.conf: forward to the
+    app, and when it answers with X-Accel-Redirect serve that internal
+    location from disk, keeping the app's headers.
+    """
+
+    def __init__(self, app, root: Path):
+        self.app = app
+        self.root = root
+        self.handoffs = []
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["path"].startswith(PREFIX):  # `internal;`
+            await send({"type": "http.response.start", "status": 404, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        messages = []
+
+        async def capture(message):
+            messages.append(message)
+
+        await self.app(scope, receive, capture)
+        start = messages[0]
+        headers = dict(start["headers"])
+        target = headers.pop(b"x-accel-redirect", None)
+        if target is None:
+            for message in messages:
+                await send(message)
+            return
+
+        self.handoffs.append(target.decode())
+        body = (self.root / unquote(target.decode()[len(PREFIX) + 1:])).read_bytes()
+        headers[b"content-length"] = str(len(body)).encode()
+        headers[b"x-served-by"] = b"nginx-offload"
+        await send({"type": "http.response.start", "status": 200, "headers": list(headers.items())})
+        await send({"type": "http.response.body", "body": body})
+
+
+def write_file(root: Path) -> Path:
+    path = root / "users" / "u1" / "models" / "part.stl"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(DATA)
+    return path
+
+
+def test_nginx_mode_hands_body_to_proxy(tmp_path):
+    write_file(tmp_path)
+    app = FastAPI()
+    app.mount("/uploads", UploadsFileServer(tmp_path, offload="nginx", offload_prefix=PREFIX))
+
+    raw = TestClient(app).get("/uploads/users/u1/models/part.stl")
+    assert raw.status_code == 200
+    assert raw.content == b""
+    assert raw.headers["x-accel-redirect"] == f"{PREFIX}/users/u1/models/part.stl"
+    assert raw.headers["content-type"] == "model/stl"
+
+    proxy = ProxyEmulator(app, tmp_path)
+    client = TestClient(proxy)
+    response = client.get("/uploads/users/u1/models/part.stl")
+    assert response.content == DATA
+    assert response.headers["x-served-by"] == "nginx-offload"
+    assert "x-accel-redirect" not in response.headers
+    assert client.get(f"{PREFIX}/users/u1/models/part.stl").status_code == 404
+
+    # Conditional requests never reach the proxy's file handler.
+    cached = client.get(
+        "/uploads/users/u1/models/part.stl", headers={"if-none-match": raw.headers["etag"]}
+    )
+    assert cached.status_code == 304
+    assert len(proxy.handoffs) == 1
+
+
+def test_sendfile_mode_points_at_proxy_visible_path(tmp_path):
+    write_file(tmp_path)
+    app = FastAPI()
+    app.mount("/uploads", UploadsFileServer(tmp_path, offload="sendfile", offload_root="/srv/uploads"))
+    response = TestClient(app).get("/uploads/users/u1/models/part.stl")
+    assert response.headers["x-sendfile"] == "/srv/uploads/users/u1/models/part.stl"
+    assert response.content == b""
+
+
+def load_models_router():
+    spec = importlib.util.spec_from_file_location(
+        "app.routes.models", Path(__file__).resolve().parents[1] / "app" / "routes" / "models.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def get(self, model, key):
+        return self.rows.get(key)
+
+
+def test_download_route_checks_access_counts_and_offloads(tmp_path, monkeypatch):
+    write_file(tmp_path)
+    models = load_models_router()
+    server = UploadsFileServer(tmp_path, offload="nginx", offload_prefix=PREFIX)
+    monkeypatch.setattr(static_files, "get_uploads_server", lambda: server)
+
+    counted = []
+
+    async def record_download(model_id, mode="direct"):
+        counted.append((model_id, mode))
+        return len(counted)
+
+    monkeypatch.setattr(models, "record_download", record_download)
+    monkeypatch.setattr(models.settings, "uploads_offload", "nginx")
+
+    model_id = uuid.uuid4()
+    row = SimpleNamespace(id=model_id, filepath="users/u1/models/part.stl", filename="Bench ý.stl")
+
+    app = FastAPI()
+    app.include_router(models.router, prefix="/api/v1/models")
+    app.dependency_overrides[models.get_async_db] = lambda: FakeSession({model_id: row})
+    app.dependency_overrides[models.get_current_user] = lambda: SimpleNamespace(id="u1")
+    client = TestClient(ProxyEmulator(app, tmp_path))
+
+    response = client.get(f"/api/v1/models/{model_id}/download")
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["content-disposition"].startswith("attachment;")
+    assert "filename*=UTF-8''Bench%20%C3%BD.stl" in response.headers["content-disposition"]
+    assert counted == [(model_id, "nginx")]
+
+    missing = client.get(f"/api/v1/models/{uuid.uuid4()}/download")
+    assert missing.status_code == 404
+    assert len(counted) == 1
+
+    del app.dependency_overrides[models.get_current_user]
+    assert client.get(f"/api/v1/models/{model_id}/download").status_code == 401
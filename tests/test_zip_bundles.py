@@ -0,0 +1,142 @@
+import asyncio
+import importlib.util
+import io
+import os
+import sys
+import uuid
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("ENV", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+from app.models.models import Favorite, ModelMetadata, User  # noqa: E402
+from app.services.storage import MemoryStorage, layout  # noqa: E402
+from app.utils.zipstream import ZipEntry, stream_zip, unique_names  # noqa: E402
+
+STL = b"solid part\n" + b"facet normal 0 0 1\n" * 2000 + b"endsolid part\n"
+PNG = os.urandom(5000)
+
+
+async def chunks(data, size=1000):
+    for offset in range(0, len(data), size):
+        yield data[offset : offset + size]
+
+
+def build(entries):
+    async def collect():
+        return [chunk async for chunk in stream_zip(entries)]
+
+    return asyncio.run(collect())
+
+
+def test_stored_and_deflated_entries_round_trip():
+    parts = build(
+        [
+            ZipEntry("part.stl", chunks(STL), len(STL), datetime(2024, 5, 17, 10, 30)),
+            ZipEntry("Bänk/preview.png", chunks(PNG), len(PNG), compress=False),
+        ]
+    )
+    # The archive is produced piece by piece, not assembled in memory first.
+    assert len(parts) > 10 and max(map(len, parts)) <= 1100
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(parts)))
+    assert archive.testzip() is None
+    stl, png = archive.infolist()
+    assert (stl.filename, stl.compress_type, stl.date_time) == (
+        "part.stl",
+        zipfile.ZIP_DEFLATED,
+        (2024, 5, 17, 10, 30, 0),
+    )
+    assert stl.compress_size < len(STL) // 10
+    assert (png.filename, png.compress_type, png.file_size) == (
+        "Bänk/preview.png",
+        zipfile.ZIP_STORED,
+        len(PNG),
+    )
+    assert archive.read("part.stl") == STL and archive.read("Bänk/preview.png") == PNG
+
+
+def test_entries_of_unknown_size_use_zip64():
+    data = b"".join(build([ZipEntry("big.stl", chunks(STL))]))
+    assert b"PK\x06\x06" in data and b"PK\x06\x07" in data  # ZIP64 end records
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert archive.testzip() is None and archive.read("big.stl") == STL
+
+
+def test_duplicate_names_are_numbered():
+    assert unique_names(["a.stl", "A.stl", "a.stl", "b"]) == ["a.stl", "A (2).stl", "a (3).stl", "b"]
+
+
+def test_favorites_and_id_bundles(make_sessions, make_app, monkeypatch):
+    spec = importlib.util.spec_from_file_location(
+        "app.routes.models", Path(__file__).resolve().parents[1] / "app" / "routes" / "models.py"
+    )
+    models = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(models)
+
+    memory = MemoryStorage()
+    monkeypatch.setattr(models, "get_storage", lambda: memory)
+    counted = []
+
+    async def record_download(model_id, mode="direct"):
+        counted.append((model_id, mode))
+
+    monkeypatch.setattr(models, "record_download", record_download)
+    read = []
+
+    async def record_access(key, cold=False):
+        read.append(key)
+
+    monkeypatch.setattr(models.tiering, "record_access", record_access)
+
+    sessions = make_sessions(User, ModelMetadata, Favorite)
+    user_id = uuid.uuid4()
+    ids = [uuid.uuid4() for _ in range(3)]
+
+    async def setup():
+        async with sessions() as db:
+            db.add(User(id=user_id, email="a@example.com", username="a", hashed_password="x"))
+            for i, model_id in enumerate(ids):
+                key = layout.model_key(model_id, ".stl")
+                await memory.put(key, STL + bytes([i]))
+                db.add(
+                    ModelMetadata(
+                        id=model_id,
+                        user_id=user_id,
+                        name="m",
+                        filename="bench.stl",
+                        filepath=key,
+                        file_url="x",
+                    )
+                )
+            await db.flush()
+            db.add(Favorite(user_id=user_id, model_id=ids[2]))
+            await db.commit()
+
+    asyncio.run(setup())
+
+    app = make_app(models, "/api/v1/models", sessions, SimpleNamespace(id=user_id))
+    client = TestClient(app)
+
+    response = client.get("/api/v1/models/bundle", params={"ids": [str(ids[1]), str(ids[0])]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == ["bench.stl", "bench (2).stl"]
+    assert archive.read("bench.stl") == STL + b"\x01"
+    assert counted == [(ids[1], "bundle"), (ids[0], "bundle")]
+    # Bundle reads keep the files out of the cold tier like direct downloads
+    assert read == [layout.model_key(ids[1], ".stl"), layout.model_key(ids[0], ".stl")]
+
+    favorites = client.get("/api/v1/models/favorites/bundle")
+    archive = zipfile.ZipFile(io.BytesIO(favorites.content))
+    assert archive.read("bench.stl") == STL + b"\x02"
+
+    assert client.get("/api/v1/models/bundle", params={"ids": [str(uuid.uuid4())]}).status_code == 404